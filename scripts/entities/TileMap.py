@@ -229,3 +229,27 @@ def load_tmx_to_array(file_path):
         return map_array
     else:
         raise TypeError("The first layer is not a valid Tile Layer.")
+
+
+def load_layer_to_array(file_path, layer_name):
+    """
+    Load a named tile layer of a TMX file into a 2D array, like load_tmx_to_array does for the first layer.
+
+    Args:
+        file_path (str): Path to the TMX file.
+        layer_name (str): Name of the tile layer, e.g. "ladders" or "wall_jump".
+
+    Returns:
+        list[list[int]]: A 2D array where `1` represents a tile and `0` represents empty space.
+
+    Raises:
+        ValueError: If the layer is not in the TMX file or is not a tile layer.
+    """
+    tmx_data = pytmx.TiledMap(file_path)
+    try:
+        layer = tmx_data.get_layer_by_name(layer_name)
+    except KeyError:
+        raise ValueError(f"Layer '{layer_name}' not found in the .tmx file.")
+    if not isinstance(layer, pytmx.TiledTileLayer):
+        raise ValueError(f"Layer '{layer_name}' is not a tile layer.")
+    return [[1 if layer.data[y][x] != 0 else 0 for x in range(layer.width)] for y in range(layer.height)]
@@ -1,12 +1,19 @@
 # Importing necessary Python modules
 import math
-from typing import List, Tuple
+from collections import deque
+from typing import Deque, List, Optional, Tuple
 
 import pygame
 from PIL.ImageChops import screen
 from pygame import Surface
 
+from scripts.entities.enemy_swarm import EnemySwarm, SwarmField
+from scripts.game.algorithms.dstar_lite import DStarLite
+from scripts.game.algorithms.grid_search import get_grid_search
+from scripts.game.algorithms.path_smoothing import smooth_path
 from scripts.game.algorithms.pathfinding import a_star
+from scripts.game.algorithms.reachability import NO_COMPONENT, get_reachability
+from scripts.game.algorithms.visibility import get_visibility
 
 
 class Enemy:
@@ -18,7 +25,7 @@ class Enemy:
     - rect (pygame.Rect): The rectangle (hitbox) representing the enemy's position and size for collision detection.
     - tile_array (List[List[int]]): The level's grid map used for pathfinding and navigation (0 for empty, 1 for obstacles).
     - enemy_array_pos (Tuple[int, int]): The enemy's position in the level grid, represented by grid indices (x, y).
-    - current_path (List[Tuple[int, int]]): The path that the enemy follows, calculated using the A* algorithm or another pathfinding method.
+    - current_path (Deque[Tuple[int, int]]): The waypoints the enemy follows, calculated using the A* algorithm or another pathfinding method.
     - level_width (int): The width of the level (in tiles).
     - level_height (int): The height of the level (in tiles).
     - acc_dx (float): The enemy's accumulated horizontal velocity (x-axis), representing its movement speed in the x-direction.
@@ -30,6 +37,21 @@ class Enemy:
     - update_pos: Updates the enemy's position in the grid when it is aligned to the 30x30 grid.
     """
 
+    # Flying enemies plan on the level grid, so the game can batch, share and invalidate their paths
+    plans_on_grid = True
+
+    # The EnemySwarm that moves the enemy, if any, and the enemy's row in it.
+    # While in a swarm the movement state below lives in the swarm's arrays
+    swarm: Optional[EnemySwarm] = None
+    swarm_index = -1
+    rect = SwarmField()
+    enemy_array_pos = SwarmField()
+    current_path = SwarmField()
+    acc_dx = SwarmField()
+    acc_dy = SwarmField()
+    allow_move = SwarmField()
+    flip_animation = SwarmField()
+
     def __init__(self,
                  grid_position: Tuple[int, int],
                  level_grid: List[List[int]],
@@ -68,7 +90,12 @@ class Enemy:
         self.enemy_array_pos: Tuple[int, int] = grid_position
 
         # List for the path the enemy will follow (e.g., from A* algorithm)
-        self.current_path: List[Tuple[int, int]] = []
+        # Waypoints are popped from the front as they are reached
+        self.current_path: Deque[Tuple[int, int]] = deque()
+        # Whether planned paths are cut down to the waypoints where the enemy has to turn
+        self.smooth_paths = enemy_settings.get("smooth_paths", True)
+        # Whether the enemy flies straight at a visible player instead of searching
+        self.line_of_sight_shortcut = enemy_settings.get("line_of_sight_shortcut", True)
 
         # Get the dimensions of the level grid (width and height in tiles)
         self.level_width: int = len(level_grid[0])  # Number of columns (tiles wide)
@@ -82,6 +109,11 @@ class Enemy:
 
         # Store the last known player position for pathfinding updates
         self.last_player_pos: List[int] = []
+
+        # Optional D* Lite planner that keeps its search between replans instead of starting over
+        self.incremental_planner: Optional[DStarLite] = None
+        if enemy_settings.get("incremental_replanning", False):
+            self.incremental_planner = DStarLite(get_grid_search(level_grid))
         
         self.allow_move = True
         animation_frames = [pygame.image.load(r"assets\bat_enemy\1.png"),
@@ -92,6 +124,9 @@ class Enemy:
         self.animation_frames = [pygame.transform.scale(frame, (int(30*self.scale_x)*2, int(30*self.scale_y)*2)) for frame in animation_frames]
         self.curr_frame = 0
         self.flip_animation = False
+        # Set by the game's AILevelOfDetail, enemies far from the player don't advance their animation
+        self.lod_tier = 0
+        self.animate = True
     def update_pos(self):
 
         # Update the enemy's position in the grid based on the rectangle's coordinates
@@ -111,6 +146,14 @@ class Enemy:
             mag = math.hypot(dx, dy)  # Euclidean distance (same as sqrt(dx^2 + dy^2))
             if mag == 0:
                 return
+
+            # Land on the waypoint instead of flying past it when it is within this frame's move
+            if mag <= self.enemy_speed*dt:
+                self.flip_animation = dx <= 0
+                self.rect = self.rect.move(round(dx), round(dy))
+                self.acc_dx = 0.0
+                self.acc_dy = 0.0
+                return
     
             # Normalises the distances by dividing by the magnitude
             norm_dx = dx / mag
@@ -124,35 +167,126 @@ class Enemy:
                 self.flip_animation = False
             else:
                 self.flip_animation = True
-            # Updates the rect position with accumulated movement
-            self.rect.x += int(self.acc_dx)
-            self.rect.y += int(self.acc_dy)
+            # Updates the rect position with accumulated movement, one assignment also moves a swarm's row
+            self.rect = self.rect.move(int(self.acc_dx), int(self.acc_dy))
     
             # Subtracts the integer part of the accumulated movement to keep the decimal part
             self.acc_dx -= int(self.acc_dx)
             self.acc_dy -= int(self.acc_dy)
 
 
-    def run_a_star(self, current_level: list[list[int]], player_pos: list[int], enemy_positions) -> None:
+    def reached_waypoint(self) -> bool:
+        """
+        Returns whether the enemy's rect is on its current waypoint, to within a pixel.
+
+        The enemy's cell can match the waypoint while the rect is still up to a tile away,
+        and turning there would cut the corners the smoothed path was checked against.
+        """
+        y2, x2 = self.current_path[0]
+        return math.hypot(x2 * 30*self.scale_x - self.rect.x, y2 * 30*self.scale_y - self.rect.y) < 1
+
+    def run_a_star(self, current_level: list[list[int]], player_pos: list[int], influence_map=None,
+                   planner=a_star, request_path=None, deadline=None) -> None:
         """
         Updates the enemy's path toward the player using the A* algorithm.
+
+        Args:
+            current_level: The current level's grid.
+            player_pos: The player's position in the grid.
+            influence_map: Optional enemy danger map used as an extra move cost.
+            planner: The level's planner function, a_star or one with the same signature.
+                Not used when the enemy has its own incremental planner.
+            request_path: Optional callable that queues a time-sliced search instead of planning now,
+                called as request_path(enemy, level, start, goal, influence_map).
+            deadline: Optional time.perf_counter() value the search must finish by, passed to the
+                planner as its deadline keyword. A search cut off by it gives a partial path.
         """
-        
+
         # Update path only if the player's position has changed
-        if tuple(self.last_player_pos) != tuple(player_pos):
-            self.last_player_pos = [int(player_pos[0]), int(player_pos[1])]
-    
-            # Find path from enemy to player
-            self.current_path = a_star(
-                current_level,
-                (int(self.enemy_array_pos[0]), int(self.enemy_array_pos[1])),
-                (int(player_pos[0]), int(player_pos[1])),
-                enemy_positions
-            )
-    
-            # Skip the enemy's current position in the path
-            if self.current_path:
-                self.current_path = self.current_path[1:]
+        query = self.path_query(current_level, player_pos)
+        if query is None:
+            return
+        start, goal = query
+
+        # A player in plain sight needs no search
+        if self.try_direct_path(current_level, start, goal):
+            return
+
+        # Find path from enemy to player
+        if self.incremental_planner is not None:
+            # Repairs the previous search for the new enemy and player cells
+            self.set_path(self.incremental_planner.find_path(start, goal))
+        elif request_path is not None:
+            # The old path is kept until the queued search hands over a new one
+            request_path(self, current_level, start, goal, influence_map)
+        elif deadline is not None:
+            self.set_path(planner(current_level, start, goal, influence_map, deadline=deadline))
+        else:
+            self.set_path(planner(current_level, start, goal, influence_map))
+
+    def path_query(self, current_level: list[list[int]], player_pos: list[int]):
+        """
+        Works out the search the enemy needs, if the player has moved since its last one.
+
+        Args:
+            current_level: The current level's grid.
+            player_pos: The player's position in the grid.
+
+        Returns:
+            The (start, goal) cells to plan between, or None if the current path still holds.
+        """
+        if tuple(self.last_player_pos) == tuple(player_pos):
+            return None
+        self.last_player_pos = [int(player_pos[0]), int(player_pos[1])]
+
+        start = (int(self.enemy_array_pos[0]), int(self.enemy_array_pos[1]))
+        goal = (int(player_pos[0]), int(player_pos[1]))
+
+        # A goal in another component would make the search expand every reachable cell before failing,
+        # head for the closest cell that can be reached instead (the enemy's own cell gives an empty path)
+        reachability = get_reachability(current_level)
+        if reachability.component_of(start) != NO_COMPONENT and not reachability.connected(start, goal):
+            goal = reachability.nearest_reachable(start, goal)
+        return start, goal
+
+    def try_direct_path(self, current_level: list[list[int]], start: Tuple[int, int], goal: Tuple[int, int]) -> bool:
+        """
+        Points the enemy straight at the goal when nothing is in the way, so no search is needed.
+
+        Args:
+            current_level: The current level's grid.
+            start: The enemy's cell.
+            goal: The cell to reach, as returned by path_query.
+
+        Returns:
+            bool: True if the enemy now flies straight at the goal, False if it still needs a planner.
+        """
+        if not self.line_of_sight_shortcut or not get_visibility(current_level).visible(start, goal):
+            return False
+        self.current_path = deque([goal] if goal != start else [])
+        return True
+
+    def set_path(self, path: List[Tuple[int, int]]) -> None:
+        """
+        Sets the path to follow from a planned path that starts at the enemy's cell.
+
+        Args:
+            path: The planned path, its first cell is skipped since the enemy is already there.
+        """
+        if self.smooth_paths:
+            # Fly straight between the cells where the path has to turn
+            path = smooth_path(self.tile_array, path)
+        self.current_path = deque(path[1:])
+
+    def follow_flow_field(self, flow_field) -> None:
+        """
+        Points the enemy at the next cell of a shared flow field instead of running its own search.
+
+        Args:
+            flow_field: The level's FlowField toward the player.
+        """
+        next_cell = flow_field.next_step((int(self.enemy_array_pos[0]), int(self.enemy_array_pos[1])))
+        self.current_path = deque([next_cell] if next_cell is not None else [])
     
 
 
@@ -190,10 +324,12 @@ class Enemy:
                                                            (something[0]*30*self.scale_x) + (30*self.scale_y)//2), 5)
     def animations(self, game_screen):
 
-        if self.curr_frame < len(self.animation_frames) -1:
-            self.curr_frame += 0.17
-        else:
-            self.curr_frame = 0
+        # Enemies far from the player hold their current frame
+        if self.animate:
+            if self.curr_frame < len(self.animation_frames) -1:
+                self.curr_frame += 0.17
+            else:
+                self.curr_frame = 0
 
         # Flip the frame if moving left
         frame = self.animation_frames[int(self.curr_frame)]
@@ -216,7 +352,8 @@ class Enemy:
             game_screen.blit(enemy_name_tag, (self.rect.x - 8, self.rect.y - 16))
         
 
-    def update(self, current_level: list[list[int]], player_pos: list[int], dt) -> None:
+    def update(self, current_level: list[list[int]], player_pos: list[int], dt, flow_field=None,
+               planner=a_star, request_path=None, deadline=None, influence_map=None) -> None:
         """
         Updates the enemy's position, moves the enemy and creates the initial path.
         
@@ -224,6 +361,11 @@ class Enemy:
             current_level: The current level's grid.
             player_pos: The player's position in the grid.
             dt: Delta time used to keep movement updates smooth.
+            flow_field: The level's FlowField when enemies share one, otherwise None.
+            planner: The level's planner function used when the enemy needs a new path.
+            request_path: Optional callable that queues a time-sliced search instead of planning now.
+            deadline: Optional time.perf_counter() value a new path search must finish by.
+            influence_map: Optional enemy danger map, the same one the PATH_FIND replans use.
         """
 
         # Check if there is a path available to follow
@@ -231,13 +373,17 @@ class Enemy:
             # Move the enemy along the path and update position
             self.move(dt)
             self.update_pos()
-            # Check if the enemy has reached the next path
-            if self.current_path[0] == (int(self.enemy_array_pos[0]), int(self.enemy_array_pos[1])):
-                self.current_path.remove(self.current_path[0])
+            # Only turn to the next waypoint once the rect is on this one, not as soon as its cell is entered
+            if self.reached_waypoint():
+                self.current_path.popleft()
 
         else:
             # No path available, so update the position and recalculate the path
             self.update_pos()
+            if flow_field is not None:
+                # Take the next step from the shared flow field
+                self.follow_flow_field(flow_field)
+                return
             # Set player's last position to a different value so the path is calculated
             self.last_player_pos = [0,0]
-            self.run_a_star(current_level, player_pos, [])
\ No newline at end of file
+            self.run_a_star(current_level, player_pos, influence_map, planner, request_path, deadline)
\ No newline at end of file
@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+from typing import Deque, List, Tuple
+
+import numpy as np
+import pygame
+
+
+class SwarmField:
+    """
+    An Enemy attribute that is kept in its swarm's arrays once the enemy joins an EnemySwarm.
+
+    Outside a swarm the value is an ordinary instance attribute. Inside one,
+    reads and writes go to the swarm, so the Enemy object is only a view of its
+    row and the rest of the game can keep using enemy.rect, enemy.current_path
+    and so on as before.
+    """
+
+    def __set_name__(self, owner, name: str) -> None:
+        self.name = name
+        self.private_name = "_" + name
+
+    def __get__(self, enemy, owner=None):
+        if enemy is None:
+            return self
+        if enemy.swarm is None:
+            return enemy.__dict__[self.private_name]
+        return enemy.swarm.read(self.name, enemy.swarm_index)
+
+    def __set__(self, enemy, value) -> None:
+        if enemy.swarm is None:
+            enemy.__dict__[self.private_name] = value
+        else:
+            enemy.swarm.write(self.name, enemy.swarm_index, value)
+
+
+class SwarmRect(pygame.Rect):
+    """
+    The rect of an enemy in a swarm, as read through enemy.rect.
+
+    The swarm keeps the position in its arrays, so the rect is made on every
+    read. Changing it in place writes the new position and size back to the
+    swarm, so enemy.rect.x += 1 moves the enemy the same way inside and outside
+    a swarm. Rects made from it, e.g. by move or copy, are ordinary copies.
+    """
+
+    def __init__(self, swarm: EnemySwarm, index: int) -> None:
+        super().__init__(int(swarm.x[index]), int(swarm.y[index]), int(swarm.width[index]), int(swarm.height[index]))
+        # Stored in the instance dict directly, setting an attribute writes the rect back
+        self.__dict__["row"] = (swarm, index)
+
+    def __setattr__(self, name: str, value) -> None:
+        super().__setattr__(name, value)
+        self._write_back()
+
+    def _write_back(self) -> None:
+        # Copies made by pygame have no row and belong to nobody
+        row = self.__dict__.get("row")
+        if row is not None:
+            swarm, index = row
+            swarm.x[index], swarm.y[index], swarm.width[index], swarm.height[index] = self
+
+
+def _writing_back(name: str):
+    """
+    Wraps an in-place pygame.Rect method of SwarmRect so its change is written back to the swarm.
+    """
+    method = getattr(pygame.Rect, name)
+
+    def write_back_after(rect: SwarmRect, *args, **kwargs):
+        method(rect, *args, **kwargs)
+        rect._write_back()
+
+    write_back_after.__name__ = name
+    return write_back_after
+
+
+for _name in ("move_ip", "inflate_ip", "scale_by_ip", "update", "clamp_ip", "union_ip", "unionall_ip", "normalize"):
+    # scale_by_ip only exists in newer pygame versions
+    if hasattr(pygame.Rect, _name):
+        setattr(SwarmRect, _name, _writing_back(_name))
+
+
+class EnemySwarm:
+    """
+    The movement state of a group of flying enemies, one row per enemy in NumPy arrays.
+
+    Enemy.move and Enemy.update_pos do the same few float operations for every
+    bat, one Python call at a time. The swarm keeps the positions, accumulated
+    movement, speeds and current waypoints side by side instead, so step moves
+    every bat toward its waypoint and works out its grid cell in a handful of
+    array operations, whatever the number of bats.
+
+    Paths stay in each enemy's deque, where set_path, the flow field and the
+    line-of-sight shortcut put them. A path only needs Python work when it
+    changes: assigning enemy.current_path marks the row, and the waypoint
+    arrays are refreshed for the marked rows before the next step. Because of
+    this a path must be replaced, not changed in place.
+
+    Attributes:
+        enemies (List[Enemy]): The enemies, in row order. Each one's swarm_index is its row.
+        x, y (np.ndarray): Top-left corner of each enemy's rect in pixels.
+        width, height (np.ndarray): Size of each enemy's rect in pixels.
+        acc_dx, acc_dy (np.ndarray): The fraction of a pixel each enemy has moved but not yet been drawn at.
+        speed (np.ndarray): Each enemy's speed in pixels per frame.
+        tile_width, tile_height (np.ndarray): Size of a grid cell in pixels for each enemy.
+        row, column (np.ndarray): Each enemy's cell in the level grid.
+        target_row, target_column (np.ndarray): The cell each enemy is flying to, the front of its path.
+        has_target (np.ndarray): Whether each enemy's path has a waypoint left.
+        allow_move (np.ndarray): Whether each enemy may move, False while a closed door stops it.
+        flip_animation (np.ndarray): Whether each enemy faces left.
+    """
+
+    def __init__(self, enemies: List) -> None:
+        """
+        Takes over the movement state of some enemies. From now on they are views of the swarm's rows.
+
+        Args:
+            enemies: The enemies, they must not belong to another swarm.
+        """
+        self.enemies = list(enemies)
+        count = len(self.enemies)
+        self.x = np.array([enemy.rect.x for enemy in self.enemies], dtype=np.int64)
+        self.y = np.array([enemy.rect.y for enemy in self.enemies], dtype=np.int64)
+        self.width = np.array([enemy.rect.width for enemy in self.enemies], dtype=np.int64)
+        self.height = np.array([enemy.rect.height for enemy in self.enemies], dtype=np.int64)
+        self.acc_dx = np.array([enemy.acc_dx for enemy in self.enemies], dtype=np.float64)
+        self.acc_dy = np.array([enemy.acc_dy for enemy in self.enemies], dtype=np.float64)
+        self.speed = np.array([enemy.enemy_speed for enemy in self.enemies], dtype=np.float64)
+        self.tile_width = np.array([30 * enemy.scale_x for enemy in self.enemies], dtype=np.float64)
+        self.tile_height = np.array([30 * enemy.scale_y for enemy in self.enemies], dtype=np.float64)
+        self.row = np.array([enemy.enemy_array_pos[0] for enemy in self.enemies], dtype=np.int64)
+        self.column = np.array([enemy.enemy_array_pos[1] for enemy in self.enemies], dtype=np.int64)
+        self.allow_move = np.array([enemy.allow_move for enemy in self.enemies], dtype=bool)
+        self.flip_animation = np.array([enemy.flip_animation for enemy in self.enemies], dtype=bool)
+
+        self.paths: List[Deque[Tuple[int, int]]] = [enemy.current_path for enemy in self.enemies]
+        self.target_row = np.zeros(count, dtype=np.int64)
+        self.target_column = np.zeros(count, dtype=np.int64)
+        self.has_target = np.zeros(count, dtype=bool)
+        # Rows whose path was replaced since their waypoint was last read
+        self.path_changed = np.ones(count, dtype=bool)
+
+        for index, enemy in enumerate(self.enemies):
+            enemy.swarm = self
+            enemy.swarm_index = index
+
+    def __len__(self) -> int:
+        return len(self.enemies)
+
+    # Views
+    def read(self, name: str, index: int):
+        """
+        Returns an enemy's value of a SwarmField, in the type Enemy itself uses.
+        """
+        if name == "rect":
+            return SwarmRect(self, index)
+        if name == "enemy_array_pos":
+            return [int(self.row[index]), int(self.column[index])]
+        if name == "current_path":
+            return self.paths[index]
+        return getattr(self, name)[index].item()
+
+    def write(self, name: str, index: int, value) -> None:
+        """
+        Stores an enemy's new value of a SwarmField in the swarm's arrays.
+        """
+        if name == "rect":
+            self.x[index], self.y[index], self.width[index], self.height[index] = value
+        elif name == "enemy_array_pos":
+            self.row[index], self.column[index] = value
+        elif name == "current_path":
+            self.paths[index] = value
+            self.path_changed[index] = True
+        else:
+            getattr(self, name)[index] = value
+
+    # Movement
+    def _read_waypoints(self) -> None:
+        """
+        Refreshes the waypoint arrays of the rows whose path was replaced.
+        """
+        for index in np.flatnonzero(self.path_changed).tolist():
+            path = self.paths[index]
+            self.has_target[index] = bool(path)
+            if path:
+                self.target_row[index], self.target_column[index] = path[0]
+        self.path_changed[:] = False
+
+    def idle_enemies(self) -> List:
+        """
+        Returns:
+            List[Enemy]: The enemies with no waypoint left, they need a new path instead of a step.
+        """
+        self._read_waypoints()
+        return [self.enemies[index] for index in np.flatnonzero(~self.has_target).tolist()]
+
+    def step(self, dt: float) -> None:
+        """
+        Moves every enemy with a waypoint toward it, like Enemy.move, then updates its cell like
+        Enemy.update_pos and drops the waypoint once the enemy's rect reaches it.
+
+        Args:
+            dt: Delta time used to keep movement updates smooth.
+        """
+        self._read_waypoints()
+        following = self.has_target
+        if not following.any():
+            return
+
+        dx = self.target_column * self.tile_width - self.x
+        dy = self.target_row * self.tile_height - self.y
+        distance = np.hypot(dx, dy)
+        # Enemies already on their waypoint's corner or stopped by a door keep still
+        moving = following & self.allow_move & (distance > 0)
+        # Enemies whose waypoint is within this frame's move land on it, like Enemy.move
+        landing = moving & (distance <= self.speed * dt)
+        moving &= ~landing
+        self.flip_animation[landing] = dx[landing] <= 0
+        self.x[landing] += np.round(dx[landing]).astype(np.int64)
+        self.y[landing] += np.round(dy[landing]).astype(np.int64)
+        self.acc_dx[landing] = 0.0
+        self.acc_dy[landing] = 0.0
+
+        distance[~moving] = 1.0
+        # The same operations in the same order as Enemy.move
+        speed = np.where(moving, self.speed, 0.0)
+        self.acc_dx += dx / distance * speed * dt
+        self.acc_dy += dy / distance * speed * dt
+        self.flip_animation[moving] = self.acc_dx[moving] <= 0
+
+        # Whole pixels are moved, the fraction is kept for the next frame
+        whole_dx = np.trunc(self.acc_dx)
+        whole_dy = np.trunc(self.acc_dy)
+        self.x += whole_dx.astype(np.int64)
+        self.y += whole_dy.astype(np.int64)
+        self.acc_dx -= whole_dx
+        self.acc_dy -= whole_dy
+
+        # Same cell size as Enemy.update_pos
+        self.row[following] = (self.y[following] / self.tile_height[following]).astype(np.int64)
+        self.column[following] = (self.x[following] / self.tile_height[following]).astype(np.int64)
+
+        # Same test as Enemy.reached_waypoint
+        reached = following & (np.hypot(self.target_column * self.tile_width - self.x,
+                                         self.target_row * self.tile_height - self.y) < 1)
+        for index in np.flatnonzero(reached).tolist():
+            self.paths[index].popleft()
+            self.path_changed[index] = True
+
+    def colliding(self, rect: pygame.Rect) -> np.ndarray:
+        """
+        Args:
+            rect: A rectangle in pixels, e.g. the player's or a door's.
+
+        Returns:
+            np.ndarray: Whether each enemy's rect overlaps it, like pygame.Rect.colliderect.
+        """
+        return ((self.x < rect.right) & (self.x + self.width > rect.left)
+                & (self.y < rect.bottom) & (self.y + self.height > rect.top)
+                & (self.width > 0) & (self.height > 0))
@@ -0,0 +1,287 @@
+# Importing necessary Python modules
+import math
+from collections import deque
+from typing import Deque, List, Tuple
+
+from scripts.entities.enemy import Enemy
+from scripts.game.algorithms.pathfinding import a_star
+from scripts.game.algorithms.platform_graph import PlatformGraph, Step
+
+
+class GroundEnemy(Enemy):
+    """
+    An enemy that walks, jumps, falls and climbs with the player's physics instead of flying.
+
+    Routes come from the level's PlatformGraph, whose links were simulated
+    with the same movement constants, so the enemy only has to replay them:
+    walk links walk to the next cell, jump and fall links set off with the
+    link's horizontal speed and let gravity do the rest, and climb links move
+    straight up or down a ladder. The enemy collides with the graph's solid
+    tiles like the player does with the platforms, and plans again whenever
+    it lands somewhere other than where a link was aimed.
+
+    Attributes:
+    - platform_graph (PlatformGraph): The level's walk, fall, jump and climb links.
+    - route (Deque[Step]): The links still to take, current_path holds the cells they reach.
+    - vel_x (float): Horizontal velocity in pixels per frame.
+    - vel_y (float): Vertical velocity in pixels per frame.
+    - on_ground (bool): Whether the enemy is standing on a solid tile.
+    - climbing (bool): Whether the enemy is holding on to a ladder, with no gravity.
+    - on_wall (bool): Whether the enemy is against a wall-jump tile, ready to jump again.
+    """
+
+    # Ground enemies plan on their platform graph, not on the level grid
+    plans_on_grid = False
+
+    def __init__(self,
+                 grid_position: Tuple[int, int],
+                 level_grid: List[List[int]],
+                 enemy_settings: dict,
+                 handler,
+                 stretched,
+                 platform_graph: PlatformGraph) -> None:
+        """
+        Initialises the enemy like Enemy does, with the platform graph it plans on.
+
+        Parameters:
+        - platform_graph (PlatformGraph): The level's graph, built for the enemy's body height.
+        """
+        super().__init__(grid_position, level_grid, enemy_settings, handler, stretched)
+        self.platform_graph = platform_graph
+        self.route: Deque[Step] = deque()
+        # Grid planners don't know about gravity, the route always comes from the platform graph
+        self.incremental_planner = None
+
+        # The graph's movement constants are in tiles per frame, converted to this resolution's pixels
+        self.tile_width, self.tile_height = 30 * self.scale_x, 30 * self.scale_y
+        movement = platform_graph.movement
+        self.walk_speed = movement.walk_speed * self.tile_width
+        self.gravity_speed = movement.gravity_speed * self.tile_height
+        self.terminal_velocity = movement.terminal_velocity * self.tile_height
+        self.jump_speed = movement.jump_speed * self.tile_height
+        self.climb_speed = movement.climb_speed * self.tile_height
+        self.rect.height = int(self.tile_height * platform_graph.body_height)
+
+        self.pos_x, self.pos_y = float(self.rect.x), float(self.rect.y)
+        self.vel_x = 0.0
+        self.vel_y = 0.0
+        self.on_ground = False
+        self.climbing = False
+        self.on_wall = False
+        # Whether the enemy was in the air last frame, so a landing can be told apart from standing
+        self.was_airborne = True
+
+    def body_cell(self) -> Tuple[int, int]:
+        """
+        Returns:
+            The (row, column) cell of the bottom of the enemy's body.
+        """
+        row = int((self.pos_y + self.rect.height - 1) // self.tile_height)
+        column = int((self.pos_x + self.tile_width / 2) // self.tile_width)
+        # Straddling two columns, the enemy stands on the one with ground below
+        left, right = int(self.pos_x // self.tile_width), int((self.pos_x + self.tile_width - 1) // self.tile_width)
+        other = left if column == right else right
+        graph = self.platform_graph
+        if other != column and not graph.can_stand(row, column) and graph.can_stand(row, other):
+            return row, other
+        return row, column
+
+    def run_a_star(self, current_level: list[list[int]], player_pos: list[int], influence_map=None,
+                   planner=a_star, request_path=None, deadline=None) -> None:
+        """
+        Plans a route to the player on the platform graph, if the player moved since the last one.
+
+        Takes the same arguments as Enemy.run_a_star, only the player's position is used.
+        A route can't change in the middle of a jump, so the enemy waits until it lands.
+        """
+        if tuple(self.last_player_pos) == tuple(player_pos) or self.was_airborne:
+            return
+        self.last_player_pos = [int(player_pos[0]), int(player_pos[1])]
+
+        graph = self.platform_graph
+        start = graph.node_at(self.body_cell())
+        # The player's grid position is the top of its two-tile body
+        goal = graph.node_at((int(player_pos[0]) + 1, int(player_pos[1])))
+        route = graph.find_path(start, goal) if start is not None and goal is not None else []
+        self.route = deque(route)
+        self.current_path = deque(cell for cell, _, _ in route)
+
+    def _next_step(self) -> None:
+        self.route.popleft()
+        self.current_path.popleft()
+
+    def _steer(self) -> None:
+        """
+        Sets the velocity that takes the enemy along the first link of its route.
+        """
+        (row, column), kind, speed = self.route[0]
+        target_x = column * self.tile_width
+        target_y = (row + 1) * self.tile_height - self.rect.height
+
+        if kind == "climb":
+            self.climbing = True
+            self.pos_x, self.vel_x = target_x, 0.0
+            distance = target_y - self.pos_y
+            self.vel_y = math.copysign(min(self.climb_speed, abs(distance)), distance)
+            if abs(distance) < 1:
+                self.pos_y, self.vel_y = target_y, 0.0
+                self._next_step()
+            return
+
+        if kind == "walk":
+            # Still holding on while walking off or onto a ladder
+            self.climbing = self.platform_graph.on_ladder(*self.body_cell()) and not self.on_ground
+            distance = target_x - self.pos_x
+            self.vel_x = math.copysign(min(self.walk_speed, abs(distance)), distance)
+            if abs(distance) < 1:
+                self.pos_x, self.vel_x = target_x, 0.0
+                self._next_step()
+            return
+
+        self.climbing = False
+        if kind == "jump" and (self.on_ground or self.on_wall):
+            self.vel_y = -self.jump_speed
+            self.vel_x = speed * self.tile_width
+            self.on_wall = False
+        elif kind == "fall" and self.on_wall:
+            # Let go and slide down the wall
+            self.vel_x = 0.0
+            self.on_wall = False
+        elif kind == "fall" and self.on_ground:
+            # Walk off the edge one column at a time, gravity takes over once nothing is below.
+            # Stopping on every column keeps one tile wide holes from being walked over.
+            # The link's speed keeps the sign of the step off the edge, even when it is zero
+            direction = math.copysign(1, speed)
+            if direction < 0:
+                edge_x = math.floor((self.pos_x - 0.5) / self.tile_width) * self.tile_width
+            else:
+                edge_x = math.ceil((self.pos_x + 0.5) / self.tile_width) * self.tile_width
+            self.vel_x = direction * min(self.walk_speed, abs(edge_x - self.pos_x))
+
+    def _step_off(self) -> None:
+        """
+        Lines the enemy up with the column it just stepped off the edge into, where the fall link starts.
+        """
+        self.vel_x = self.route[0][2] * self.tile_width
+        # This frame is the first frame of the simulated fall, so it already moved at the link's speed
+        self.pos_x = round(self.pos_x / self.tile_width) * self.tile_width + self.vel_x
+
+    def _land(self) -> None:
+        """
+        Ends the jump or fall the enemy just landed from, planning again if it missed the link's target.
+        """
+        if not self.route or self.route[0][1] not in ("jump", "fall"):
+            return
+        row, column = self.route[0][0]
+        if self.body_cell() == (row, column):
+            self.pos_x, self.vel_x = column * self.tile_width, 0.0
+            self._next_step()
+        else:
+            # Landed short or long, plan again from here
+            self._replan()
+
+    def _reach_wall(self) -> None:
+        """
+        Ends the jump or fall that just pushed the enemy against a wall, if the link was aimed at that spot.
+        """
+        row, column = self.route[0][0]
+        top_row = row - self.platform_graph.body_height + 1
+        if (round(self.pos_y / self.tile_height), round(self.pos_x / self.tile_width)) == (top_row, column):
+            self.pos_x, self.pos_y = column * self.tile_width, top_row * self.tile_height
+            self.vel_x = self.vel_y = 0.0
+            self.on_wall = True
+            self._next_step()
+
+    def _replan(self) -> None:
+        """
+        Drops the route, so a new one is planned on the next update even if the player hasn't moved.
+        """
+        self.route.clear()
+        self.current_path.clear()
+        self.last_player_pos = [-1, -1]
+
+    def _blocked(self) -> bool:
+        """
+        Checks whether the enemy's body overlaps a solid tile of the platform graph.
+        """
+        first_row = int(self.pos_y // self.tile_height)
+        last_row = int((self.pos_y + self.rect.height - 1) // self.tile_height)
+        first_column = int(self.pos_x // self.tile_width)
+        last_column = int((self.pos_x + self.tile_width - 1) // self.tile_width)
+        return any(self.platform_graph.is_solid(row, column) for row in range(first_row, last_row + 1)
+                   for column in range(first_column, last_column + 1))
+
+    def _move_and_collide(self, dx: float, dy: float) -> bool:
+        """
+        Moves the enemy by (dx, dy) pixels, stopping it against solid tiles like Player.collisions_x/y.
+
+        Returns:
+            bool: True if the enemy ran into the side of a tile.
+        """
+        bumped = False
+        self.pos_x += dx
+        if dx and self._blocked():
+            # Back against the side of the tile it ran into
+            if dx > 0:
+                self.pos_x = (int((self.pos_x + self.tile_width - 1) // self.tile_width) - 1) * self.tile_width
+            else:
+                self.pos_x = (int(self.pos_x // self.tile_width) + 1) * self.tile_width
+            # The speed is kept, like a player holding the key, so a jump can still clear the top of the wall
+            bumped = True
+
+        self.pos_y += dy
+        if dy and self._blocked():
+            if dy > 0:
+                self.pos_y = int((self.pos_y + self.rect.height - 1) // self.tile_height) * self.tile_height \
+                             - self.rect.height
+            else:
+                self.pos_y = (int(self.pos_y // self.tile_height) + 1) * self.tile_height
+            self.vel_y = 0.0
+
+        # Standing needs a solid tile right below the body
+        self.pos_y += 1
+        self.on_ground = self.vel_y >= 0 and self._blocked()
+        self.pos_y -= 1
+        return bumped
+
+    def update(self, current_level: list[list[int]], player_pos: list[int], dt, flow_field=None,
+               planner=a_star, request_path=None, deadline=None, influence_map=None) -> None:
+        """
+        Replans when needed, then moves the enemy along its route with gravity and collisions.
+
+        Takes the same arguments as Enemy.update, the flow field, grid planners and
+        influence map aren't used.
+        """
+        if not self.route and not self.was_airborne:
+            self.run_a_star(current_level, player_pos)
+        if self.route:
+            self._steer()
+        elif self.on_ground:
+            self.vel_x = 0.0
+
+        bumped = False
+        falling = self.vel_y >= 0
+        if self.allow_move:
+            moving_left = self.vel_x < 0
+            bumped = self._move_and_collide(self.vel_x * dt, self.vel_y * dt)
+            if self.vel_x:
+                self.flip_animation = moving_left
+        # Gravity after moving, like Player.update
+        if not self.climbing and not self.on_ground and not self.on_wall:
+            self.vel_y = min(self.vel_y + self.gravity_speed * dt, self.terminal_velocity)
+        if self.route and self.route[0][1] == "fall" and not self.on_ground and not self.was_airborne:
+            self._step_off()
+        if self.on_ground and self.was_airborne:
+            self._land()
+        elif bumped and self.on_ground and self.route:
+            # Walked into a wall the route didn't expect, plan again from here
+            self._replan()
+        elif bumped and falling and self.route and self.route[0][1] in ("jump", "fall"):
+            self._reach_wall()
+        if not self.route:
+            # Holds on at the end of a route that stops on a ladder
+            self.climbing = not self.on_ground and self.platform_graph.on_ladder(*self.body_cell())
+        self.was_airborne = not (self.on_ground or self.climbing or self.on_wall)
+
+        self.rect.x, self.rect.y = int(self.pos_x), int(self.pos_y)
+        self.update_pos()
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+# Used when the enemy settings have no "ai_lod_tiers": bats close to the player keep full fidelity,
+# farther ones replan less often, keep their path while the player stays near its goal and stop flapping
+DEFAULT_LOD_TIERS = [
+    {"name": "near", "max_distance": 10, "replan_interval": 1, "goal_tolerance": 0, "animate": True},
+    {"name": "mid", "max_distance": 25, "replan_interval": 3, "goal_tolerance": 2, "animate": True},
+    {"name": "far", "max_distance": None, "replan_interval": 6, "goal_tolerance": 4, "animate": False},
+]
+
+
+@dataclass(frozen=True)
+class LODTier:
+    """
+    How much AI work an enemy in one distance band gets.
+
+    Attributes:
+        name: Shown in the debug overlay.
+        max_distance: Largest grid distance to the player in this tier, None for no limit.
+        replan_interval: Replans only on every this many PATH_FIND ticks.
+        goal_tolerance: Cells the player may move from the goal of the current path before a replan is needed.
+        animate: Whether the enemy's animation frames advance.
+    """
+    name: str
+    max_distance: Optional[int]
+    replan_interval: int
+    goal_tolerance: int
+    animate: bool
+
+    @classmethod
+    def from_settings(cls, tier_settings: dict) -> LODTier:
+        return cls(tier_settings.get("name", ""),
+                   tier_settings.get("max_distance"),
+                   max(1, int(tier_settings.get("replan_interval", 1))),
+                   max(0, int(tier_settings.get("goal_tolerance", 0))),
+                   bool(tier_settings.get("animate", True)))
+
+
+def grid_distance(a: Sequence[int], b: Sequence[int]) -> int:
+    """
+    Returns the number of 8-way moves between two (row, column) cells, ignoring walls.
+    """
+    return max(abs(int(a[0]) - int(b[0])), abs(int(a[1]) - int(b[1])))
+
+
+class AILevelOfDetail:
+    """
+    Sorts enemies into level-of-detail tiers by their grid distance to the player.
+
+    The tiers are checked in order and an enemy goes in the first one whose
+    max_distance it is within, so they are listed from nearest to farthest.
+    The game sorts the enemies again on every PATH_FIND tick, just before
+    asking which of them should replan.
+
+    Enemies in a tier with a replan interval above one are spread over the
+    ticks by their position in the list, so they don't all replan on the
+    same tick.
+
+    Attributes:
+        tiers (List[LODTier]): The tiers from nearest to farthest.
+        counts (List[int]): Number of enemies in each tier after the last sort.
+        tick (int): Number of sorts so far.
+    """
+
+    def __init__(self, tier_settings: List[dict]) -> None:
+        """
+        Args:
+            tier_settings: The "ai_lod_tiers" enemy settings, nearest tier first.
+        """
+        self.tiers: List[LODTier] = [LODTier.from_settings(settings) for settings in tier_settings]
+        if not self.tiers:
+            # Without tiers every enemy keeps full fidelity
+            self.tiers = [LODTier("", None, 1, 0, True)]
+        self.counts: List[int] = [0] * len(self.tiers)
+        self.tick = 0
+
+    def tier_index(self, distance: int) -> int:
+        """
+        Returns:
+            int: The tier of an enemy this many cells from the player. Past the last limit, the last tier.
+        """
+        for index, tier in enumerate(self.tiers):
+            if tier.max_distance is None or distance <= tier.max_distance:
+                return index
+        return len(self.tiers) - 1
+
+    def assign(self, enemies: list, player_pos: Sequence[int]) -> None:
+        """
+        Puts every enemy in its tier, setting its lod_tier and animate attributes, and counts them.
+
+        Args:
+            enemies: The level's enemies.
+            player_pos: The player's (row, column) position in the grid.
+        """
+        self.tick += 1
+        self.counts = [0] * len(self.tiers)
+        for enemy in enemies:
+            index = self.tier_index(grid_distance(enemy.enemy_array_pos, player_pos))
+            enemy.lod_tier = index
+            enemy.animate = self.tiers[index].animate
+            self.counts[index] += 1
+
+    def should_replan(self, enemy, order: int, player_pos: Sequence[int]) -> bool:
+        """
+        Checks whether an enemy may replan on this tick.
+
+        Args:
+            enemy: An enemy sorted by the last call to assign.
+            order: The enemy's position in the level's list, spreads the replans over the ticks.
+            player_pos: The player's (row, column) position in the grid.
+
+        Returns:
+            bool: False if the enemy should keep following its current path for now.
+        """
+        tier = self.tiers[enemy.lod_tier]
+        # An enemy with nowhere to go always plans
+        if not enemy.current_path:
+            return True
+        if (self.tick + order) % tier.replan_interval:
+            return False
+        # The current path still ends close enough to the player
+        last_goal = enemy.last_player_pos
+        return not last_goal or grid_distance(last_goal, player_pos) > tier.goal_tolerance
+
+    def summary(self) -> str:
+        """
+        Returns:
+            str: The tier counts for the debug overlay, e.g. "near 2 / mid 5 / far 11".
+        """
+        return " / ".join(f"{tier.name} {count}".strip() for tier, count in zip(self.tiers, self.counts))
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import argparse
+import heapq
+import random
+import time
+from typing import Callable, Dict, List, Tuple
+
+from scripts.game.algorithms.flow_field import FlowField
+from scripts.game.algorithms.grid_search import DIAGONAL_COST, ORTHOGONAL_COST, GridSearch, get_grid_search
+from scripts.game.algorithms.landmarks import get_landmark_heuristic
+
+# The shipped levels, in play order
+LEVEL_FILES = ["assets/levels/level1.tmx", "assets/levels/level2.tmx", "assets/levels/level3.tmx"]
+
+Query = Tuple[Tuple[int, int], Tuple[int, int]]
+
+
+def random_queries(maze: List[List[int]], count: int, seed: int = 0) -> List[Query]:
+    """
+    Picks (start, end) pairs of open cells, the same pairs for the same seed.
+
+    Args:
+        maze: The level grid represented as a 2D list of integers.
+        count: Number of pairs.
+        seed: Seed of the random generator.
+
+    Returns:
+        List[Query]: The (row, column) start and end of each query.
+    """
+    open_cells = [(row, column) for row in range(len(maze)) for column in range(len(maze[0]))
+                  if maze[row][column] != 1]
+    generator = random.Random(seed)
+    return [(generator.choice(open_cells), generator.choice(open_cells)) for _ in range(count)]
+
+
+def heuristic_variants(maze: List[List[int]]) -> Dict[str, Callable[[Tuple[int, int], Tuple[int, int]], int]]:
+    """
+    The A* heuristics to compare. Each variant plans one query and returns the number of expanded nodes.
+    """
+    search = get_grid_search(maze)
+    landmarks = get_landmark_heuristic(maze)
+
+    def diagonal(start: Tuple[int, int], end: Tuple[int, int]) -> int:
+        search.find_path(start, end)
+        return search.expanded
+
+    def alt(start: Tuple[int, int], end: Tuple[int, int]) -> int:
+        search.find_path(start, end, heuristic_table=landmarks.bound_to(end))
+        return search.expanded
+
+    return {"diagonal": diagonal, "alt": alt}
+
+
+def heapq_a_star(search: GridSearch, start: Tuple[int, int], end: Tuple[int, int]) -> int:
+    """
+    A* with a plain heapq of (f, cell) tuples and lazy deletion, the baseline for the open list queues.
+
+    Returns:
+        int: The number of expanded nodes.
+    """
+    width, neighbours = search.width, search.neighbours
+    start_cell = start[0] * width + start[1]
+    end_cell = end[0] * width + end[1]
+    end_x, end_y = end
+    diagonal_saving = DIAGONAL_COST - 2 * ORTHOGONAL_COST
+    g_score = {start_cell: 0.0}
+    closed = set()
+    open_list = [(0.0, start_cell)]
+    while open_list:
+        _, current = heapq.heappop(open_list)
+        if current in closed:
+            continue
+        closed.add(current)
+        if current == end_cell:
+            break
+        current_g = g_score[current]
+        for neighbour, cost in neighbours[current]:
+            potential_g = current_g + cost
+            if neighbour not in closed and potential_g < g_score.get(neighbour, float("inf")):
+                g_score[neighbour] = potential_g
+                dx = abs(neighbour // width - end_x)
+                dy = abs(neighbour % width - end_y)
+                estimate = ORTHOGONAL_COST * (dx + dy) + diagonal_saving * (dx if dx < dy else dy)
+                heapq.heappush(open_list, (potential_g + estimate, neighbour))
+    return len(closed)
+
+
+def queue_variants(maze: List[List[int]]) -> Dict[str, Callable[[Tuple[int, int], Tuple[int, int]], int]]:
+    """
+    The open list queues to compare, for A* queries and for flow fields built toward each query's end.
+    Each variant returns the number of expanded nodes, or of reached cells for the flow fields.
+    """
+    search = get_grid_search(maze)
+    flow_field = FlowField(maze)
+
+    def a_star_heapq(start: Tuple[int, int], end: Tuple[int, int]) -> int:
+        return heapq_a_star(search, start, end)
+
+    def a_star_heap(start: Tuple[int, int], end: Tuple[int, int]) -> int:
+        search.find_path(start, end)
+        return search.expanded
+
+    def a_star_buckets(start: Tuple[int, int], end: Tuple[int, int]) -> int:
+        search.find_path(start, end, use_buckets=True)
+        return search.expanded
+
+    def flow_heap(start: Tuple[int, int], end: Tuple[int, int]) -> int:
+        flow_field.update(end)
+        return sum(1 for distance in flow_field.distance if distance != float("inf"))
+
+    def flow_buckets(start: Tuple[int, int], end: Tuple[int, int]) -> int:
+        flow_field.update(end, use_buckets=True)
+        return sum(1 for distance in flow_field.distance if distance != float("inf"))
+
+    return {"a* heapq": a_star_heapq, "a* heap": a_star_heap, "a* buckets": a_star_buckets,
+            "flow heap": flow_heap, "flow buckets": flow_buckets}
+
+
+# What the command line can compare
+COMPARISONS = {"heuristics": heuristic_variants, "queues": queue_variants}
+
+
+def run_variants(variants: Dict[str, Callable[[Tuple[int, int], Tuple[int, int]], int]],
+                 queries: List[Query]) -> Dict[str, Dict[str, float]]:
+    """
+    Times every variant over the same queries.
+
+    Returns:
+        Dict[str, Dict[str, float]]: The total "expanded" nodes, the "mean_ms" and "p95_ms" time per query of each variant.
+    """
+    results = {}
+    for name, variant in variants.items():
+        expanded = 0
+        times = []
+        for start, end in queries:
+            started = time.perf_counter()
+            expanded += variant(start, end)
+            times.append((time.perf_counter() - started) * 1000)
+        times.sort()
+        results[name] = {
+            "expanded": expanded,
+            "mean_ms": sum(times) / len(times),
+            "p95_ms": times[int(len(times) * 0.95)],
+        }
+    return results
+
+
+def print_results(level: str, results: Dict[str, Dict[str, float]]) -> None:
+    print(level)
+    print(f"  {'variant':<14}{'expanded':>10}{'mean ms':>10}{'p95 ms':>10}")
+    for name, result in results.items():
+        print(f"  {name:<14}{result['expanded']:>10}{result['mean_ms']:>10.3f}{result['p95_ms']:>10.3f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare the A* heuristics or open list queues on the level grids.")
+    parser.add_argument("tmx_files", nargs="*", default=LEVEL_FILES, help="TMX files to benchmark")
+    parser.add_argument("--compare", choices=sorted(COMPARISONS), default="heuristics", help="what to compare")
+    parser.add_argument("--queries", type=int, default=300, help="random queries per level")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the random queries")
+    args = parser.parse_args()
+
+    # Imported here so the timing helpers don't depend on the TMX loader
+    from scripts.entities.TileMap import load_tmx_to_array
+
+    for tmx_path in args.tmx_files:
+        maze = load_tmx_to_array(tmx_path)
+        queries = random_queries(maze, args.queries, args.seed)
+        print_results(tmx_path, run_variants(COMPARISONS[args.compare](maze), queries))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from typing import Dict, List
+
+# Keys are stored in hundredths, so a diagonal move (1.414) still costs more than 1.41
+KEY_SCALE = 100
+
+
+class BucketQueue:
+    """
+    A Dial-style bucket priority queue of integer cell ids, a drop-in for IndexedHeap
+    in searches whose keys never go down (Dijkstra, and A* with a consistent heuristic).
+
+    Keys are rounded to integers (in 1 / KEY_SCALE steps) and each integer key
+    has a plain list as its bucket, so a push is an append and a pop takes from
+    the lowest non-empty bucket, with no sifting. Lowering the key of a queued
+    cell adds it to the new bucket and leaves a stale entry behind that is
+    skipped when popped.
+
+    Rounding means cells within 1 / KEY_SCALE of each other can come out in
+    either order, so a search using the queue can return a path that is up to
+    that much more expensive per step than the exact one.
+    """
+
+    def __init__(self, capacity: int, scale: int = KEY_SCALE) -> None:
+        """
+        Args:
+            capacity: The number of distinct cell ids that can be queued (the grid size).
+            scale: Number of buckets per unit of cost.
+        """
+        self.scale = scale
+        self.buckets: Dict[int, List[int]] = {}
+        self.bucket_of: List[int] = [-1] * capacity  # Bucket of each queued cell id, -1 if not queued
+        self.current = -1  # The lowest bucket that can hold a cell, -1 until the first push
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, cell: int) -> bool:
+        return self.bucket_of[cell] != -1
+
+    def clear(self) -> None:
+        for bucket in self.buckets.values():
+            for cell in bucket:
+                self.bucket_of[cell] = -1
+        self.buckets.clear()
+        self.current = -1
+        self.size = 0
+
+    def push(self, cell: int, key: float) -> None:
+        """
+        Adds a cell to the queue, or lowers its key if it is already queued with a larger key.
+
+        Args:
+            cell: The cell id.
+            key: The priority of the cell, never lower than the key of the last popped cell.
+        """
+        bucket = int(key * self.scale + 0.5)
+        if self.current == -1:
+            # Start scanning from the first key instead of from zero
+            self.current = bucket
+        elif bucket < self.current:
+            # Float error can put a key just below the current bucket
+            bucket = self.current
+        queued = self.bucket_of[cell]
+        if queued == -1:
+            self.size += 1
+        elif bucket >= queued:
+            return
+        self.bucket_of[cell] = bucket
+        if bucket in self.buckets:
+            self.buckets[bucket].append(cell)
+        else:
+            self.buckets[bucket] = [cell]
+
+    def pop(self) -> int:
+        """
+        Removes and returns a cell with the smallest key.
+
+        Returns:
+            int: The cell id.
+        """
+        buckets, bucket_of = self.buckets, self.bucket_of
+        current = self.current
+        while True:
+            bucket = buckets.get(current)
+            while bucket:
+                cell = bucket.pop()
+                # Entries left behind by a lowered key point at another bucket
+                if bucket_of[cell] == current:
+                    bucket_of[cell] = -1
+                    self.size -= 1
+                    self.current = current
+                    return cell
+            buckets.pop(current, None)
+            current += 1
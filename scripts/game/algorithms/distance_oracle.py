@@ -0,0 +1,298 @@
+from __future__ import annotations
+
+import argparse
+import glob
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from scripts.game.algorithms.flow_field import FlowField
+from scripts.game.algorithms.grid_search import get_grid_search
+
+# File layout: header, open cell ids (uint32), next-hop table, distance table (uint16), all little endian
+MAGIC = b"ASNV"
+FORMAT_VERSION = 2
+# Magic, format version, SHA-256 of the TMX file, rows, columns, number of open cells
+HEADER = struct.Struct("<4sH32sHHI")
+TABLE_SUFFIX = ".nav"
+# Distances are stored in tenths of a tile
+DISTANCE_SCALE = 10
+# Next hop and distance of a pair with no path
+UNREACHABLE = 0xFFFF
+
+LEVELS_DIR = os.path.join("assets", "levels")
+
+
+def table_path(tmx_path: str) -> str:
+    """
+    Returns the path of the table built for a TMX file, saved next to it (level1.tmx -> level1.nav).
+    """
+    return os.path.splitext(tmx_path)[0] + TABLE_SUFFIX
+
+
+# SHA-256 of each TMX file, with the modification time and size it was computed for
+_tmx_digests: Dict[str, Tuple[Tuple[int, int], bytes]] = {}
+
+
+def tmx_digest(tmx_path: str) -> bytes:
+    """
+    Returns the SHA-256 of a TMX file, only hashing it again once the file's modification time or size changed.
+    """
+    stat = os.stat(tmx_path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = _tmx_digests.get(tmx_path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    with open(tmx_path, "rb") as file:
+        digest = hashlib.sha256(file.read()).digest()
+    _tmx_digests[tmx_path] = (signature, digest)
+    return digest
+
+
+def build_table(tmx_path: str, maze: List[List[int]]) -> str:
+    """
+    Computes the next hop and distance between every pair of open cells and writes them next to the TMX file.
+
+    One reverse Dijkstra per open cell fills that cell's row of both tables, so
+    the build takes a few seconds per level and is meant to be run offline.
+
+    Args:
+        tmx_path: Path to the level's TMX file, its hash is stored to detect changes.
+        maze: The level grid loaded from the TMX file.
+
+    Returns:
+        str: The path of the written table.
+    """
+    search = get_grid_search(maze)
+    open_cells = [cell for cell in range(search.size) if search.walkable[cell]]
+    count = len(open_cells)
+    if count >= UNREACHABLE:
+        raise ValueError(f"{tmx_path} has too many open cells for a uint16 table")
+    index_of = {cell: index for index, cell in enumerate(open_cells)}
+
+    flow_field = FlowField(maze)
+    next_hops = array("H")
+    distances = array("H")
+    for goal in open_cells:
+        # Row of the goal: for every open cell, the step toward the goal and the cost to reach it
+        flow_field.update(divmod(goal, search.width))
+        for cell in open_cells:
+            next_cell = flow_field.next_cell[cell]
+            distance = flow_field.distance[cell]
+            next_hops.append(index_of[next_cell] if next_cell != -1 else UNREACHABLE)
+            distances.append(min(round(distance * DISTANCE_SCALE), UNREACHABLE - 1)
+                             if distance != float("inf") else UNREACHABLE)
+
+    # Cell ids go up to rows * columns, which can pass the uint16 range even when the open cells don't
+    cells = array("I", open_cells)
+    if sys.byteorder != "little":
+        for table in (cells, next_hops, distances):
+            table.byteswap()
+
+    path = table_path(tmx_path)
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, FORMAT_VERSION, tmx_digest(tmx_path), search.height, search.width, count))
+        cells.tofile(file)
+        next_hops.tofile(file)
+        distances.tofile(file)
+    # Replace the old table in one step, so a half written file is never read
+    os.replace(temporary_path, path)
+    return path
+
+
+class DistanceOracle:
+    """
+    A precomputed all-pairs next-hop and distance table of a level, read through mmap.
+
+    Finding a path is a walk along the next-hop table, one lookup per cell of
+    the path, with no search at all. The table is only valid for the exact
+    TMX file it was built from; load_distance_oracle checks the stored hash.
+
+    Attributes:
+        count (int): Number of open cells, the tables are count x count.
+        width (int): Number of columns of the level grid.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Args:
+            path: Path of a table written by build_table.
+
+        Raises:
+            ValueError: If the file isn't a table of this format.
+        """
+        with open(path, "rb") as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.digest, self.height, self.width, self.count = HEADER.unpack_from(self.map, 0)
+        table_bytes = self.count * self.count * 2
+        if magic != MAGIC or version != FORMAT_VERSION or \
+                len(self.map) != HEADER.size + self.count * 4 + 2 * table_bytes:
+            self.map.close()
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} distance table")
+
+        view = memoryview(self.map)
+        offset = HEADER.size
+        self.open_cells = view[offset:offset + self.count * 4].cast("I")
+        offset += self.count * 4
+        self.next_hops = view[offset:offset + table_bytes].cast("H")
+        offset += table_bytes
+        self.distances = view[offset:offset + table_bytes].cast("H")
+        self.index_of: Dict[int, int] = {cell: index for index, cell in enumerate(self.open_cells)}
+
+    def close(self) -> None:
+        # The views have to be released before the map can be closed
+        for view in (self.open_cells, self.next_hops, self.distances):
+            view.release()
+        self.map.close()
+
+    def matches(self, maze: List[List[int]]) -> bool:
+        """
+        Returns whether the table's open cells are exactly the open cells of a grid.
+        """
+        search = get_grid_search(maze)
+        if (search.height, search.width) != (self.height, self.width):
+            return False
+        return list(self.open_cells) == [cell for cell in range(search.size) if search.walkable[cell]]
+
+    def distance(self, start: Tuple[int, int], end: Tuple[int, int]) -> Optional[float]:
+        """
+        Returns:
+            Optional[float]: The path cost from start to end to a tenth of a tile, None if there is no path.
+        """
+        start_index = self.index_of.get(start[0] * self.width + start[1])
+        end_index = self.index_of.get(end[0] * self.width + end[1])
+        if start_index is None or end_index is None:
+            return None
+        value = self.distances[end_index * self.count + start_index]
+        return value / DISTANCE_SCALE if value != UNREACHABLE else None
+
+    def find_path(self, start: Tuple[int, int], end: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """
+        Follows the next-hop table from start to end.
+
+        Args:
+            start: The starting (row, column) position.
+            end: The ending (row, column) position.
+
+        Returns:
+            List[Tuple[int, int]]: The path from start to end, the same format as a_star,
+            or an empty list if there is no path or either cell isn't open.
+        """
+        start = (int(start[0]), int(start[1]))
+        end = (int(end[0]), int(end[1]))
+        if not (0 <= start[0] < self.height and 0 <= start[1] < self.width and
+                0 <= end[0] < self.height and 0 <= end[1] < self.width):
+            return []
+        start_index = self.index_of.get(start[0] * self.width + start[1])
+        end_index = self.index_of.get(end[0] * self.width + end[1])
+        if start_index is None or end_index is None:
+            return []
+        if start_index == end_index:
+            return [start]
+
+        row = self.next_hops[end_index * self.count:(end_index + 1) * self.count]
+        open_cells = self.open_cells
+        path = [start]
+        index = start_index
+        # A path can't visit more cells than there are, anything longer means the table is broken
+        for _ in range(self.count):
+            index = row[index]
+            if index == UNREACHABLE:
+                return []
+            path.append(divmod(open_cells[index], self.width))
+            if index == end_index:
+                return path
+        return []
+
+
+# One table per level grid, registered by load_distance_oracle
+_distance_oracles: Dict[int, DistanceOracle] = {}
+
+
+def load_distance_oracle(maze: List[List[int]], tmx_path: str) -> Optional[DistanceOracle]:
+    """
+    Opens the table built for a level and registers it for the grid.
+
+    Args:
+        maze: The level grid loaded from the TMX file.
+        tmx_path: Path to the level's TMX file.
+
+    Returns:
+        Optional[DistanceOracle]: The table, or None if it is missing, out of date
+        with the TMX file, or doesn't match the grid. Run this module to rebuild it.
+        The TMX file is only hashed again once it changed on disk, so reloading
+        the table after a door opens is cheap.
+    """
+    path = table_path(tmx_path)
+    if sys.byteorder != "little" or not os.path.exists(path):
+        return None
+    try:
+        oracle = DistanceOracle(path)
+    except (OSError, ValueError, struct.error):
+        return None
+    if oracle.digest != tmx_digest(tmx_path) or not oracle.matches(maze):
+        oracle.close()
+        return None
+    unload_distance_oracle(maze)
+    _distance_oracles[id(maze)] = oracle
+    return oracle
+
+
+def unload_distance_oracle(maze: List[List[int]]) -> None:
+    """
+    Closes the table of a grid, e.g. once its cells change and the table no longer holds.
+    """
+    oracle = _distance_oracles.pop(id(maze), None)
+    if oracle is not None:
+        oracle.close()
+
+
+def get_distance_oracle(maze: List[List[int]]) -> Optional[DistanceOracle]:
+    """
+    Returns:
+        Optional[DistanceOracle]: The table registered for a grid, None if no valid table was loaded.
+    """
+    return _distance_oracles.get(id(maze))
+
+
+def is_up_to_date(tmx_path: str) -> bool:
+    path = table_path(tmx_path)
+    if not os.path.exists(path):
+        return False
+    with open(path, "rb") as file:
+        header = file.read(HEADER.size)
+    if len(header) != HEADER.size:
+        return False
+    magic, version, digest, _, _, _ = HEADER.unpack(header)
+    return magic == MAGIC and version == FORMAT_VERSION and digest == tmx_digest(tmx_path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the all-pairs distance tables of the levels.")
+    parser.add_argument("tmx_files", nargs="*", help=f"TMX files to build, defaults to every map in {LEVELS_DIR}")
+    parser.add_argument("--force", action="store_true", help="rebuild tables that are already up to date")
+    args = parser.parse_args()
+
+    # Imported here so loading a table in the game doesn't depend on the TMX loader
+    from scripts.entities.TileMap import load_tmx_to_array
+
+    tmx_files = args.tmx_files or sorted(glob.glob(os.path.join(LEVELS_DIR, "*.tmx")))
+    for tmx_path in tmx_files:
+        if not args.force and is_up_to_date(tmx_path):
+            print(f"{tmx_path}: up to date")
+            continue
+        try:
+            maze = load_tmx_to_array(tmx_path)
+        except (TypeError, IndexError, ValueError) as error:
+            print(f"{tmx_path}: skipped, {error}")
+            continue
+        print(f"{tmx_path}: built {build_table(tmx_path, maze)}")
+
+
+if __name__ == "__main__":
+    main()
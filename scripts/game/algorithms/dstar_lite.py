@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+from typing import Iterable, List, Optional, Tuple
+
+from scripts.game.algorithms.grid_search import DIAGONAL_COST, ORTHOGONAL_COST, GridSearch, IndexedHeap
+
+INFINITY = float("inf")
+DIAGONAL_SAVING = DIAGONAL_COST - 2 * ORTHOGONAL_COST
+# Keys are rounded so float error in g + h + km can't reorder cells that tie
+KEY_PRECISION = 6
+
+
+class DStarLite:
+    """
+    An incremental planner for one enemy chasing a moving player (Moving Target D* Lite).
+
+    The search runs forward from the enemy's cell and keeps its g/rhs values,
+    parents and open list between calls. When the player moves, the
+    heuristic offset km is raised instead of throwing the search away; when
+    the enemy moves, only the start cells' rhs values change; when cells are
+    opened or blocked, only the cells around them are updated. The next call
+    then repairs just the parts of the search tree that became inconsistent.
+
+    Move costs are the plain grid costs. Enemy danger from the InfluenceMap
+    changes every tick, which would make every call a full replan, so it is
+    not used.
+
+    Attributes:
+        search (GridSearch): The level's engine, its walkable and neighbour tables are shared.
+        start (Optional[int]): The cell id the search is rooted at (the enemy).
+        goal (Optional[int]): The cell id being searched for (the player).
+        expanded (int): Number of nodes expanded by the last call to find_path.
+    """
+
+    def __init__(self, search: GridSearch) -> None:
+        """
+        Args:
+            search: The GridSearch engine of the level grid.
+        """
+        self.search = search
+        self.width = search.width
+        self.start: Optional[int] = None
+        self.goal: Optional[int] = None
+        self.km = 0.0
+        self.g_score: List[float] = []
+        self.rhs: List[float] = []
+        self.parent: List[int] = []
+        self.open_heap = IndexedHeap(search.size)
+        self.expanded = 0
+
+    def reset(self) -> None:
+        """
+        Forgets the search state, the next call to find_path starts from scratch.
+        """
+        self.start = None
+        self.goal = None
+
+    def _initialise(self, start: int, goal: int) -> None:
+        size = self.search.size
+        self.start = start
+        self.goal = goal
+        self.km = 0.0
+        self.g_score = [INFINITY] * size
+        self.rhs = [INFINITY] * size
+        self.parent = [-1] * size
+        self.open_heap.clear()
+        self.rhs[start] = 0.0
+        self.open_heap.push(start, self._calculate_key(start))
+
+    def _calculate_key(self, cell: int) -> Tuple[float, float]:
+        best = self.g_score[cell]
+        rhs = self.rhs[cell]
+        if rhs < best:
+            best = rhs
+        # Diagonal distance to the goal, inlined since this runs for every queued cell
+        width = self.width
+        dx = abs(cell // width - self.goal // width)
+        dy = abs(cell % width - self.goal % width)
+        estimate = ORTHOGONAL_COST * (dx + dy) + DIAGONAL_SAVING * (dx if dx < dy else dy)
+        return round(best + estimate + self.km, KEY_PRECISION), round(best, KEY_PRECISION)
+
+    def _predecessors(self, cell: int) -> List[Tuple[int, float]]:
+        # Moves are symmetric between open cells, and nothing can move into a wall
+        return self.search.neighbours[cell] if self.search.walkable[cell] else []
+
+    def _update_rhs(self, cell: int) -> None:
+        """
+        Recomputes the rhs value and parent of a cell from its predecessors.
+        """
+        if cell == self.start:
+            return
+        best, best_parent = INFINITY, -1
+        g_score = self.g_score
+        for predecessor, cost in self._predecessors(cell):
+            value = g_score[predecessor] + cost
+            if value < best:
+                best, best_parent = value, predecessor
+        self.rhs[cell] = best
+        self.parent[cell] = best_parent
+
+    def _update_state(self, cell: int) -> None:
+        """
+        Puts a cell in the open list if it is inconsistent and takes it out if it isn't.
+        """
+        open_heap = self.open_heap
+        if self.g_score[cell] != self.rhs[cell]:
+            open_heap.update(cell, self._calculate_key(cell))
+        elif cell in open_heap:
+            open_heap.remove(cell)
+
+    def _compute_path(self) -> None:
+        g_score, rhs, parent = self.g_score, self.rhs, self.parent
+        open_heap = self.open_heap
+        neighbours = self.search.neighbours
+        goal = self.goal
+        calculate_key = self._calculate_key
+        while open_heap and (rhs[goal] != g_score[goal] or open_heap.peek_key() < calculate_key(goal)):
+            old_key = open_heap.peek_key()
+            cell = open_heap.pop()
+            new_key = calculate_key(cell)
+            if old_key < new_key:
+                # The key is out of date since the goal moved, queue it again with the right one
+                open_heap.push(cell, new_key)
+                continue
+            self.expanded += 1
+            if g_score[cell] > rhs[cell]:
+                # Overconsistent: settle the cell and offer it as a parent to its successors
+                g_score[cell] = rhs[cell]
+                cell_g = g_score[cell]
+                for successor, cost in neighbours[cell]:
+                    if successor != self.start and rhs[successor] > cell_g + cost:
+                        rhs[successor] = cell_g + cost
+                        parent[successor] = cell
+                        self._update_state(successor)
+            else:
+                # Underconsistent: invalidate the cell and every successor that relied on it
+                g_score[cell] = INFINITY
+                for successor, _ in neighbours[cell]:
+                    if parent[successor] == cell:
+                        self._update_rhs(successor)
+                        self._update_state(successor)
+                self._update_rhs(cell)
+                self._update_state(cell)
+
+    def _move_start(self, start: int) -> None:
+        """
+        Re-roots the search at the enemy's new cell.
+        """
+        old_start = self.start
+        self.start = start
+        self.rhs[start] = 0.0
+        self.parent[start] = -1
+        self._update_state(start)
+        self._update_rhs(old_start)
+        self._update_state(old_start)
+
+    def update_cells(self, positions: Iterable[Tuple[int, int]]) -> None:
+        """
+        Tells the planner that cells were opened or blocked. The level's GridSearch
+        must already reflect the change.
+
+        Args:
+            positions: The (row, column) cells that changed.
+        """
+        if self.start is None:
+            return
+        search = self.search
+        affected = set()
+        for position in positions:
+            if not search.in_bounds(position):
+                continue
+            x, y = position
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    if search.in_bounds((x + dx, y + dy)):
+                        affected.add((x + dx) * self.width + y + dy)
+        for cell in affected:
+            if not search.walkable[cell]:
+                self.g_score[cell] = INFINITY
+            self._update_rhs(cell)
+            self._update_state(cell)
+
+    def _extract_path(self) -> List[Tuple[int, int]]:
+        path = []
+        cell = self.goal
+        # A path can't be longer than the grid, anything longer means the parents are broken
+        for _ in range(self.search.size):
+            path.append(divmod(cell, self.width))
+            if cell == self.start:
+                return path[::-1]
+            cell = self.parent[cell]
+            if cell == -1:
+                break
+        return []
+
+    def find_path(self, start: Tuple[int, int], end: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """
+        Plans from start to end, repairing the previous search where possible.
+
+        Args:
+            start: The starting (row, column) position, the enemy's cell.
+            end: The ending (row, column) position, the player's cell.
+
+        Returns:
+            List[Tuple[int, int]]: The path from start to end, the same format as a_star,
+            or an empty list if there is no path.
+        """
+        self.expanded = 0
+        search = self.search
+        if not (search.in_bounds(start) and search.in_bounds(end)):
+            return []
+        start_cell = search.cell_id(start)
+        end_cell = search.cell_id(end)
+        if start_cell == end_cell:
+            return [(start[0], start[1])]
+        if not search.walkable[end_cell]:
+            return []
+
+        if self.start is None:
+            self._initialise(start_cell, end_cell)
+        else:
+            if end_cell != self.goal:
+                # The heuristic to the new goal is at most this much smaller, so old keys stay lower bounds
+                self.km += search.octile_distance(self.goal, end_cell)
+                self.goal = end_cell
+            if start_cell != self.start:
+                self._move_start(start_cell)
+
+        self._compute_path()
+        if self.rhs[end_cell] == INFINITY:
+            return []
+        return self._extract_path()
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from typing import List, Optional, Tuple
+
+from scripts.game.algorithms.bucket_queue import BucketQueue
+from scripts.game.algorithms.grid_search import IndexedHeap, get_grid_search
+
+
+class FlowField:
+    """
+    A direction grid toward a single goal, shared by every enemy on a level.
+
+    One reverse Dijkstra search from the goal gives every reachable cell its
+    cost to the goal and the neighbour to step to next. Enemies then only
+    sample the grid, so the cost of a PATH_FIND tick doesn't grow with the
+    number of enemies.
+
+    Attributes:
+        goal (Optional[Tuple[int, int]]): The (row, column) cell the field leads to.
+        distance (List[float]): Cost from each flat cell id to the goal, inf where unreachable.
+        next_cell (List[int]): The cell id to step to from each cell, -1 at the goal or where unreachable.
+    """
+
+    def __init__(self, maze: List[List[int]]) -> None:
+        """
+        Args:
+            maze: The level grid represented as a 2D list of integers.
+        """
+        # Reuse the level's neighbour table, moves are symmetric so it also works in reverse
+        self.search = get_grid_search(maze)
+        self.width = self.search.width
+        self.goal: Optional[Tuple[int, int]] = None
+        self.distance: List[float] = [float("inf")] * self.search.size
+        self.next_cell: List[int] = [-1] * self.search.size
+        self.open_heap = IndexedHeap(self.search.size)
+        self.bucket_queue = BucketQueue(self.search.size)
+
+    def update(self, goal: Tuple[int, int], cost_field: Optional[List[float]] = None,
+               use_buckets: bool = False) -> None:
+        """
+        Rebuilds the field toward a goal.
+
+        Args:
+            goal: The (row, column) cell to lead to, usually the player's grid position.
+            cost_field: Optional extra cost of entering each cell id, e.g. an InfluenceMap's cost grid.
+            use_buckets: Queue the open cells in the BucketQueue instead of the binary heap. The
+                distances stay exact, a cell popped too early is queued again once it improves.
+        """
+        goal = (int(goal[0]), int(goal[1]))
+        self.goal = goal
+        size = self.search.size
+        distance = self.distance
+        next_cell = self.next_cell
+        distance[:] = [float("inf")] * size
+        next_cell[:] = [-1] * size
+        if not self.search.in_bounds(goal) or not self.search.walkable[self.search.cell_id(goal)]:
+            return
+
+        neighbours = self.search.neighbours
+        open_heap = self.bucket_queue if use_buckets else self.open_heap
+        open_heap.clear()
+
+        goal_cell = self.search.cell_id(goal)
+        distance[goal_cell] = 0.0
+        open_heap.push(goal_cell, 0.0)
+        while open_heap:
+            current = open_heap.pop()
+            # Moving from a neighbour into this cell costs the move plus this cell's extra cost
+            entry_cost = cost_field[current] if cost_field is not None else 0.0
+            current_distance = distance[current]
+            for neighbour, cost in neighbours[current]:
+                new_distance = current_distance + cost + entry_cost
+                if new_distance < distance[neighbour]:
+                    distance[neighbour] = new_distance
+                    next_cell[neighbour] = current
+                    open_heap.push(neighbour, new_distance)
+
+    def next_step(self, position: Tuple[int, int]) -> Optional[Tuple[int, int]]:
+        """
+        Args:
+            position: A (row, column) cell.
+
+        Returns:
+            Optional[Tuple[int, int]]: The cell to move to next, or None at the goal or if the goal can't be reached.
+        """
+        if not self.search.in_bounds(position):
+            return None
+        cell = self.next_cell[self.search.cell_id((int(position[0]), int(position[1])))]
+        return divmod(cell, self.width) if cell != -1 else None
+
+    def path_from(self, position: Tuple[int, int], max_length: int = 0) -> List[Tuple[int, int]]:
+        """
+        Follows the field from a cell, in the same format as a_star without the start cell.
+
+        Args:
+            position: The (row, column) cell to start from.
+            max_length: The most cells to return, 0 for the whole path.
+
+        Returns:
+            List[Tuple[int, int]]: The cells leading to the goal.
+        """
+        path = []
+        step = self.next_step(position)
+        while step is not None and (max_length == 0 or len(path) < max_length):
+            path.append(step)
+            step = self.next_step(step)
+        return path
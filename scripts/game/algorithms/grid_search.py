@@ -0,0 +1,596 @@
+from __future__ import annotations
+
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from scripts.game.algorithms.bucket_queue import BucketQueue
+
+# Movement costs used by the search and the heuristic
+ORTHOGONAL_COST = 1.0
+DIAGONAL_COST = 1.414
+
+# Directions: right, left, down, up and the four diagonals (same order as get_neighbours)
+DIRECTIONS = [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (-1, -1), (-1, 1), (1, -1)]
+
+# A search with a deadline reads the clock once per this many expanded nodes
+DEADLINE_CHECK_NODES = 32
+
+
+class IndexedHeap:
+    """
+    A binary min-heap of integer cell ids that supports decrease-key.
+
+    Each cell id can be in the heap at most once. The heap keeps a position
+    table indexed by cell id, so checking membership and lowering the key of
+    a queued cell are O(1) and O(log n) instead of a linear scan.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        """
+        Args:
+            capacity: The number of distinct cell ids that can be queued (the grid size).
+        """
+        self.ids: List[int] = []  # Cell ids in heap order
+        self.keys: List[float] = []  # Priority of each heap slot
+        self.position: List[int] = [-1] * capacity  # Heap slot of each cell id, -1 if not queued
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, cell: int) -> bool:
+        return self.position[cell] != -1
+
+    def clear(self) -> None:
+        """
+        Empties the heap. Only the cells still queued are reset, so this is
+        cheap when most of the heap was popped.
+        """
+        for cell in self.ids:
+            self.position[cell] = -1
+        self.ids.clear()
+        self.keys.clear()
+
+    def push(self, cell: int, key: float) -> None:
+        """
+        Adds a cell to the heap, or lowers its key if it is already queued with a larger key.
+
+        Args:
+            cell: The cell id.
+            key: The priority of the cell.
+        """
+        index = self.position[cell]
+        if index == -1:
+            # New entry at the bottom of the heap
+            index = len(self.ids)
+            self.ids.append(cell)
+            self.keys.append(key)
+            self.position[cell] = index
+        elif key < self.keys[index]:
+            # Decrease-key in place
+            self.keys[index] = key
+        else:
+            return
+        self._sift_up(index)
+
+    def pop(self) -> int:
+        """
+        Removes and returns the cell with the smallest key.
+
+        Returns:
+            int: The cell id.
+        """
+        ids, keys, position = self.ids, self.keys, self.position
+        top = ids[0]
+        position[top] = -1
+        last_id = ids.pop()
+        last_key = keys.pop()
+        if ids:
+            # Move the last entry to the root and restore the heap order
+            ids[0] = last_id
+            keys[0] = last_key
+            position[last_id] = 0
+            self._sift_down(0)
+        return top
+
+    def update(self, cell: int, key: float) -> None:
+        """
+        Sets the key of a cell, queueing it if needed. Unlike push the key can also go up.
+
+        Args:
+            cell: The cell id.
+            key: The new priority of the cell.
+        """
+        index = self.position[cell]
+        if index == -1:
+            self.push(cell, key)
+            return
+        old_key = self.keys[index]
+        self.keys[index] = key
+        if key < old_key:
+            self._sift_up(index)
+        else:
+            self._sift_down(index)
+
+    def remove(self, cell: int) -> None:
+        """
+        Takes a cell out of the heap if it is queued.
+
+        Args:
+            cell: The cell id.
+        """
+        index = self.position[cell]
+        if index == -1:
+            return
+        ids, keys, position = self.ids, self.keys, self.position
+        position[cell] = -1
+        last_id = ids.pop()
+        last_key = keys.pop()
+        if index < len(ids):
+            # Fill the gap with the last entry and move it to where it belongs
+            ids[index] = last_id
+            keys[index] = last_key
+            position[last_id] = index
+            self._sift_up(index)
+            self._sift_down(position[last_id])
+
+    def peek_key(self) -> float:
+        """
+        Returns:
+            float: The smallest key in the heap.
+        """
+        return self.keys[0]
+
+    def _sift_up(self, index: int) -> None:
+        ids, keys, position = self.ids, self.keys, self.position
+        cell, key = ids[index], keys[index]
+        while index > 0:
+            parent = (index - 1) >> 1
+            if keys[parent] <= key:
+                break
+            # Move the parent down a level
+            ids[index] = ids[parent]
+            keys[index] = keys[parent]
+            position[ids[index]] = index
+            index = parent
+        ids[index] = cell
+        keys[index] = key
+        position[cell] = index
+
+    def _sift_down(self, index: int) -> None:
+        ids, keys, position = self.ids, self.keys, self.position
+        size = len(ids)
+        cell, key = ids[index], keys[index]
+        while True:
+            child = 2 * index + 1
+            if child >= size:
+                break
+            # Pick the smaller of the two children
+            if child + 1 < size and keys[child + 1] < keys[child]:
+                child += 1
+            if key <= keys[child]:
+                break
+            # Move the child up a level
+            ids[index] = ids[child]
+            keys[index] = keys[child]
+            position[ids[index]] = index
+            index = child
+        ids[index] = cell
+        keys[index] = key
+        position[cell] = index
+
+
+class SearchState:
+    """
+    The per-query arrays of an A* search on a GridSearch, with the query in progress.
+
+    Entries are only valid where their stamp equals the current generation, so
+    the arrays are reused by every query instead of being cleared. GridSearch
+    keeps one state for its own queries. A search that runs a few nodes at a
+    time, like a SlicedSearch, keeps another, so it can stop and pick up where
+    it left off while other queries run on the same level.
+
+    Attributes:
+        generation (int): Stamp of the current query.
+        g_score (List[float]): Cost from the start to each cell id.
+        parent (List[int]): The cell id each cell was reached from, -1 for the start.
+        seen (List[int]): Generation in which each cell id was given a g-score.
+        closed (List[int]): Generation in which each cell id was expanded.
+        open_heap (IndexedHeap): The open list.
+        done (bool): Whether the current query has finished, found or not.
+        path (List[Tuple[int, int]]): The query's path once done, empty if there is none.
+        expanded (int): Number of nodes expanded by the current query.
+        open_peak (int): Largest size of the open list during the current query.
+    """
+
+    def __init__(self, size: int) -> None:
+        """
+        Args:
+            size: The number of cells in the grid.
+        """
+        self.generation = 0
+        self.g_score: List[float] = [0.0] * size
+        self.parent: List[int] = [-1] * size
+        self.seen: List[int] = [0] * size
+        self.closed: List[int] = [0] * size
+        self.open_heap = IndexedHeap(size)
+        # Only made for queries that ask for it
+        self.bucket_queue: Optional[BucketQueue] = None
+
+        # The query in progress, set by GridSearch.begin
+        self.queue = self.open_heap
+        self.estimate: Optional[Callable[[int], float]] = None
+        self.cost_field: Optional[Sequence[float]] = None
+        self.weight = 1.0
+        self.end_cell = -1
+        # Expanded cell closest to the goal, returned if a deadline passes
+        self.best_cell = -1
+        self.best_estimate = float("inf")
+        self.done = True
+        self.path: List[Tuple[int, int]] = []
+        self.expanded = 0
+        self.open_peak = 0
+
+
+class GridSearch:
+    """
+    An A* engine for one level grid that works on flat integer cell ids (row * width + column).
+
+    The neighbour table is built once per grid and the g-scores and parents of
+    its queries live in a SearchState that is reused by every query. A query
+    can also run in a state of its own, started with begin and continued with
+    resume, which is how the time-sliced searches share the engine.
+
+    Attributes:
+        maze (List[List[int]]): The level grid (1 for walls, anything else is open).
+        width (int): Number of columns in the grid.
+        height (int): Number of rows in the grid.
+        walkable (List[bool]): Whether each cell id is open.
+        neighbours (List[List[Tuple[int, float]]]): The (neighbour id, move cost) pairs of each cell.
+        state (SearchState): The arrays of the queries made with find_path.
+        expanded (int): Number of nodes expanded by the last find_path query.
+        open_peak (int): Largest size of the open list during the last find_path query.
+    """
+
+    def __init__(self, maze: List[List[int]]) -> None:
+        """
+        Args:
+            maze: The level grid represented as a 2D list of integers.
+        """
+        self.maze = maze
+        self.height = len(maze)
+        self.width = len(maze[0]) if self.height > 0 else 0
+        self.size = self.width * self.height
+
+        # Flat copy of the grid, True where the cell is not a wall
+        self.walkable: List[bool] = [maze[row][column] != 1
+                                     for row in range(self.height) for column in range(self.width)]
+        # Neighbour ids and move costs of every cell, built once
+        self.neighbours: List[List[Tuple[int, float]]] = [self._build_neighbours(cell) for cell in range(self.size)]
+
+        # Per-query arrays of find_path
+        self.state = SearchState(self.size)
+
+        self.expanded = 0
+        self.open_peak = 0
+
+    def cell_id(self, position: Tuple[int, int]) -> int:
+        """
+        Args:
+            position: The (row, column) position of the cell.
+
+        Returns:
+            int: The flat cell id.
+        """
+        return position[0] * self.width + position[1]
+
+    def cell_position(self, cell: int) -> Tuple[int, int]:
+        """
+        Args:
+            cell: The flat cell id.
+
+        Returns:
+            Tuple[int, int]: The (row, column) position of the cell.
+        """
+        return divmod(cell, self.width)
+
+    def in_bounds(self, position: Tuple[int, int]) -> bool:
+        return 0 <= position[0] < self.height and 0 <= position[1] < self.width
+
+    def _is_wall(self, row: int, column: int) -> bool:
+        return 0 <= row < self.height and 0 <= column < self.width and not self.walkable[row * self.width + column]
+
+    def _build_neighbours(self, cell: int) -> List[Tuple[int, float]]:
+        """
+        Builds the neighbour list of a cell, using the same rules as get_neighbours:
+        walls are skipped and diagonal moves can't cut the corner of a wall.
+        """
+        x, y = divmod(cell, self.width)
+        neighbours = []
+        for dx, dy in DIRECTIONS:
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < self.height and 0 <= ny < self.width) or not self.walkable[nx * self.width + ny]:
+                continue
+            if dx != 0 and dy != 0:
+                # Checks whether there is a corner of a wall between the diagonal path
+                if self._is_wall(x + dx, y) or self._is_wall(x, y + dy):
+                    continue
+                neighbours.append((nx * self.width + ny, DIAGONAL_COST))
+            else:
+                neighbours.append((nx * self.width + ny, ORTHOGONAL_COST))
+        return neighbours
+
+    def set_walkable(self, position: Tuple[int, int], walkable: bool) -> None:
+        """
+        Opens or blocks a cell without touching the level grid itself. Only the
+        neighbour lists of the cell and the 8 cells around it are rebuilt.
+
+        Args:
+            position: The (row, column) position of the cell.
+            walkable: True to open the cell, False to block it.
+        """
+        cell = self.cell_id(position)
+        if self.walkable[cell] == walkable:
+            return
+        self.walkable[cell] = walkable
+        x, y = position
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                if self.in_bounds((x + dx, y + dy)):
+                    neighbour = (x + dx) * self.width + y + dy
+                    self.neighbours[neighbour] = self._build_neighbours(neighbour)
+
+    def octile_distance(self, cell: int, goal: int) -> float:
+        """
+        Diagonal distance between two cells, an admissible estimate for this grid.
+        """
+        dx = abs(cell // self.width - goal // self.width)
+        dy = abs(cell % self.width - goal % self.width)
+        return ORTHOGONAL_COST * (dx + dy) + (DIAGONAL_COST - 2 * ORTHOGONAL_COST) * min(dx, dy)
+
+    def reconstruct_path(self, cell: int, state: Optional[SearchState] = None) -> List[Tuple[int, int]]:
+        """
+        Follows the parent array back from a cell to the start of the current query.
+
+        Args:
+            cell: The cell id to end at.
+            state: The query's state, the find_path state if None.
+
+        Returns:
+            List[Tuple[int, int]]: The path from the start to the cell.
+        """
+        parent = (state if state is not None else self.state).parent
+        path = []
+        while cell != -1:
+            path.append(divmod(cell, self.width))
+            cell = parent[cell]
+        return path[::-1]
+
+    def find_path(self,
+                  start: Tuple[int, int],
+                  end: Tuple[int, int],
+                  heuristic: Optional[Callable[[Tuple[int, int]], float]] = None,
+                  cost_field: Optional[List[float]] = None,
+                  heuristic_table: Optional[Sequence[float]] = None,
+                  use_buckets: bool = False,
+                  weight: float = 1.0,
+                  deadline: Optional[float] = None) -> List[Tuple[int, int]]:
+        """
+        Runs A* from start to end.
+
+        With a weight above 1 the search is weighted A* (f = g + weight * h): it
+        expands fewer nodes and the path costs at most weight times the shortest.
+        With a deadline the search gives up once time.perf_counter() passes it and
+        returns the path to the expanded cell with the lowest estimate, the one
+        closest to the goal, so the caller can start moving and plan again later.
+
+        Args:
+            start: The starting (row, column) position.
+            end: The ending (row, column) position.
+            heuristic: Optional estimate of the remaining cost from a (row, column)
+                position. Defaults to the diagonal distance to end.
+            cost_field: Optional extra cost of entering each cell id, e.g. an
+                InfluenceMap's cost grid. It is never negative, so the heuristic stays admissible.
+            heuristic_table: Optional estimate of every cell id, e.g. from heuristic_table(end)
+                when several queries share the same end, or a LandmarkBound. Used instead of heuristic.
+            use_buckets: Queue the open cells in the BucketQueue instead of the binary heap.
+                The heuristic must be consistent (the default, heuristic_table and LandmarkBound are).
+            weight: Factor applied to the heuristic, 1 for the shortest path.
+            deadline: Optional time.perf_counter() value the search must finish by.
+
+        Returns:
+            List[Tuple[int, int]]: The path from start to end, or an empty list if there is none.
+            After a deadline the path ends at the best cell reached instead of end.
+        """
+        state = self.state
+        self.begin(state, start, end, heuristic, cost_field, heuristic_table, use_buckets, weight)
+        self.resume(state, deadline=deadline)
+        self.expanded = state.expanded
+        self.open_peak = state.open_peak
+        return state.path
+
+    def begin(self,
+              state: SearchState,
+              start: Tuple[int, int],
+              end: Tuple[int, int],
+              heuristic: Optional[Callable[[Tuple[int, int]], float]] = None,
+              cost_field: Optional[Sequence[float]] = None,
+              heuristic_table: Optional[Sequence[float]] = None,
+              use_buckets: bool = False,
+              weight: float = 1.0) -> None:
+        """
+        Starts an A* query in a state, without expanding anything yet. Run it with resume.
+
+        Takes the same arguments as find_path. A query that needs no search, e.g.
+        start equal to end or an unreachable wall goal, is done straight away.
+
+        Args:
+            state: Where the query is kept, it replaces the state's previous query.
+        """
+        state.expanded = 0
+        state.open_peak = 0
+        state.path = []
+        state.done = True
+        if not (self.in_bounds(start) and self.in_bounds(end)):
+            return
+
+        width = self.width
+        start_cell = start[0] * width + start[1]
+        end_cell = end[0] * width + end[1]
+        if start_cell == end_cell:
+            state.path = [(start[0], start[1])]
+            return
+        if not self.walkable[end_cell]:
+            return
+
+        # New generation invalidates every g-score, parent and closed flag of the state's last query
+        state.generation += 1
+        if use_buckets and state.bucket_queue is None:
+            state.bucket_queue = BucketQueue(self.size)
+        open_heap = state.bucket_queue if use_buckets else state.open_heap
+        open_heap.clear()
+
+        if heuristic_table is not None:
+            estimate = heuristic_table.__getitem__
+        elif heuristic is None:
+            end_x, end_y = end
+            diagonal_saving = DIAGONAL_COST - 2 * ORTHOGONAL_COST
+
+            def estimate(cell: int) -> float:
+                dx = abs(cell // width - end_x)
+                dy = abs(cell % width - end_y)
+                return ORTHOGONAL_COST * (dx + dy) + diagonal_saving * (dx if dx < dy else dy)
+        else:
+            def estimate(cell: int) -> float:
+                return heuristic(divmod(cell, width))
+
+        state.queue = open_heap
+        state.estimate = estimate
+        state.cost_field = cost_field
+        state.weight = weight
+        state.end_cell = end_cell
+        state.best_cell, state.best_estimate = start_cell, float("inf")
+        state.done = False
+
+        state.g_score[start_cell] = 0.0
+        state.parent[start_cell] = -1
+        state.seen[start_cell] = state.generation
+        open_heap.push(start_cell, weight * estimate(start_cell))
+
+    def resume(self, state: SearchState, max_nodes: Optional[int] = None, deadline: Optional[float] = None) -> bool:
+        """
+        Continues a query started with begin, until it finishes or has expanded max_nodes more nodes.
+
+        Args:
+            state: The query's state.
+            max_nodes: The most nodes to expand in this call, None for no limit.
+            deadline: Optional time.perf_counter() value the search must finish by, see find_path.
+
+        Returns:
+            bool: True once the query has finished, its result is then in state.path.
+        """
+        if state.done:
+            return True
+        generation = state.generation
+        g_score, parent, seen, closed = state.g_score, state.parent, state.seen, state.closed
+        neighbours = self.neighbours
+        open_heap, estimate, cost_field = state.queue, state.estimate, state.cost_field
+        weight, end_cell = state.weight, state.end_cell
+        expanded, open_peak = state.expanded, state.open_peak
+        best_cell, best_estimate = state.best_cell, state.best_estimate
+        # Expansion count at which this call stops, -1 never matches
+        limit = expanded + max_nodes if max_nodes is not None else -1
+
+        try:
+            while open_heap:
+                if expanded == limit:
+                    return False
+                if len(open_heap) > open_peak:
+                    open_peak = len(open_heap)
+                current = open_heap.pop()
+                closed[current] = generation
+                expanded += 1
+
+                if current == end_cell:
+                    state.path = self.reconstruct_path(current, state)
+                    state.done = True
+                    return True
+
+                if deadline is not None:
+                    current_estimate = estimate(current)
+                    if current_estimate < best_estimate:
+                        best_cell, best_estimate = current, current_estimate
+                    if expanded % DEADLINE_CHECK_NODES == 0 and time.perf_counter() >= deadline:
+                        state.path = self.reconstruct_path(best_cell, state)
+                        state.done = True
+                        return True
+
+                current_g = g_score[current]
+                for neighbour, cost in neighbours[current]:
+                    if closed[neighbour] == generation:
+                        continue
+                    potential_g = current_g + cost
+                    if cost_field is not None:
+                        potential_g += cost_field[neighbour]
+                    if seen[neighbour] != generation or potential_g < g_score[neighbour]:
+                        # Found a shorter path to the neighbour, record it and queue/decrease its key
+                        seen[neighbour] = generation
+                        g_score[neighbour] = potential_g
+                        parent[neighbour] = current
+                        open_heap.push(neighbour, potential_g + weight * estimate(neighbour))
+
+            # Every reachable cell was expanded without finding the goal
+            state.done = True
+            return True
+        finally:
+            state.expanded, state.open_peak = expanded, open_peak
+            state.best_cell, state.best_estimate = best_cell, best_estimate
+
+    def heuristic_table(self, end: Tuple[int, int]) -> List[float]:
+        """
+        Computes the diagonal distance from every cell to end, so queries toward the same
+        end can share one table instead of evaluating the estimate per node.
+
+        Args:
+            end: The (row, column) goal.
+
+        Returns:
+            List[float]: The estimate of each flat cell id.
+        """
+        end_x, end_y = end
+        diagonal_saving = DIAGONAL_COST - 2 * ORTHOGONAL_COST
+        table = []
+        for x in range(self.height):
+            dx = abs(x - end_x)
+            table.extend(ORTHOGONAL_COST * (dx + dy) + diagonal_saving * (dx if dx < dy else dy)
+                         for dy in (abs(y - end_y) for y in range(self.width)))
+        return table
+
+
+# One engine per level grid, so the arrays are shared by every query on that level
+_grid_searches: Dict[int, GridSearch] = {}
+
+
+def get_grid_search(maze: List[List[int]]) -> GridSearch:
+    """
+    Returns the cached search engine for a level grid, creating it on first use.
+
+    Args:
+        maze: The level grid represented as a 2D list of integers.
+
+    Returns:
+        GridSearch: The engine for the grid.
+    """
+    search = _grid_searches.get(id(maze))
+    if search is None or search.maze is not maze:
+        search = GridSearch(maze)
+        _grid_searches[id(maze)] = search
+    return search
+
+
+def unload_grid_search(maze: List[List[int]]) -> None:
+    """
+    Drops the engine of a grid that is no longer searched, e.g. a level grid replaced by a newer one.
+    """
+    search = _grid_searches.get(id(maze))
+    if search is not None and search.maze is maze:
+        del _grid_searches[id(maze)]
@@ -0,0 +1,324 @@
+from __future__ import annotations
+
+import heapq
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from scripts.game.algorithms.grid_search import ORTHOGONAL_COST, GridSearch, get_grid_search
+
+# Width and height of a cluster in tiles
+CLUSTER_SIZE = 8
+# Border runs at least this long get an entrance at each end instead of one in the middle
+LONG_ENTRANCE_LENGTH = 6
+
+Cluster = Tuple[int, int]
+# (cost, cells from the first node to the second, both included)
+Edge = Tuple[float, List[int]]
+
+
+class HierarchicalGrid:
+    """
+    A two level abstraction of a level grid for HPA* (hierarchical pathfinding).
+
+    The grid is split into square clusters. Where open cells line up across the
+    border of two clusters an entrance is added, made of one abstract node on
+    each side. Inside every cluster the exact distance and path between each
+    pair of its abstract nodes is precomputed, so a query only has to search
+    the small abstract graph and then stitch the stored paths together.
+
+    The costs are the plain move costs, enemy danger from the InfluenceMap is
+    not part of the abstraction.
+
+    Attributes:
+        search (GridSearch): The level's engine, its walkable and neighbour tables are shared.
+        cluster_size (int): Width and height of a cluster in tiles.
+        entrances (Dict[Tuple[Cluster, Cluster], List[Tuple[int, int]]]): The (cell, cell) pairs across each border.
+        intra_edges (Dict[Cluster, Dict[int, Dict[int, Edge]]]): Paths between the abstract nodes of each cluster.
+        expanded (int): Number of abstract nodes expanded by the last query.
+    """
+
+    def __init__(self, search: GridSearch, cluster_size: int = CLUSTER_SIZE) -> None:
+        """
+        Args:
+            search: The GridSearch engine of the level grid.
+            cluster_size: Width and height of a cluster in tiles.
+        """
+        self.search = search
+        self.width = search.width
+        self.height = search.height
+        self.cluster_size = cluster_size
+        self.cluster_rows = -(-self.height // cluster_size)
+        self.cluster_columns = -(-self.width // cluster_size)
+
+        self.entrances: Dict[Tuple[Cluster, Cluster], List[Tuple[int, int]]] = {}
+        self.intra_edges: Dict[Cluster, Dict[int, Dict[int, Edge]]] = {}
+        self.inter_edges: Dict[int, Set[int]] = {}
+        self.expanded = 0
+
+        clusters = [(row, column) for row in range(self.cluster_rows) for column in range(self.cluster_columns)]
+        for border in self._borders(clusters):
+            self._build_entrances(border)
+        self._rebuild_inter_edges()
+        for cluster in clusters:
+            self._build_intra_edges(cluster)
+
+    # Building the abstraction
+    def cluster_of(self, cell: int) -> Cluster:
+        row, column = divmod(cell, self.width)
+        return row // self.cluster_size, column // self.cluster_size
+
+    def _bounds(self, cluster: Cluster) -> Tuple[int, int, int, int]:
+        """
+        Returns the (first row, end row, first column, end column) of a cluster, end exclusive.
+        """
+        row, column = cluster
+        size = self.cluster_size
+        return row * size, min((row + 1) * size, self.height), column * size, min((column + 1) * size, self.width)
+
+    def _borders(self, clusters: Iterable[Cluster]) -> Set[Tuple[Cluster, Cluster]]:
+        """
+        Returns every border touching the given clusters, as (top or left cluster, bottom or right cluster).
+        """
+        borders = set()
+        for row, column in clusters:
+            if column + 1 < self.cluster_columns:
+                borders.add(((row, column), (row, column + 1)))
+            if column > 0:
+                borders.add(((row, column - 1), (row, column)))
+            if row + 1 < self.cluster_rows:
+                borders.add(((row, column), (row + 1, column)))
+            if row > 0:
+                borders.add(((row - 1, column), (row, column)))
+        return borders
+
+    def _build_entrances(self, border: Tuple[Cluster, Cluster]) -> None:
+        """
+        Finds the runs of open cell pairs along a border and adds one or two entrances per run.
+        """
+        first, second = border
+        walkable = self.search.walkable
+        width = self.width
+        first_row, first_end_row, first_column, first_end_column = self._bounds(first)
+        if first[0] == second[0]:
+            # Vertical border between a left and a right cluster
+            pairs = [(row * width + first_end_column - 1, row * width + first_end_column)
+                     for row in range(first_row, first_end_row)]
+        else:
+            # Horizontal border between a top and a bottom cluster
+            pairs = [((first_end_row - 1) * width + column, first_end_row * width + column)
+                     for column in range(first_column, first_end_column)]
+
+        entrances = []
+        run: List[Tuple[int, int]] = []
+        for pair in pairs + [(-1, -1)]:
+            if pair[0] != -1 and walkable[pair[0]] and walkable[pair[1]]:
+                run.append(pair)
+                continue
+            if run:
+                if len(run) >= LONG_ENTRANCE_LENGTH:
+                    entrances.extend([run[0], run[-1]])
+                else:
+                    entrances.append(run[len(run) // 2])
+                run = []
+        self.entrances[border] = entrances
+
+    def _rebuild_inter_edges(self) -> None:
+        self.inter_edges = {}
+        for entrances in self.entrances.values():
+            for first, second in entrances:
+                self.inter_edges.setdefault(first, set()).add(second)
+                self.inter_edges.setdefault(second, set()).add(first)
+
+    def _cluster_nodes(self, cluster: Cluster) -> Set[int]:
+        nodes = set()
+        for border in self._borders([cluster]):
+            for first, second in self.entrances.get(border, []):
+                nodes.add(first if border[0] == cluster else second)
+        return nodes
+
+    def _local_search(self, source: int, cluster: Cluster) -> Tuple[Dict[int, float], Dict[int, int]]:
+        """
+        Dijkstra from a cell that never leaves the cluster.
+
+        Returns:
+            The distance and parent of every cell reached.
+        """
+        first_row, end_row, first_column, end_column = self._bounds(cluster)
+        width = self.width
+        neighbours = self.search.neighbours
+        distance = {source: 0.0}
+        parent = {source: -1}
+        open_list = [(0.0, source)]
+        while open_list:
+            current_distance, current = heapq.heappop(open_list)
+            if current_distance > distance[current]:
+                continue
+            for neighbour, cost in neighbours[current]:
+                row, column = divmod(neighbour, width)
+                if not (first_row <= row < end_row and first_column <= column < end_column):
+                    continue
+                new_distance = current_distance + cost
+                if new_distance < distance.get(neighbour, float("inf")):
+                    distance[neighbour] = new_distance
+                    parent[neighbour] = current
+                    heapq.heappush(open_list, (new_distance, neighbour))
+        return distance, parent
+
+    @staticmethod
+    def _trace(parent: Dict[int, int], cell: int) -> List[int]:
+        path = []
+        while cell != -1:
+            path.append(cell)
+            cell = parent[cell]
+        return path[::-1]
+
+    def _build_intra_edges(self, cluster: Cluster) -> None:
+        """
+        Computes the path between every pair of abstract nodes inside a cluster.
+        """
+        nodes = self._cluster_nodes(cluster)
+        edges: Dict[int, Dict[int, Edge]] = {node: {} for node in nodes}
+        for node in nodes:
+            distance, parent = self._local_search(node, cluster)
+            for other in nodes:
+                if other != node and other in distance:
+                    edges[node][other] = (distance[other], self._trace(parent, other))
+        self.intra_edges[cluster] = edges
+
+    def update_cells(self, positions: Iterable[Tuple[int, int]]) -> None:
+        """
+        Rebuilds the parts of the abstraction touched by changed cells. The level's
+        GridSearch must already reflect the change.
+
+        Only the borders of the clusters holding a changed cell get new entrances,
+        and only those clusters and their direct neighbours get their paths recomputed.
+
+        Args:
+            positions: The (row, column) cells that changed.
+        """
+        touched = {self.cluster_of(self.search.cell_id(position)) for position in positions
+                   if self.search.in_bounds(position)}
+        if not touched:
+            return
+        borders = self._borders(touched)
+        for border in borders:
+            self._build_entrances(border)
+        self._rebuild_inter_edges()
+        for cluster in touched | {cluster for border in borders for cluster in border}:
+            self._build_intra_edges(cluster)
+
+    # Queries
+    def _octile(self, cell: int, goal: int) -> float:
+        return self.search.octile_distance(cell, goal)
+
+    def _connect(self, cell: int) -> Dict[int, Edge]:
+        """
+        Finds paths from a cell to the abstract nodes of its cluster.
+        """
+        cluster = self.cluster_of(cell)
+        distance, parent = self._local_search(cell, cluster)
+        return {node: (distance[node], self._trace(parent, node))
+                for node in self.intra_edges.get(cluster, {}) if node in distance}
+
+    def _abstract_neighbours(self, node: int) -> List[Tuple[int, Edge]]:
+        neighbours = list(self.intra_edges.get(self.cluster_of(node), {}).get(node, {}).items())
+        for other in self.inter_edges.get(node, ()):
+            neighbours.append((other, (ORTHOGONAL_COST, [node, other])))
+        return neighbours
+
+    def find_path(self, start: Tuple[int, int], end: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """
+        Runs HPA*: a search over the abstract graph followed by joining the stored cluster paths.
+
+        Args:
+            start: The starting (row, column) position.
+            end: The ending (row, column) position.
+
+        Returns:
+            List[Tuple[int, int]]: Every cell of the path from start to end, the same format as a_star,
+            or an empty list if there is no path. The path is close to, but not always, the shortest.
+        """
+        self.expanded = 0
+        search = self.search
+        if not (search.in_bounds(start) and search.in_bounds(end)):
+            return []
+        start_cell = search.cell_id(start)
+        end_cell = search.cell_id(end)
+        if start_cell == end_cell:
+            return [(start[0], start[1])]
+        if not search.walkable[end_cell]:
+            return []
+
+        # Inside one cluster a local search is enough when it finds a path
+        if self.cluster_of(start_cell) == self.cluster_of(end_cell):
+            distance, parent = self._local_search(start_cell, self.cluster_of(start_cell))
+            if end_cell in distance:
+                return [divmod(cell, self.width) for cell in self._trace(parent, end_cell)]
+
+        # Temporary edges linking start and goal into the abstract graph
+        start_edges = self._connect(start_cell)
+        goal_edges = {node: (cost, path[::-1]) for node, (cost, path) in self._connect(end_cell).items()}
+
+        # A* over the abstract graph, the start and goal edges are added on the fly
+        g_score: Dict[int, float] = {start_cell: 0.0}
+        came_from: Dict[int, Tuple[int, List[int]]] = {}
+        open_list = [(self._octile(start_cell, end_cell), start_cell)]
+        closed: Set[int] = set()
+        while open_list:
+            _, current = heapq.heappop(open_list)
+            if current in closed:
+                continue
+            closed.add(current)
+            self.expanded += 1
+            if current == end_cell:
+                return self._refine(came_from, end_cell)
+
+            neighbours = self._abstract_neighbours(current)
+            if current == start_cell:
+                neighbours.extend(start_edges.items())
+            if current in goal_edges:
+                neighbours.append((end_cell, goal_edges[current]))
+            for neighbour, (cost, path) in neighbours:
+                new_g = g_score[current] + cost
+                if neighbour not in closed and new_g < g_score.get(neighbour, float("inf")):
+                    g_score[neighbour] = new_g
+                    came_from[neighbour] = (current, path)
+                    heapq.heappush(open_list, (new_g + self._octile(neighbour, end_cell), neighbour))
+
+        return []  # Return empty if no path is found
+
+    def _refine(self, came_from: Dict[int, Tuple[int, List[int]]], end_cell: int) -> List[Tuple[int, int]]:
+        """
+        Joins the cell paths of the abstract edges into one path.
+        """
+        segments = []
+        cell = end_cell
+        while cell in came_from:
+            cell, path = came_from[cell]
+            segments.append(path)
+        cells = []
+        for path in reversed(segments):
+            # Each segment starts where the last one ended
+            cells.extend(path if not cells else path[1:])
+        return [divmod(cell, self.width) for cell in cells]
+
+
+# One abstraction per level grid
+_hierarchical_grids: Dict[int, HierarchicalGrid] = {}
+
+
+def get_hierarchical_grid(maze: List[List[int]]) -> HierarchicalGrid:
+    """
+    Returns the cached HPA* abstraction for a level grid, building it on first use.
+
+    Args:
+        maze: The level grid represented as a 2D list of integers.
+
+    Returns:
+        HierarchicalGrid: The abstraction for the grid.
+    """
+    search = get_grid_search(maze)
+    hierarchy: Optional[HierarchicalGrid] = _hierarchical_grids.get(id(maze))
+    if hierarchy is None or hierarchy.search is not search:
+        hierarchy = HierarchicalGrid(search)
+        _hierarchical_grids[id(maze)] = hierarchy
+    return hierarchy
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+from typing import Dict, Hashable, List, Set, Tuple
+
+# Manhattan distance (in tiles) at which an enemy stops adding danger
+DANGER_RADIUS = 10
+# Converts the danger value of a cell into an extra move cost for the search. At 1 a cell costs
+# the same danger_radius - d penalty the old per-node heuristic added
+DANGER_COST_SCALE = 1.0
+
+
+class InfluenceMap:
+    """
+    A per-level grid of enemy danger, used by the search as an extra cost for entering a cell.
+
+    Every enemy stamps a diamond shaped kernel around its cell, where a cell at
+    Manhattan distance d gets (danger_radius - d) * DANGER_COST_SCALE added to
+    its cost. The map remembers which cell each enemy stamped, so when an
+    enemy moves only its old kernel is removed and its new one added.
+
+    Attributes:
+        width (int): Number of columns in the grid.
+        height (int): Number of rows in the grid.
+        cost (List[float]): The extra cost of entering each flat cell id (row * width + column).
+    """
+
+    def __init__(self, maze: List[List[int]], danger_radius: int = DANGER_RADIUS) -> None:
+        """
+        Args:
+            maze: The level grid represented as a 2D list of integers.
+            danger_radius: Manhattan distance at which an enemy stops adding danger.
+        """
+        self.height = len(maze)
+        self.width = len(maze[0]) if self.height > 0 else 0
+        self.cost: List[float] = [0.0] * (self.width * self.height)
+
+        # (row offset, column offset, cost) of every cell an enemy affects
+        self.kernel: List[Tuple[int, int, float]] = [
+            (dx, dy, (danger_radius - abs(dx) - abs(dy)) * DANGER_COST_SCALE)
+            for dx in range(-danger_radius, danger_radius + 1)
+            for dy in range(-danger_radius, danger_radius + 1)
+            if abs(dx) + abs(dy) < danger_radius
+        ]
+
+        # The cell each enemy is currently stamped on
+        self.stamped: Dict[Hashable, Tuple[int, int]] = {}
+        # Cells a kernel was added to or removed from since the last take_changed_cells
+        self.changed_centres: List[Tuple[int, int]] = []
+
+    def _apply(self, position: Tuple[int, int], sign: float) -> None:
+        self.changed_centres.append(position)
+        x, y = position
+        width, height, cost = self.width, self.height, self.cost
+        for dx, dy, weight in self.kernel:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < height and 0 <= ny < width:
+                cost[nx * width + ny] += sign * weight
+
+    def stamp(self, key: Hashable, position: Tuple[int, int]) -> None:
+        """
+        Adds an enemy's danger around a cell.
+
+        Args:
+            key: Identifies the enemy, so it can be moved or removed later.
+            position: The (row, column) cell of the enemy.
+        """
+        position = (int(position[0]), int(position[1]))
+        self.stamped[key] = position
+        self._apply(position, 1.0)
+
+    def unstamp(self, key: Hashable) -> None:
+        """
+        Removes an enemy's danger from the map.
+
+        Args:
+            key: The key the enemy was stamped with.
+        """
+        position = self.stamped.pop(key, None)
+        if position is not None:
+            self._apply(position, -1.0)
+
+    def move(self, key: Hashable, position: Tuple[int, int]) -> None:
+        """
+        Moves an enemy's danger to a new cell. Nothing is done if the enemy is still in the same cell.
+
+        Args:
+            key: Identifies the enemy.
+            position: The (row, column) cell of the enemy.
+        """
+        position = (int(position[0]), int(position[1]))
+        if self.stamped.get(key) == position:
+            return
+        self.unstamp(key)
+        self.stamp(key, position)
+
+    def update(self, positions: Dict[Hashable, Tuple[int, int]]) -> None:
+        """
+        Brings the map in line with the current enemy positions. Enemies that are no
+        longer in the dict are removed, the rest are moved if they changed cells.
+
+        Args:
+            positions: The (row, column) cell of each enemy, by key.
+        """
+        for key in [key for key in self.stamped if key not in positions]:
+            self.unstamp(key)
+        for key, position in positions.items():
+            self.move(key, position)
+
+    def take_changed_cells(self) -> Set[Tuple[int, int]]:
+        """
+        Returns the cells whose cost changed since the last call, e.g. so paths planned through them can be dropped.
+
+        Returns:
+            Set[Tuple[int, int]]: The (row, column) cells covered by every kernel added or removed since then.
+        """
+        changed = set()
+        for x, y in set(self.changed_centres):
+            changed.update((x + dx, y + dy) for dx, dy, _ in self.kernel
+                           if 0 <= x + dx < self.height and 0 <= y + dy < self.width)
+        self.changed_centres.clear()
+        return changed
+
+    def clear(self) -> None:
+        """
+        Removes every enemy from the map.
+        """
+        self.changed_centres.extend(self.stamped.values())
+        self.stamped.clear()
+        self.cost[:] = [0.0] * len(self.cost)
@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+
+from scripts.game.algorithms.grid_search import (DIAGONAL_COST, DIRECTIONS, ORTHOGONAL_COST, GridSearch,
+                                                 IndexedHeap, get_grid_search)
+
+
+class JumpPointSearch:
+    """
+    Jump Point Search over a level grid, for uniform-cost 8-connected moves
+    where a diagonal move can't cut the corner of a wall.
+
+    Instead of queueing every neighbour, the search jumps in a straight line
+    until it reaches the goal, a wall, or a cell with a forced neighbour (a
+    cell that can only be reached optimally by turning there). Only those jump
+    points enter the open list, which removes most of the symmetric
+    expansions A* does in open areas.
+
+    JPS relies on every move having the same cost, so it ignores enemy danger
+    costs from the InfluenceMap.
+
+    Attributes:
+        search (GridSearch): The level's engine, its walkable table is shared.
+        expanded (int): Number of jump points expanded by the last query.
+    """
+
+    def __init__(self, search: GridSearch) -> None:
+        """
+        Args:
+            search: The GridSearch engine of the level grid.
+        """
+        self.search = search
+        self.width = search.width
+        self.height = search.height
+
+        # Walkable table with a one cell wall border, so jumps never need bounds checks.
+        # Cells are indexed as (row + 1) * padded_width + (column + 1).
+        self.padded_width = self.width + 2
+        padded_size = (self.height + 2) * self.padded_width
+        self.open_cells = bytearray(padded_size)
+        for cell, walkable in enumerate(search.walkable):
+            if walkable:
+                row, column = divmod(cell, self.width)
+                self.open_cells[(row + 1) * self.padded_width + column + 1] = 1
+
+        # Per-query state, only valid where the stamp equals the current generation
+        self.generation = 0
+        self.g_score: List[float] = [0.0] * padded_size
+        self.parent: List[int] = [-1] * padded_size
+        self.seen: List[int] = [0] * padded_size
+        self.closed: List[int] = [0] * padded_size
+        self.open_heap = IndexedHeap(padded_size)
+
+        self.expanded = 0
+
+    def set_walkable(self, position: Tuple[int, int], walkable: bool) -> None:
+        """
+        Opens or blocks a cell in the padded table, e.g. after a door changes state.
+
+        Args:
+            position: The (row, column) position of the cell.
+            walkable: True to open the cell, False to block it.
+        """
+        if 0 <= position[0] < self.height and 0 <= position[1] < self.width:
+            self.open_cells[self._to_padded(position)] = 1 if walkable else 0
+
+    def _to_padded(self, position: Tuple[int, int]) -> int:
+        return (position[0] + 1) * self.padded_width + position[1] + 1
+
+    def _to_position(self, cell: int) -> Tuple[int, int]:
+        row, column = divmod(cell, self.padded_width)
+        return row - 1, column - 1
+
+    def _directions(self, cell: int, parent: int) -> List[Tuple[int, int]]:
+        """
+        Returns the (row step, column step) pairs worth searching from a cell, given the cell it was reached from.
+        Steps are offsets in the padded table: +-padded_width for rows and +-1 for columns.
+        """
+        open_cells = self.open_cells
+        row_step_size = self.padded_width
+        if parent == -1:
+            # The start cell searches in every direction the grid allows
+            directions = []
+            for dx, dy in DIRECTIONS:
+                row_step, column_step = dx * row_step_size, dy
+                if not open_cells[cell + row_step + column_step]:
+                    continue
+                if row_step and column_step and not (open_cells[cell + row_step] and open_cells[cell + column_step]):
+                    continue
+                directions.append((row_step, column_step))
+            return directions
+
+        parent_row, parent_column = divmod(parent, row_step_size)
+        row, column = divmod(cell, row_step_size)
+        row_step = ((row > parent_row) - (row < parent_row)) * row_step_size
+        column_step = (column > parent_column) - (column < parent_column)
+        directions = []
+        if row_step and column_step:
+            # Diagonal: continue in both straight components and the diagonal itself
+            column_open = open_cells[cell + column_step]
+            row_open = open_cells[cell + row_step]
+            if column_open:
+                directions.append((0, column_step))
+            if row_open:
+                directions.append((row_step, 0))
+            if column_open and row_open:
+                directions.append((row_step, column_step))
+        elif row_step:
+            # Moving between rows: keep going and check both sides
+            next_open = open_cells[cell + row_step]
+            right_open = open_cells[cell + 1]
+            left_open = open_cells[cell - 1]
+            if next_open:
+                directions.append((row_step, 0))
+                if right_open:
+                    directions.append((row_step, 1))
+                if left_open:
+                    directions.append((row_step, -1))
+            if right_open:
+                directions.append((0, 1))
+            if left_open:
+                directions.append((0, -1))
+        else:
+            # Moving between columns: keep going and check both sides
+            next_open = open_cells[cell + column_step]
+            down_open = open_cells[cell + row_step_size]
+            up_open = open_cells[cell - row_step_size]
+            if next_open:
+                directions.append((0, column_step))
+                if down_open:
+                    directions.append((row_step_size, column_step))
+                if up_open:
+                    directions.append((-row_step_size, column_step))
+            if down_open:
+                directions.append((row_step_size, 0))
+            if up_open:
+                directions.append((-row_step_size, 0))
+        return directions
+
+    def _jump_straight(self, cell: int, step: int, side: int, end_cell: int) -> int:
+        """
+        Jumps from a cell in a straight line and returns the first jump point, or -1 if there is none.
+
+        Args:
+            cell: The padded cell id to jump from.
+            step: The offset of one move along the line.
+            side: The offset to one side of the line (the other side is -side).
+            end_cell: The padded cell id of the goal.
+        """
+        open_cells = self.open_cells
+        while True:
+            cell += step
+            if not open_cells[cell]:
+                return -1
+            if cell == end_cell:
+                return cell
+            # A side cell that was blocked one step back is a forced neighbour
+            behind = cell - step
+            if (open_cells[cell + side] and not open_cells[behind + side]) or \
+                    (open_cells[cell - side] and not open_cells[behind - side]):
+                return cell
+
+    def _jump(self, cell: int, row_step: int, column_step: int, end_cell: int) -> int:
+        """
+        Jumps from a cell in a direction and returns the first jump point, or -1 if there is none.
+        """
+        if not column_step:
+            return self._jump_straight(cell, row_step, 1, end_cell)
+        if not row_step:
+            return self._jump_straight(cell, column_step, self.padded_width, end_cell)
+
+        open_cells = self.open_cells
+        jump_straight = self._jump_straight
+        row_side = self.padded_width
+        step = row_step + column_step
+        while True:
+            cell += step
+            if not open_cells[cell]:
+                return -1
+            if cell == end_cell:
+                return cell
+            # A diagonal cell is a jump point if either straight component reaches one
+            if jump_straight(cell, row_step, 1, end_cell) != -1 or \
+                    jump_straight(cell, column_step, row_side, end_cell) != -1:
+                return cell
+            # Keep going diagonally only if the move doesn't cut a corner
+            if not (open_cells[cell + row_step] and open_cells[cell + column_step]):
+                return -1
+
+    def _octile(self, cell: int, end_row: int, end_column: int) -> float:
+        dx = abs(cell // self.padded_width - end_row)
+        dy = abs(cell % self.padded_width - end_column)
+        return ORTHOGONAL_COST * (dx + dy) + (DIAGONAL_COST - 2 * ORTHOGONAL_COST) * min(dx, dy)
+
+    def _expand_path(self, cell: int) -> List[Tuple[int, int]]:
+        """
+        Follows the parents back from a cell and fills in the cells between jump points.
+        """
+        jump_points = []
+        while cell != -1:
+            jump_points.append(self._to_position(cell))
+            cell = self.parent[cell]
+        jump_points.reverse()
+
+        path = [jump_points[0]]
+        for (x1, y1) in jump_points[1:]:
+            x, y = path[-1]
+            dx = (x1 > x) - (x1 < x)
+            dy = (y1 > y) - (y1 < y)
+            # Jumps are always straight or diagonal lines, so stepping by (dx, dy) lands on the jump point
+            while (x, y) != (x1, y1):
+                x += dx
+                y += dy
+                path.append((x, y))
+        return path
+
+    def find_path(self, start: Tuple[int, int], end: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """
+        Runs Jump Point Search from start to end.
+
+        Args:
+            start: The starting (row, column) position.
+            end: The ending (row, column) position.
+
+        Returns:
+            List[Tuple[int, int]]: Every cell of the path from start to end, the same format as a_star,
+            or an empty list if there is no path.
+        """
+        self.expanded = 0
+        if not (self.search.in_bounds(start) and self.search.in_bounds(end)):
+            return []
+        start_cell = self._to_padded(start)
+        end_cell = self._to_padded(end)
+        if start_cell == end_cell:
+            return [(start[0], start[1])]
+        if not self.open_cells[end_cell]:
+            return []
+
+        self.generation += 1
+        generation = self.generation
+        g_score, parent, seen, closed = self.g_score, self.parent, self.seen, self.closed
+        open_heap = self.open_heap
+        open_heap.clear()
+        padded_width = self.padded_width
+        end_row, end_column = divmod(end_cell, padded_width)
+
+        g_score[start_cell] = 0.0
+        parent[start_cell] = -1
+        seen[start_cell] = generation
+        open_heap.push(start_cell, self._octile(start_cell, end_row, end_column))
+
+        while open_heap:
+            current = open_heap.pop()
+            closed[current] = generation
+            self.expanded += 1
+
+            if current == end_cell:
+                return self._expand_path(current)
+
+            row, column = divmod(current, padded_width)
+            current_g = g_score[current]
+            for row_step, column_step in self._directions(current, parent[current]):
+                jump_point = self._jump(current, row_step, column_step, end_cell)
+                if jump_point == -1 or closed[jump_point] == generation:
+                    continue
+                # Distance along the jump, which is a straight or diagonal line
+                jump_row, jump_column = divmod(jump_point, padded_width)
+                distance_x, distance_y = abs(jump_row - row), abs(jump_column - column)
+                potential_g = current_g + ORTHOGONAL_COST * abs(distance_x - distance_y) + \
+                    DIAGONAL_COST * min(distance_x, distance_y)
+                if seen[jump_point] != generation or potential_g < g_score[jump_point]:
+                    seen[jump_point] = generation
+                    g_score[jump_point] = potential_g
+                    parent[jump_point] = current
+                    open_heap.push(jump_point, potential_g + self._octile(jump_point, end_row, end_column))
+
+        return []  # Return empty if no path is found
+
+
+# One JPS engine per level grid
+_jump_point_searches: Dict[int, JumpPointSearch] = {}
+
+
+def get_jump_point_search(maze: List[List[int]]) -> JumpPointSearch:
+    """
+    Returns the cached Jump Point Search engine for a level grid, creating it on first use.
+
+    Args:
+        maze: The level grid represented as a 2D list of integers.
+
+    Returns:
+        JumpPointSearch: The engine for the grid.
+    """
+    search = get_grid_search(maze)
+    jps: Optional[JumpPointSearch] = _jump_point_searches.get(id(maze))
+    if jps is None or jps.search is not search:
+        jps = JumpPointSearch(search)
+        _jump_point_searches[id(maze)] = jps
+    return jps
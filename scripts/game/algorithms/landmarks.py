@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import heapq
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from scripts.game.algorithms.grid_search import DIAGONAL_COST, ORTHOGONAL_COST, GridSearch, get_grid_search
+
+# Number of landmarks picked per level
+LANDMARK_COUNT = 4
+# Taken off every landmark bound, so float32 rounding can't make it overestimate
+LANDMARK_SLACK = 1e-3
+
+INFINITY = float("inf")
+
+
+class LandmarkBound:
+    """
+    The ALT estimate toward one goal, indexed by cell id like a heuristic table.
+
+    Values are computed when a cell is first asked for, so a query only pays
+    for the cells it actually queues.
+    """
+
+    def __init__(self, landmarks: LandmarkHeuristic, goal: int) -> None:
+        self.width = landmarks.width
+        self.goal_x, self.goal_y = divmod(goal, self.width)
+        # Landmarks that can't reach the goal give no bound for it
+        self.pairs = [(distances, distances[goal]) for distances in landmarks.distances
+                      if distances[goal] != INFINITY]
+
+    def __getitem__(self, cell: int) -> float:
+        # Diagonal distance, still the better bound near the goal
+        dx = abs(cell // self.width - self.goal_x)
+        dy = abs(cell % self.width - self.goal_y)
+        best = ORTHOGONAL_COST * (dx + dy) + (DIAGONAL_COST - 2 * ORTHOGONAL_COST) * (dx if dx < dy else dy)
+        # Triangle inequality: |d(L, goal) - d(L, cell)| <= d(cell, goal) for every landmark L
+        for distances, goal_distance in self.pairs:
+            distance = distances[cell]
+            bound = (goal_distance - distance if goal_distance > distance else distance - goal_distance) - LANDMARK_SLACK
+            if bound > best:
+                best = bound
+        return best
+
+
+class LandmarkHeuristic:
+    """
+    ALT (A*, landmarks and the triangle inequality) distance tables for a level grid.
+
+    A few landmark cells spread around the level each store the exact path
+    cost to every cell. Since those costs follow the walls, the lower bound
+    they give stays tight around long platforms where the diagonal distance
+    badly underestimates, so A* expands fewer dead-end cells.
+
+    Attributes:
+        search (GridSearch): The level's engine, its walkable and neighbour tables are shared.
+        landmarks (List[int]): The landmark cell ids.
+        distances (List[array]): Path cost from each landmark to every cell id (float32), inf where unreachable.
+    """
+
+    def __init__(self, search: GridSearch, count: int = LANDMARK_COUNT) -> None:
+        """
+        Args:
+            search: The GridSearch engine of the level grid.
+            count: Number of landmarks to pick.
+        """
+        self.search = search
+        self.width = search.width
+        self.landmarks: List[int] = []
+        self.distances: List[array] = []
+        self._select_landmarks(count)
+
+    def _costs_from(self, source: int) -> List[float]:
+        """
+        Dijkstra from a cell over the whole grid. Moves cost 1 or 1.414, so a plain BFS wouldn't give exact costs.
+        """
+        neighbours = self.search.neighbours
+        distance = [INFINITY] * self.search.size
+        distance[source] = 0.0
+        open_list = [(0.0, source)]
+        while open_list:
+            current_distance, current = heapq.heappop(open_list)
+            if current_distance > distance[current]:
+                continue
+            for neighbour, cost in neighbours[current]:
+                new_distance = current_distance + cost
+                if new_distance < distance[neighbour]:
+                    distance[neighbour] = new_distance
+                    heapq.heappush(open_list, (new_distance, neighbour))
+        return distance
+
+    def _select_landmarks(self, count: int) -> None:
+        """
+        Picks landmarks by farthest-point selection: each new landmark is the reachable cell furthest
+        from every landmark picked so far, which spreads them around the edges of the level.
+        """
+        walkable = self.search.walkable
+        open_cells = [cell for cell in range(self.search.size) if walkable[cell]]
+        if not open_cells:
+            return
+        # Start from the cell furthest from an arbitrary one, inside the largest area that cell can reach
+        seed_costs = self._costs_from(open_cells[len(open_cells) // 2])
+        closest = [INFINITY] * self.search.size
+        candidate = max((cell for cell in open_cells if seed_costs[cell] != INFINITY), key=seed_costs.__getitem__)
+        for _ in range(count):
+            costs = self._costs_from(candidate)
+            self.landmarks.append(candidate)
+            self.distances.append(array("f", costs))
+            for cell in open_cells:
+                if costs[cell] < closest[cell]:
+                    closest[cell] = costs[cell]
+            reachable = [cell for cell in open_cells if closest[cell] != INFINITY and closest[cell] > 0]
+            if not reachable:
+                break
+            candidate = max(reachable, key=closest.__getitem__)
+
+    def rebuild(self) -> None:
+        """
+        Recomputes the distance tables from the same landmarks, after the obstacle overlay opened cells.
+
+        Opening a cell can make paths shorter than the tables say, and the
+        bounds would overestimate. Blocking a cell only makes paths longer, so
+        the old tables are still lower bounds and don't need this.
+        """
+        self.distances = [array("f", self._costs_from(landmark)) for landmark in self.landmarks]
+
+    def bound_to(self, end: Tuple[int, int]) -> LandmarkBound:
+        """
+        Args:
+            end: The (row, column) goal of a query.
+
+        Returns:
+            LandmarkBound: The estimate of every cell toward end, to pass to GridSearch.find_path as its heuristic_table.
+        """
+        return LandmarkBound(self, self.search.cell_id(end))
+
+
+# One set of landmark tables per level grid
+_landmark_heuristics: Dict[int, LandmarkHeuristic] = {}
+
+
+def get_landmark_heuristic(maze: List[List[int]]) -> LandmarkHeuristic:
+    """
+    Returns the cached landmark tables of a level grid, building them on first use.
+
+    Args:
+        maze: The level grid represented as a 2D list of integers.
+
+    Returns:
+        LandmarkHeuristic: The tables for the grid.
+    """
+    search = get_grid_search(maze)
+    landmarks: Optional[LandmarkHeuristic] = _landmark_heuristics.get(id(maze))
+    if landmarks is None or landmarks.search is not search:
+        landmarks = LandmarkHeuristic(search)
+        _landmark_heuristics[id(maze)] = landmarks
+    return landmarks
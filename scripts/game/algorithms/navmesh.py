@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import heapq
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from scripts.game.algorithms.grid_search import DIAGONAL_COST, ORTHOGONAL_COST, GridSearch, get_grid_search
+
+Cell = Tuple[int, int]
+# (top row, left column, bottom row, right column), both ends included
+Rectangle = Tuple[int, int, int, int]
+# (neighbour rectangle, first row, last row, first column, last column, row step, column step):
+# the cells on this side of a shared edge and the step that crosses it
+Portal = Tuple[int, int, int, int, int, int, int]
+
+
+def octile(a: Cell, b: Cell) -> float:
+    dx, dy = abs(a[0] - b[0]), abs(a[1] - b[1])
+    return ORTHOGONAL_COST * (dx + dy) + (DIAGONAL_COST - 2 * ORTHOGONAL_COST) * min(dx, dy)
+
+
+def clamp_to_portal(position: Cell, portal: Portal) -> Cell:
+    """
+    Returns the cell of a portal's edge closest to a position.
+    """
+    _, first_row, last_row, first_column, last_column, _, _ = portal
+    return (min(max(position[0], first_row), last_row), min(max(position[1], first_column), last_column))
+
+
+class NavMesh:
+    """
+    A navigation mesh of a level grid made of open rectangles, for flying enemies.
+
+    At build time the walkable cells are merged greedily into maximal
+    rectangles: each uncovered cell, in reading order, is grown right as far
+    as it can, then down for as long as the whole row below is open. Two
+    rectangles sharing an edge are linked by a portal, the cells along that
+    edge. A query searches the rectangle graph instead of the cells, which on
+    the open levels is one to two orders of magnitude smaller.
+
+    Any two cells of a rectangle can be joined by a straight flight, so a path
+    only needs a waypoint where it crosses a portal. Each crossing point is
+    picked on the portal edge as the search reaches it, so the path is close
+    to, but not always, the shortest.
+
+    Rectangles only link through edges, never corners. Diagonal moves can't
+    cut a wall corner, so this doesn't lose any connection.
+
+    Attributes:
+        search (GridSearch): The level's engine, its walkable table is meshed.
+        rectangles (List[Rectangle]): The open rectangles.
+        rectangle_of (List[int]): The rectangle of each cell id, -1 for walls.
+        portals (List[List[Portal]]): The portals leaving each rectangle.
+        expanded (int): Number of rectangles expanded by the last query.
+    """
+
+    def __init__(self, search: GridSearch) -> None:
+        """
+        Args:
+            search: The GridSearch engine of the level grid.
+        """
+        self.search = search
+        self.width = search.width
+        self.height = search.height
+        self.rectangles: List[Rectangle] = []
+        self.rectangle_of: List[int] = []
+        self.portals: List[List[Portal]] = []
+        self.expanded = 0
+        self.rebuild()
+
+    # Building the mesh
+    def rebuild(self) -> None:
+        """
+        Meshes the current walkable table again, e.g. after doors opened or closed.
+        """
+        walkable, width, height = self.search.walkable, self.width, self.height
+        rectangle_of = [-1] * self.search.size
+        rectangles = []
+        for row in range(height):
+            for column in range(width):
+                cell = row * width + column
+                if not walkable[cell] or rectangle_of[cell] != -1:
+                    continue
+                right = column
+                while right + 1 < width and walkable[cell + right + 1 - column] \
+                        and rectangle_of[cell + right + 1 - column] == -1:
+                    right += 1
+                bottom = row
+                while bottom + 1 < height and all(
+                        walkable[(bottom + 1) * width + other] and rectangle_of[(bottom + 1) * width + other] == -1
+                        for other in range(column, right + 1)):
+                    bottom += 1
+                index = len(rectangles)
+                rectangles.append((row, column, bottom, right))
+                for covered_row in range(row, bottom + 1):
+                    row_start = covered_row * width
+                    rectangle_of[row_start + column:row_start + right + 1] = [index] * (right - column + 1)
+        self.rectangles = rectangles
+        self.rectangle_of = rectangle_of
+        self._build_portals()
+
+    def _build_portals(self) -> None:
+        """
+        Links every pair of rectangles that share an edge, walking the cells just outside each rectangle.
+        """
+        rectangle_of, width, height = self.rectangle_of, self.width, self.height
+        portals: List[List[Portal]] = [[] for _ in self.rectangles]
+        for index, (top, left, bottom, right) in enumerate(self.rectangles):
+            # Each side as (the edge's own cells, the step out of the rectangle)
+            sides = []
+            if top > 0:
+                sides.append(([(top, column) for column in range(left, right + 1)], -1, 0))
+            if bottom + 1 < height:
+                sides.append(([(bottom, column) for column in range(left, right + 1)], 1, 0))
+            if left > 0:
+                sides.append(([(row, left) for row in range(top, bottom + 1)], 0, -1))
+            if right + 1 < width:
+                sides.append(([(row, right) for row in range(top, bottom + 1)], 0, 1))
+            for edge, row_step, column_step in sides:
+                # Runs of edge cells facing the same neighbour become one portal
+                runs: List[List] = []
+                for row, column in edge:
+                    neighbour = rectangle_of[(row + row_step) * width + column + column_step]
+                    if runs and runs[-1][0] == neighbour:
+                        runs[-1][2] = (row, column)
+                    else:
+                        runs.append([neighbour, (row, column), (row, column)])
+                for neighbour, (first_row, first_column), (last_row, last_column) in runs:
+                    if neighbour != -1:
+                        portals[index].append((neighbour, first_row, last_row, first_column, last_column,
+                                               row_step, column_step))
+        self.portals = portals
+
+    def update_cells(self, positions: Iterable[Cell]) -> None:
+        """
+        Rebuilds the mesh after cells were opened or blocked in the level's GridSearch.
+
+        Args:
+            positions: The (row, column) cells that changed.
+        """
+        if any(True for _ in positions):
+            self.rebuild()
+
+    # Queries
+    def find_waypoints(self, start: Cell, end: Cell) -> List[Cell]:
+        """
+        Searches the rectangle graph for a route from start to end.
+
+        Args:
+            start: The starting (row, column) position.
+            end: The ending (row, column) position.
+
+        Returns:
+            List[Cell]: start, then the cells on each side of every portal crossed, then end,
+            or an empty list if there is no path. Consecutive waypoints are either in the same
+            rectangle or orthogonal neighbours, so flying straight between them is clear.
+        """
+        self.expanded = 0
+        search = self.search
+        if not (search.in_bounds(start) and search.in_bounds(end)):
+            return []
+        start = (int(start[0]), int(start[1]))
+        end = (int(end[0]), int(end[1]))
+        start_rectangle = self.rectangle_of[search.cell_id(start)]
+        end_rectangle = self.rectangle_of[search.cell_id(end)]
+        if start_rectangle == -1 or end_rectangle == -1:
+            return []
+        if start_rectangle == end_rectangle:
+            return [start, end] if start != end else [start]
+
+        # A* over the rectangles, each one entered at the cell where its portal was crossed.
+        # The goal itself is the extra node `goal`, reached from the goal's rectangle
+        goal = len(self.rectangles)
+        entry: Dict[int, Cell] = {start_rectangle: start}
+        g_score: Dict[int, float] = {start_rectangle: 0.0}
+        came_from: Dict[int, Tuple[int, Cell, Cell]] = {}
+        closed = set()
+        open_list = [(octile(start, end), start_rectangle)]
+        while open_list:
+            _, current = heapq.heappop(open_list)
+            if current in closed:
+                continue
+            closed.add(current)
+            if current == goal:
+                return self._waypoints(came_from, start, end)
+            self.expanded += 1
+
+            position = entry[current]
+            if current == end_rectangle:
+                new_g = g_score[current] + octile(position, end)
+                if new_g < g_score.get(goal, float("inf")):
+                    g_score[goal] = new_g
+                    came_from[goal] = (current, end, end)
+                    heapq.heappush(open_list, (new_g, goal))
+            for portal in self.portals[current]:
+                neighbour = portal[0]
+                if neighbour in closed:
+                    continue
+                # Cross where it's cheapest between the cells facing the current position and the goal
+                exit_cell = min(clamp_to_portal(position, portal), clamp_to_portal(end, portal),
+                                key=lambda cell: octile(position, cell) + octile(cell, end))
+                entry_cell = (exit_cell[0] + portal[5], exit_cell[1] + portal[6])
+                new_g = g_score[current] + octile(position, exit_cell) + ORTHOGONAL_COST
+                if new_g < g_score.get(neighbour, float("inf")):
+                    g_score[neighbour] = new_g
+                    entry[neighbour] = entry_cell
+                    came_from[neighbour] = (current, exit_cell, entry_cell)
+                    heapq.heappush(open_list, (new_g + octile(entry_cell, end), neighbour))
+
+        return []  # Return empty if no path is found
+
+    def _waypoints(self, came_from: Dict[int, Tuple[int, Cell, Cell]], start: Cell, end: Cell) -> List[Cell]:
+        """
+        Lists the portal crossings from the start to the goal node, skipping repeated cells.
+        """
+        crossings = []
+        node = len(self.rectangles)
+        while node in came_from:
+            node, exit_cell, entry_cell = came_from[node]
+            crossings.append(entry_cell)
+            crossings.append(exit_cell)
+        waypoints = [start]
+        for cell in reversed(crossings):
+            if cell != waypoints[-1]:
+                waypoints.append(cell)
+        return waypoints
+
+    def find_path(self, start: Cell, end: Cell) -> List[Cell]:
+        """
+        Runs a query and expands its waypoints into every cell along the way.
+
+        Args:
+            start: The starting (row, column) position.
+            end: The ending (row, column) position.
+
+        Returns:
+            List[Cell]: Every cell of the path from start to end, the same format as a_star,
+            or an empty list if there is no path.
+        """
+        return expand_waypoints(self.find_waypoints(start, end))
+
+
+def expand_waypoints(waypoints: List[Cell]) -> List[Cell]:
+    """
+    Fills in the cells between waypoints, moving diagonally first and then straight.
+
+    Every step stays inside the bounding box of its two waypoints, which lies in
+    one rectangle of the mesh (or is a single orthogonal step across a portal),
+    so the moves never touch a wall or cut a corner.
+
+    Args:
+        waypoints: Waypoints as returned by NavMesh.find_waypoints.
+
+    Returns:
+        List[Cell]: Neighbouring cells from the first waypoint to the last.
+    """
+    if not waypoints:
+        return []
+    cells = [waypoints[0]]
+    for target in waypoints[1:]:
+        row, column = cells[-1]
+        while (row, column) != target:
+            row += (target[0] > row) - (target[0] < row)
+            column += (target[1] > column) - (target[1] < column)
+            cells.append((row, column))
+    return cells
+
+
+# One navigation mesh per level grid
+_navmeshes: Dict[int, NavMesh] = {}
+
+
+def get_navmesh(maze: List[List[int]]) -> NavMesh:
+    """
+    Returns the cached navigation mesh of a level grid, building it on first use.
+
+    Args:
+        maze: The level grid represented as a 2D list of integers.
+
+    Returns:
+        NavMesh: The mesh for the grid.
+    """
+    search = get_grid_search(maze)
+    navmesh: Optional[NavMesh] = _navmeshes.get(id(maze))
+    if navmesh is None or navmesh.search is not search:
+        navmesh = NavMesh(search)
+        _navmeshes[id(maze)] = navmesh
+    return navmesh
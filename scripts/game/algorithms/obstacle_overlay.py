@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import math
+from typing import Dict, Hashable, Iterable, List, Tuple
+
+from scripts.game.algorithms.grid_search import get_grid_search
+
+Cell = Tuple[int, int]
+
+
+def cells_under_rect(left: float,
+                     top: float,
+                     right: float,
+                     bottom: float,
+                     tile_width: float,
+                     tile_height: float) -> List[Cell]:
+    """
+    Returns the (row, column) cells a screen rectangle overlaps, e.g. a Door's rect.
+
+    Args:
+        left: Left edge of the rectangle in pixels.
+        top: Top edge of the rectangle in pixels.
+        right: Right edge of the rectangle in pixels (exclusive, like pygame.Rect.right).
+        bottom: Bottom edge of the rectangle in pixels (exclusive).
+        tile_width: Width of a grid cell in pixels.
+        tile_height: Height of a grid cell in pixels.
+
+    Returns:
+        List[Cell]: Every overlapped cell, possibly outside the grid.
+    """
+    first_row, last_row = int(top // tile_height), math.ceil(bottom / tile_height) - 1
+    first_column, last_column = int(left // tile_width), math.ceil(right / tile_width) - 1
+    return [(row, column) for row in range(first_row, last_row + 1)
+            for column in range(first_column, last_column + 1)]
+
+
+class ObstacleOverlay:
+    """
+    Dynamic obstacles, such as doors and laser doors, on top of a level's static grid.
+
+    Each obstacle covers a few cells. A cell is blocked in the level's
+    GridSearch while at least one closed obstacle covers it, and opened again
+    once none does. The level grid itself is never changed, so static walls
+    can always be told apart from obstacles, and cells that are static walls
+    are never opened.
+
+    Every update that opens or blocks a cell bumps the version and returns the
+    changed cells, so callers only repair what the change touched.
+
+    Attributes:
+        version (int): Number of updates that changed a cell.
+        obstacle_cells (Dict[Hashable, List[Cell]]): The open static cells each obstacle covers.
+        closed (Dict[Hashable, bool]): Whether each obstacle currently blocks its cells.
+    """
+
+    def __init__(self, maze: List[List[int]]) -> None:
+        """
+        Args:
+            maze: The level grid represented as a 2D list of integers.
+        """
+        self.maze = maze
+        self.search = get_grid_search(maze)
+        self.version = 0
+        self.obstacle_cells: Dict[Hashable, List[Cell]] = {}
+        self.closed: Dict[Hashable, bool] = {}
+        # Number of closed obstacles covering each cell id
+        self.cover: List[int] = [0] * self.search.size
+
+    def add(self, key: Hashable, cells: Iterable[Cell], closed: bool = False) -> Tuple[List[Cell], List[Cell]]:
+        """
+        Registers an obstacle. Cells outside the grid or on static walls are ignored.
+
+        Args:
+            key: Identifies the obstacle, e.g. the Door object.
+            cells: The (row, column) cells it covers.
+            closed: Whether it starts out blocking its cells.
+
+        Returns:
+            The cells that were blocked and the cells that were opened (always none).
+        """
+        search = self.search
+        self.obstacle_cells[key] = [(int(row), int(column)) for row, column in cells
+                                    if search.in_bounds((row, column))
+                                    and self.maze[int(row)][int(column)] != 1]
+        self.closed[key] = False
+        return self.update({key: closed})
+
+    def update(self, states: Dict[Hashable, bool]) -> Tuple[List[Cell], List[Cell]]:
+        """
+        Applies the closed state of some obstacles, changing only the cells whose cover changes.
+
+        Args:
+            states: Whether each obstacle is closed, keyed like add.
+
+        Returns:
+            The cells that were blocked and the cells that were opened by this update.
+        """
+        cover, search = self.cover, self.search
+        touched = []
+        for key, closed in states.items():
+            if key not in self.closed or self.closed[key] == closed:
+                continue
+            self.closed[key] = closed
+            change = 1 if closed else -1
+            for position in self.obstacle_cells[key]:
+                cover[search.cell_id(position)] += change
+                touched.append(position)
+
+        blocked, opened = [], []
+        for position in dict.fromkeys(touched):
+            walkable = cover[search.cell_id(position)] == 0
+            if search.walkable[search.cell_id(position)] != walkable:
+                search.set_walkable(position, walkable)
+                (opened if walkable else blocked).append(position)
+        if blocked or opened:
+            self.version += 1
+        return blocked, opened
+
+    def blocked_cells(self) -> List[Cell]:
+        """
+        Returns:
+            List[Cell]: The cells currently blocked by an obstacle.
+        """
+        return [divmod(cell, self.search.width) for cell, count in enumerate(self.cover) if count > 0]
+
+    def grid(self) -> List[List[int]]:
+        """
+        Returns:
+            List[List[int]]: A copy of the level grid with the blocked cells as walls (1),
+            e.g. to publish to the pathfinding worker processes.
+        """
+        walkable, width = self.search.walkable, self.search.width
+        return [[0 if walkable[row * width + column] else 1 for column in range(width)]
+                for row in range(self.search.height)]
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Hashable, Iterable, List, Optional, Tuple
+
+from scripts.game.algorithms.grid_search import DIAGONAL_COST, ORTHOGONAL_COST
+
+# Default number of paths kept before the least recently used one is evicted
+DEFAULT_CAPACITY = 256
+
+CacheKey = Tuple[Hashable, int, Tuple[int, int], Tuple[int, int]]
+
+
+class PathCache:
+    """
+    A bounded least-recently-used cache of planned paths.
+
+    Paths are keyed by (level id, grid version, start cell, goal cell). The grid
+    version is bumped whenever the level's walkable cells change (e.g. a Door
+    opens), so paths planned on the old grid can never be returned again. Paths
+    through cells whose danger cost changed are dropped with invalidate_through.
+
+    Attributes:
+        capacity (int): The most paths kept at once.
+        hits (int): Number of lookups that found a path.
+        misses (int): Number of lookups that didn't.
+        evictions (int): Number of paths dropped to stay within the capacity.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY) -> None:
+        """
+        Args:
+            capacity: The most paths kept at once.
+        """
+        self.capacity = capacity
+        self.entries: OrderedDict[CacheKey, List[Tuple[int, int]]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        Returns:
+            float: The fraction of lookups that were hits, 0 before the first lookup.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    @staticmethod
+    def make_key(level_id: Hashable, version: int, start: Tuple[int, int], goal: Tuple[int, int]) -> CacheKey:
+        return level_id, version, (int(start[0]), int(start[1])), (int(goal[0]), int(goal[1]))
+
+    def get(self,
+            level_id: Hashable,
+            version: int,
+            start: Tuple[int, int],
+            goal: Tuple[int, int]) -> Optional[List[Tuple[int, int]]]:
+        """
+        Looks up a path and marks it as recently used.
+
+        Args:
+            level_id: Identifies the level grid.
+            version: The grid version the path must have been planned on.
+            start: The (row, column) start cell.
+            goal: The (row, column) goal cell.
+
+        Returns:
+            Optional[List[Tuple[int, int]]]: A copy of the cached path, or None on a miss.
+        """
+        key = self.make_key(level_id, version, start, goal)
+        path = self.entries.get(key)
+        if path is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        # Callers consume their path as they move, so they get their own list
+        return list(path)
+
+    def put(self,
+            level_id: Hashable,
+            version: int,
+            start: Tuple[int, int],
+            goal: Tuple[int, int],
+            path: List[Tuple[int, int]]) -> None:
+        """
+        Stores a path, evicting the least recently used ones if the cache is full.
+
+        Args:
+            level_id: Identifies the level grid.
+            version: The grid version the path was planned on.
+            start: The (row, column) start cell.
+            goal: The (row, column) goal cell.
+            path: The planned path.
+        """
+        key = self.make_key(level_id, version, start, goal)
+        self.entries[key] = list(path)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, level_id: Hashable, current_version: Optional[int] = None) -> None:
+        """
+        Drops the paths of a level that were planned on another grid version.
+
+        Args:
+            level_id: Identifies the level grid.
+            current_version: The version to keep, None to drop every path of the level.
+        """
+        stale = [key for key in self.entries if key[0] == level_id and key[1] != current_version]
+        for key in stale:
+            del self.entries[key]
+
+    def invalidate_cells(self,
+                         level_id: Hashable,
+                         old_version: int,
+                         new_version: int,
+                         blocked: Iterable[Tuple[int, int]] = (),
+                         opened: Iterable[Tuple[int, int]] = ()) -> int:
+        """
+        Moves a level's paths from one grid version to the next after some cells changed,
+        dropping only the paths the change can affect. Paths of any other version are dropped.
+
+        A path is dropped if it passes through or next to a blocked cell, since
+        diagonal moves can't cut a blocked corner either. For an opened cell, a
+        path is only dropped if going through the cell could be shorter: the
+        diagonal distance from start to the cell and on to the goal, less two
+        diagonal moves for the corners the cell frees up, is a lower bound on
+        any new path that uses it. Empty paths are dropped whenever a cell opens,
+        the goal may have become reachable.
+
+        Args:
+            level_id: Identifies the level grid.
+            old_version: The version the cached paths were planned on.
+            new_version: The version after the change.
+            blocked: The (row, column) cells that were blocked.
+            opened: The (row, column) cells that were opened.
+
+        Returns:
+            int: Number of paths moved to the new version.
+        """
+        near_blocked = {(row + dx, column + dy) for row, column in blocked for dx in (-1, 0, 1) for dy in (-1, 0, 1)}
+        opened = list(opened)
+        kept = 0
+        for key in list(self.entries):
+            if key[0] != level_id:
+                continue
+            path = self.entries.pop(key)
+            if key[1] != old_version or any(cell in near_blocked for cell in path):
+                continue
+            if opened and not path:
+                continue
+            if opened and any(self._octile(key[2], cell) + self._octile(cell, key[3]) - 2 * DIAGONAL_COST
+                              < self._path_cost(path) for cell in opened):
+                continue
+            # Re-inserted at the back, in the same order as before
+            self.entries[(level_id, new_version, key[2], key[3])] = path
+            kept += 1
+        return kept
+
+    def invalidate_through(self, level_id: Hashable, cells: Iterable[Tuple[int, int]]) -> int:
+        """
+        Drops a level's paths that pass through any of some cells, e.g. after the danger costs of the cells changed.
+
+        Only the cost of the dropped paths changed. A kept path may no longer be
+        the cheapest, when a cell off it got cheaper, but it is still walkable.
+
+        Args:
+            level_id: Identifies the level grid.
+            cells: The (row, column) cells that changed.
+
+        Returns:
+            int: Number of paths dropped.
+        """
+        cells = cells if isinstance(cells, (set, frozenset)) else set(cells)
+        stale = [key for key, path in self.entries.items()
+                 if key[0] == level_id and any(cell in cells for cell in path)]
+        for key in stale:
+            del self.entries[key]
+        return len(stale)
+
+    @staticmethod
+    def _octile(a: Tuple[int, int], b: Tuple[int, int]) -> float:
+        dx, dy = abs(a[0] - b[0]), abs(a[1] - b[1])
+        return ORTHOGONAL_COST * (dx + dy) + (DIAGONAL_COST - 2 * ORTHOGONAL_COST) * min(dx, dy)
+
+    @staticmethod
+    def _path_cost(path: List[Tuple[int, int]]) -> float:
+        return sum(DIAGONAL_COST if a[0] != b[0] and a[1] != b[1] else ORTHOGONAL_COST
+                   for a, b in zip(path, path[1:]))
+
+    def clear(self) -> None:
+        """
+        Drops every path and resets the counters.
+        """
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
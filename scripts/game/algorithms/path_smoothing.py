@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import math
+from typing import List, Tuple
+
+from scripts.game.algorithms.grid_search import GridSearch, get_grid_search
+
+
+def has_line_of_sight(search: GridSearch, start: Tuple[int, int], end: Tuple[int, int]) -> bool:
+    """
+    Checks whether a tile-sized body can move in a straight line from one cell to another
+    without overlapping a wall.
+
+    The body is the enemy's rect, one tile square with its top-left corner on
+    the cell, so the test is a thick ray: the line is sampled once per tile
+    along its longer axis and every cell touched by the box around the body at
+    two neighbouring samples must be open. That also forbids squeezing past
+    the corner of a wall, the same rule get_neighbours uses for diagonal moves.
+
+    Args:
+        search: The GridSearch engine of the level grid.
+        start: The (row, column) cell the body starts on.
+        end: The (row, column) cell the body ends on.
+
+    Returns:
+        bool: True if the straight move is clear.
+    """
+    walkable, width = search.walkable, search.width
+    if not (search.in_bounds(start) and search.in_bounds(end)):
+        return False
+    start_x, start_y = start
+    dx, dy = end[0] - start_x, end[1] - start_y
+    steps = max(abs(dx), abs(dy), 1)
+    last_x, last_y = float(start_x), float(start_y)
+    for step in range(1, steps + 1):
+        x = start_x + dx * step / steps
+        y = start_y + dy * step / steps
+        # Cells overlapped by the body anywhere between the last sample and this one
+        # (coordinates are never negative, so int() rounds down)
+        first_column, end_column = int(min(y, last_y)), math.ceil(max(y, last_y)) + 1
+        for row in range(int(min(x, last_x)), math.ceil(max(x, last_x)) + 1):
+            row_start = row * width
+            if not all(walkable[row_start + first_column:row_start + end_column]):
+                return False
+        last_x, last_y = x, y
+    return True
+
+
+def smooth_path(maze: List[List[int]], path: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """
+    Removes the waypoints of a path that can be skipped by flying straight (string pulling).
+
+    Starting from the first cell, the path is followed for as long as the
+    current waypoint can still see the next cell; the last cell it could see
+    becomes the next waypoint.
+
+    Args:
+        maze: The level grid represented as a 2D list of integers.
+        path: A path of neighbouring cells, as returned by a_star.
+
+    Returns:
+        List[Tuple[int, int]]: The waypoints, starting and ending with the same cells as path.
+    """
+    if len(path) <= 2:
+        return list(path)
+    search = get_grid_search(maze)
+    waypoints = [path[0]]
+    for index in range(2, len(path)):
+        if not has_line_of_sight(search, waypoints[-1], path[index]):
+            waypoints.append(path[index - 1])
+    waypoints.append(path[-1])
+    return waypoints
@@ -1,65 +1,35 @@
 from __future__ import annotations
 
-import heapq  # For priority queue
-from concurrent.futures import ThreadPoolExecutor
-from typing import Optional, Tuple, List
-
-
-class Node:
-    def __init__(self,
-                 position: Tuple[int, int],
-                 parent: Optional[Node] = None) -> None:
-        """
-        Args:
-            position:
-                A tuple representing the (x, y) position of the node.
-            parent:
-                The parent node of this node. Used for pathfinding to trace the route back to the start.
-        """
-        self.position = position  # (x, y)
-        self.parent = parent  # The parent node
-        self.g = 0  # Cost from start to this node
-        self.h = 0  # Heuristic cost from this node to end
-        self.f = 0  # Total cost
-
-    def __eq__(self, other: Node) -> bool:
-        """
-        Args:
-            other: The object to compare with.
-
-        Returns:
-            bool: True if both objects have the same position, else False.
-        """
-        return self.position == other.position
-
-    def __lt__(self, other: Node) -> bool:
-        """
-        Args:
-            other: An object to be compared with the current instance.
-
-        Returns:
-            bool: True if the 'f' attribute of the current instance
-                  is less than the 'f' attribute of the 'other' object,
-                  else False.
-        """
-        return self.f < other.f
-
-    def __hash__(self) -> int:
-        """
-        Generates a hash value for the node's position attribute.
-
-        Returns:
-            int: The hash value computed from the position attribute of the node.
-        """
-        return hash(self.position)
-
-
-def heuristic(a: Tuple[int, int], b: Tuple[int, int], enemy_positions_list) -> float:
+import heapq
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Hashable, Optional, Tuple, List
+
+from scripts.game.algorithms.distance_oracle import get_distance_oracle
+from scripts.game.algorithms.grid_search import get_grid_search
+from scripts.game.algorithms.hierarchical import get_hierarchical_grid
+from scripts.game.algorithms.influence_map import InfluenceMap
+from scripts.game.algorithms.jump_point_search import get_jump_point_search
+from scripts.game.algorithms.landmarks import get_landmark_heuristic
+from scripts.game.algorithms.navmesh import get_navmesh
+from scripts.game.algorithms.path_cache import PathCache
+
+# Heuristic weight of a search that is about to run out of time, paths cost at most this much more
+MAX_SEARCH_WEIGHT = 2.0
+# Searches with at least this much time left before their deadline run unweighted
+RELAXED_BUDGET_MS = 4.0
+# Number of recent queries kept by the metrics
+METRICS_WINDOW = 256
+
+
+def heuristic(a: Tuple[int, int], b: Tuple[int, int]) -> float:
     """
     Calculates the heuristic value using the Diagonal Distance formula.
 
+    Enemy avoidance is not part of the heuristic, it is an edge cost read from
+    the level's InfluenceMap, so the estimate never overestimates.
+
     Args:
-        enemy_positions_list: A list of the enemies positions.
         a: Tuple[int, int] representing the coordinates of the first point.
         b: Tuple[int, int] representing the coordinates of the second point.
 
@@ -73,293 +43,617 @@ def heuristic(a: Tuple[int, int], b: Tuple[int, int], enemy_positions_list) -> f
     D_diagonal = 1.414  # Cost for diagonal movement
 
     # Diagonal distance heuristic
-    base_cost = D_orthogonal * (dx + dy) + (D_diagonal - 2 * D_orthogonal) * min(dx, dy)
+    return D_orthogonal * (dx + dy) + (D_diagonal - 2 * D_orthogonal) * min(dx, dy)
 
-    # Additional cost for enemy avoidance
-    enemy_avoidance_cost = 0
-    danger_radius = 10
-    for enemy_pos in enemy_positions_list:
-        # Calculate the Manhattan distance to the enemy's position
-        dist_to_enemy = abs(a[0] - enemy_pos[0]) + abs(a[1] - enemy_pos[1])
 
-        # If the tile is within the danger zone, add a penalty
-        if dist_to_enemy <= danger_radius:
-            enemy_avoidance_cost += danger_radius - dist_to_enemy  # The closer, the higher the penalty
+def deadline_weight(deadline: Optional[float]) -> float:
+    """
+    Picks the heuristic weight of a search from the time left before its deadline.
 
-    # Diagonal distance heuristic
-    return base_cost + enemy_avoidance_cost
+    Searches with RELAXED_BUDGET_MS or more to spare find the shortest path,
+    below that the weight rises linearly to MAX_SEARCH_WEIGHT, trading path
+    length for fewer expanded nodes.
+
+    Args:
+        deadline: The time.perf_counter() value the search must finish by, None for no deadline.
+
+    Returns:
+        float: The weight to pass to GridSearch.find_path.
+    """
+    if deadline is None:
+        return 1.0
+    remaining_ms = (deadline - time.perf_counter()) * 1000
+    if remaining_ms >= RELAXED_BUDGET_MS:
+        return 1.0
+    if remaining_ms <= 0:
+        return MAX_SEARCH_WEIGHT
+    return 1.0 + (MAX_SEARCH_WEIGHT - 1.0) * (1.0 - remaining_ms / RELAXED_BUDGET_MS)
 
 
-def calculate_costs(neighbour_node: Node,
-                    open_set: List,
-                    potential_g: int,
-                    end_node: Node, enemy_positions_list) -> None:
+def split_deadline(deadline: Optional[float], share: int, remaining: int) -> Optional[float]:
     """
-    Calculates the costs for the neighbour node.
+    Gives some of the queries left before a shared deadline their part of the time.
+
+    The time left is split evenly over the queries still to run, so one slow
+    search can't use up the budget of the ones after it, and time a query
+    doesn't use goes to the queries after it.
 
     Args:
-        enemy_positions_list: A list of the enemies positions.
-        neighbour_node (Node): The neighboring node being evaluated.
-        open_set (list[Node]): The list of nodes pending evaluation.
-        potential_g (float): The potential 'g' value (cost from the start node).
-        end_node (Node): The target node for the pathfinding algorithm
-    """
-
-    # Check if the neighbor node is not already in the open set
-    # or if a shorter path to it has been found
-    if neighbour_node not in open_set or potential_g < neighbour_node.g:
-        # Updates the 'g' value (cost from start to the current node)
-        neighbour_node.g = potential_g
-        # Calculate the heuristic cost (estimated cost to the end node)
-        neighbour_node.h = heuristic(neighbour_node.position, end_node.position, enemy_positions_list)
-        # Calculate the total cost 'f' (sum of 'g' and 'h')
-        neighbour_node.f = neighbour_node.g + neighbour_node.h
-        # If the neighbor node is not in the open set, add it to the priority queue
-        if neighbour_node not in open_set:
-            heapq.heappush(open_set, neighbour_node)
+        deadline: The time.perf_counter() value all the queries must finish by, None for no deadline.
+        share: Number of the queries to get a deadline for.
+        remaining: Number of queries still to run, including those.
+
+    Returns:
+        Optional[float]: The deadline of those queries, None when there is no deadline.
+    """
+    if deadline is None or share >= remaining:
+        return deadline
+    now = time.perf_counter()
+    return now + max(deadline - now, 0.0) * share / remaining
 
 
 def a_star(maze:  List[List[int]],
            start: Tuple[int, int],
-           end:   Tuple[int, int], temp_list) -> List[Tuple[int, int]]:
+           end:   Tuple[int, int],
+           influence_map: Optional[InfluenceMap] = None,
+           deadline: Optional[float] = None) -> List[Tuple[int, int]]:
 
     """
     Runs the A* search algorithm to find a path from start to end in a maze.
 
+    The search itself is done by the level's GridSearch engine, which reuses
+    its arrays between queries. With a deadline the search is weighted by
+    deadline_weight and stops when the deadline passes.
+
     Args:
         maze : The maze represented as a 2D list of integers.
         start : The starting coordinates (x, y).
         end : The ending coordinates (x, y).
+        influence_map : Optional enemy danger map, its cost is added to every move into a cell.
+        deadline : Optional time.perf_counter() value the search must finish by.
 
     Returns:
         return: List[Tuple[int, int]]
-            The resulting path from start to end.
+            The resulting path from start to end. A search cut off by the deadline returns
+            the path toward the cell closest to end it reached, see is_partial_path.
 
     """
+    cost_field = influence_map.cost if influence_map is not None else None
+    return get_grid_search(maze).find_path(start, end, cost_field=cost_field,
+                                           weight=deadline_weight(deadline), deadline=deadline)
 
-    # The starting position node (where the A* search algorithm starts)
-    start_node = Node(start)
-    # The ending position node (where the A* search algorithm ends)
-    end_node = Node(end)
-    # The open set of nodes to be evaluated
-    open_set = []
-    # The closed set of nodes that have been evaluated
-    closed_set = set()
 
-    # Push the start node to the open set
-    heapq.heappush(open_set, start_node)
+def is_partial_path(path: List[Tuple[int, int]], end: Tuple[int, int]) -> bool:
+    """
+    Returns whether a path was cut off by a deadline before reaching end. Such paths shouldn't be cached.
+    """
+    return bool(path) and tuple(path[-1]) != (int(end[0]), int(end[1]))
 
-    while open_set:
-        # Gets the current node
-        current_node = heapq.heappop(open_set)
-        # Adds the current node to the closed set
-        closed_set.add(current_node)
 
-        # Checks whether the current node is the end node
-        if current_node == end_node:
-            # Returns the path - a list of x and y coordinates
-            return reconstruct_path(current_node)
+def landmark_a_star(maze: List[List[int]],
+                    start: Tuple[int, int],
+                    end: Tuple[int, int],
+                    influence_map: Optional[InfluenceMap] = None) -> List[Tuple[int, int]]:
+    """
+    Runs A* with the level's landmark (ALT) heuristic instead of the diagonal distance.
 
-        # A list of neighbour node x and y coordinates
-        neighbours = get_neighbours(current_node.position, maze)
+    Landmark costs follow the walls, so the estimate stays close to the real
+    cost around long platforms and fewer dead-end cells are expanded. It
+    is still a lower bound, so the path is as short as the one a_star finds.
 
-        # Loops through the x and y coordinates in neighbours
-        for position in neighbours:
-            # Creates a Node for the neighbours position
-            neighbour_node = Node(position, current_node)
+    Args:
+        maze : The maze represented as a 2D list of integers.
+        start : The starting coordinates (x, y).
+        end : The ending coordinates (x, y).
+        influence_map : Optional enemy danger map, its cost is added to every move into a cell.
 
-            # If the neighbour node has already been visited
-            if neighbour_node in closed_set:
-                # Skip this node and continue with the next iteration
-                continue
+    Returns:
+        return: List[Tuple[int, int]]
+            The resulting path from start to end.
+    """
+    search = get_grid_search(maze)
+    if not search.in_bounds(end):
+        return []
+    cost_field = influence_map.cost if influence_map is not None else None
+    return search.find_path(start, end, cost_field=cost_field,
+                            heuristic_table=get_landmark_heuristic(maze).bound_to(end))
 
-            # Calculate costs
-            potential_g = current_node.g + 1  # Assuming uniform cost for movement
-            calculate_costs(neighbour_node, open_set, potential_g, end_node, temp_list)
 
-    return []  # Return empty if no path is found
+def jump_point_search(maze: List[List[int]],
+                      start: Tuple[int, int],
+                      end: Tuple[int, int],
+                      influence_map: Optional[InfluenceMap] = None) -> List[Tuple[int, int]]:
+    """
+    Runs Jump Point Search to find a path from start to end in a maze.
 
-def get_neighbours(position, maze):
-    # Empty neighbours list
-    neighbours = []
-    # Current x and y position in the maze
-    x, y = position
+    Takes the same arguments and returns the same path format as a_star, so
+    the two can be swapped per level. JPS needs uniform move costs, so the
+    influence map is ignored.
 
-    # Directions: right, left, down, up
-    directions = [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (-1, -1), (-1, 1), (1, -1)]
+    Args:
+        maze : The maze represented as a 2D list of integers.
+        start : The starting coordinates (x, y).
+        end : The ending coordinates (x, y).
+        influence_map : Accepted for compatibility with a_star, not used.
 
-    # loops through the change in x and y directions
-    for dx, dy in directions:
-        # neighbour nodes x and y position
-        nx, ny = x + dx, y + dy
-        # Check if the new position is within the bounds of the maze and not a wall
-        if 0 <= nx < len(maze) and 0 <= ny < len(maze[0]) and maze[nx][ny] != 1:
-            # If the direction is diagonal
-            if (dx, dy) in [(1, 1), (1, -1), (-1, 1), (-1, -1)]:
-                adj_cells = [(x + dx, y), (x, y + dy)]
-                # Checks whether there is a corner of a wall between the diagonal path
-                if any(0 <= adj_x < len(maze) and 0 <= adj_y < len(maze[0]) and maze[adj_x][adj_y] == 1 for adj_x, adj_y
-                       in adj_cells):
-                    # Don't add this node
-                    continue
-            # Add the neighbour node to the list of nodes
-            neighbours.append((nx, ny))
+    Returns:
+        return: List[Tuple[int, int]]
+            The resulting path from start to end.
+    """
+    return get_jump_point_search(maze).find_path(start, end)
 
-    # Return the neighbour nodes
-    return neighbours
 
+def hierarchical_search(maze: List[List[int]],
+                        start: Tuple[int, int],
+                        end: Tuple[int, int],
+                        influence_map: Optional[InfluenceMap] = None) -> List[Tuple[int, int]]:
+    """
+    Runs HPA* to find a path from start to end in a maze.
 
-def reconstruct_path(node):
-    # Empty path list
-    path = []
-    while node is not None:
-        # Adds the nodes position to the path
-        path.append(node.position)
-        # Gets the parent node (next node in path)
-        node = node.parent
-    # Return reversed path
-    return path[::-1]
+    Searches the level's cluster abstraction first and then joins the
+    precomputed paths inside each cluster. The path can be slightly longer
+    than the one a_star finds, and the influence map is ignored.
+
+    Args:
+        maze : The maze represented as a 2D list of integers.
+        start : The starting coordinates (x, y).
+        end : The ending coordinates (x, y).
+        influence_map : Accepted for compatibility with a_star, not used.
+
+    Returns:
+        return: List[Tuple[int, int]]
+            The resulting path from start to end.
+    """
+    return get_hierarchical_grid(maze).find_path(start, end)
 
 
-def adjust_path(maze, current_path: List[Tuple[int, int]], start: Tuple[int, int], end: Tuple[int, int]) -> List[
-    Tuple[int, int]]:
+def navmesh_search(maze: List[List[int]],
+                   start: Tuple[int, int],
+                   end: Tuple[int, int],
+                   influence_map: Optional[InfluenceMap] = None) -> List[Tuple[int, int]]:
     """
-    Adjusts the path based on the current path and new obstacles.
+    Searches the level's rectangle navigation mesh to find a path from start to end in a maze.
+
+    Only the open rectangles are searched, and the portal waypoints are then
+    filled in cell by cell. The path can be slightly longer than the one
+    a_star finds, and the influence map is ignored.
 
     Args:
-        maze : The maze represented as a 2D list.
-        current_path : The previous path that needs adjustment.
+        maze : The maze represented as a 2D list of integers.
         start : The starting coordinates (x, y).
         end : The ending coordinates (x, y).
+        influence_map : Accepted for compatibility with a_star, not used.
 
     Returns:
-        A new path list with adjusted or updated segments.
+        return: List[Tuple[int, int]]
+            The resulting path from start to end.
     """
-    # Check if the last path segment is still valid
-    last_valid_node = current_path[-1]  # Check from the last valid node
-    # If the end is blocked, replan from the last valid node
-    if maze[last_valid_node[0]][last_valid_node[1]] == 1:  # Wall check
-        new_path = a_star(maze, last_valid_node, end)
-        return current_path[:-1] + new_path  # Combine old valid path with new segment
+    return get_navmesh(maze).find_path(start, end)
 
-    # Check if start position has changed
-    if start != current_path[0]:
-        new_start_path = a_star(maze, start, current_path[0])
-        # Combine the new start path with the rest of the current path
-        return new_start_path + current_path[len(new_start_path):]
 
-    return current_path  # If no change, return the original path
+def distance_oracle_search(maze: List[List[int]],
+                           start: Tuple[int, int],
+                           end: Tuple[int, int],
+                           influence_map: Optional[InfluenceMap] = None) -> List[Tuple[int, int]]:
+    """
+    Reads the path from start to end out of the level's precomputed distance table.
 
+    The walk is one table lookup per cell of the path. If no valid table was
+    loaded for the grid, it falls back to a_star. The table holds plain move
+    costs, so the influence map is only used by the fallback.
 
-def run_a_star_thread(maze: List[List[int]],
-                      start: Tuple[int, int],
-                      end: Tuple[int, int]) -> List[Tuple[int, int]]:
+    Args:
+        maze : The maze represented as a 2D list of integers.
+        start : The starting coordinates (x, y).
+        end : The ending coordinates (x, y).
+        influence_map : Passed on to a_star when there is no table.
+
+    Returns:
+        return: List[Tuple[int, int]]
+            The resulting path from start to end.
+    """
+    oracle = get_distance_oracle(maze)
+    if oracle is None:
+        return a_star(maze, start, end, influence_map)
+    return oracle.find_path(start, end)
+
+
+class PathMetrics:
+    """
+    Ring buffers of the most recent path queries, to see which searches make a frame spike.
+
+    Each query records the nodes it expanded, the peak size of its open list,
+    its wall time, whether it was answered without a search (from the path
+    cache or a duplicate start) and the enemy it was for. Only the last
+    METRICS_WINDOW queries are kept, so the numbers follow what is happening now.
+
+    Attributes:
+        queries (int): Number of queries recorded since the last clear, including the ones dropped from the window.
+    """
+
+    def __init__(self, window: int = METRICS_WINDOW) -> None:
+        """
+        Args:
+            window: Number of recent queries to keep.
+        """
+        self.expanded: Deque[int] = deque(maxlen=window)
+        self.open_peak: Deque[int] = deque(maxlen=window)
+        self.time_ms: Deque[float] = deque(maxlen=window)
+        self.cache_hit: Deque[bool] = deque(maxlen=window)
+        self.enemy_id: Deque[Optional[int]] = deque(maxlen=window)
+        self.queries = 0
+
+    def __len__(self) -> int:
+        return len(self.time_ms)
+
+    def clear(self) -> None:
+        for buffer in (self.expanded, self.open_peak, self.time_ms, self.cache_hit, self.enemy_id):
+            buffer.clear()
+        self.queries = 0
+
+    def record(self,
+               enemy_id: Optional[int],
+               expanded: int,
+               open_peak: int,
+               time_ms: float,
+               cache_hit: bool = False) -> None:
+        """
+        Adds a query, dropping the oldest one once the window is full.
+
+        Args:
+            enemy_id: id() of the enemy the path was for, None if unknown.
+            expanded: Nodes expanded by the search, 0 for a cache hit.
+            open_peak: Largest size of the search's open list, 0 for a cache hit.
+            time_ms: Wall time of the query in milliseconds.
+            cache_hit: Whether the path came from the cache without a search.
+        """
+        self.expanded.append(expanded)
+        self.open_peak.append(open_peak)
+        self.time_ms.append(time_ms)
+        self.cache_hit.append(cache_hit)
+        self.enemy_id.append(enemy_id)
+        self.queries += 1
+
+    def percentile(self, name: str, fraction: float) -> float:
+        """
+        Args:
+            name: The buffer to read, "expanded", "open_peak" or "time_ms".
+            fraction: The percentile as a fraction, e.g. 0.95.
+
+        Returns:
+            float: The nearest-rank percentile of the recent queries, 0 if none were recorded.
+        """
+        values = sorted(getattr(self, name))
+        if not values:
+            return 0.0
+        return values[min(len(values) - 1, int(len(values) * fraction))]
+
+    def enemy_costs(self) -> Dict[Optional[int], float]:
+        """
+        Returns:
+            Dict[Optional[int], float]: Total query time in milliseconds of each enemy id over the window.
+        """
+        costs: Dict[Optional[int], float] = {}
+        for enemy_id, time_ms in zip(self.enemy_id, self.time_ms):
+            costs[enemy_id] = costs.get(enemy_id, 0.0) + time_ms
+        return costs
+
+    def summary(self) -> Dict[str, float]:
+        """
+        Returns:
+            Dict[str, float]: The p50 and p95 of the query time ("time_p50", "time_p95"), the expanded nodes
+            ("expanded_p50", "expanded_p95"), the p95 open list size ("open_peak_p95") and the cache "hit_rate".
+        """
+        return {
+            "time_p50": self.percentile("time_ms", 0.5),
+            "time_p95": self.percentile("time_ms", 0.95),
+            "expanded_p50": self.percentile("expanded", 0.5),
+            "expanded_p95": self.percentile("expanded", 0.95),
+            "open_peak_p95": self.percentile("open_peak", 0.95),
+            "hit_rate": sum(self.cache_hit) / len(self.cache_hit) if self.cache_hit else 0.0,
+        }
+
+
+# Recent queries of every planner that runs in the game loop
+path_metrics = PathMetrics()
+
+
+class PathContext:
+    """
+    What a batch of path queries on one level shares: the planner, the enemy
+    danger costs and the path cache.
+
+    Attributes:
+        planner (Callable): The level's planner function, called as planner(maze, start, end, influence_map).
+        influence_map (Optional[InfluenceMap]): Enemy danger costs added to every move, None for none.
+        path_cache (Optional[PathCache]): Where finished paths are looked up and stored, None to skip caching.
+        level_id (Hashable): Identifies the level in the cache.
+        grid_version (int): The level grid's version, paths from other versions aren't reused.
+    """
+
+    def __init__(self,
+                 planner: Optional[Callable[..., List[Tuple[int, int]]]] = None,
+                 influence_map: Optional[InfluenceMap] = None,
+                 path_cache: Optional[PathCache] = None,
+                 level_id: Hashable = None,
+                 grid_version: int = 0) -> None:
+        self.planner = planner if planner is not None else a_star
+        self.influence_map = influence_map
+        self.path_cache = path_cache
+        self.level_id = level_id
+        self.grid_version = grid_version
+
+
+def plan_paths(maze: List[List[int]],
+               starts: List[Tuple[int, int]],
+               goal: Tuple[int, int],
+               context: Optional[PathContext] = None,
+               deadline: Optional[float] = None,
+               owners: Optional[List[Hashable]] = None) -> Tuple[List[List[Tuple[int, int]]], List[Dict[str, Any]]]:
+    """
+    Plans the paths of several enemies toward the same goal in one call.
+
+    Identical start cells are planned once and cached paths are reused. With
+    the a_star planner the remaining starts share one precomputed heuristic
+    table toward the goal and the same cost field, so that setup is done once
+    per batch instead of once per enemy. The time left before the deadline is
+    split evenly over the a_star queries still to run, see split_deadline.
+    Every query is recorded in path_metrics.
+
+    Args:
+        maze : The maze represented as a 2D list of integers.
+        starts : The starting coordinates (x, y) of each query.
+        goal : The shared ending coordinates (x, y).
+        context : The planner, influence map and cache to use, plain a_star if None.
+        deadline : Optional time.perf_counter() value the a_star queries must finish by.
+        owners : Optional enemy of each query, in the same order as starts, recorded in the metrics.
 
+    Returns:
+        The path of each query in the same order as starts, each in the same format as a_star,
+        and the stats of each query: "cached", "duplicate", "shared" (heuristic table) and "partial"
+        (cut off by the deadline) flags, the nodes "expanded" and "open_peak" (None when the planner
+        doesn't report them), the wall "time_ms" and the path "length".
+    """
+    context = context if context is not None else PathContext()
+    goal = (int(goal[0]), int(goal[1]))
+    starts = [(int(start[0]), int(start[1])) for start in starts]
+    search = get_grid_search(maze)
+    cache = context.path_cache
+    cost_field = context.influence_map.cost if context.influence_map is not None else None
+
+    paths: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+    stats: Dict[Tuple[int, int], Dict[str, Any]] = {}
+    pending = []
+    for start in dict.fromkeys(starts):
+        started = time.perf_counter()
+        cached = cache.get(context.level_id, context.grid_version, start, goal) if cache is not None else None
+        if cached is not None:
+            paths[start] = cached
+            stats[start] = {"cached": True, "shared": False, "expanded": 0, "open_peak": 0,
+                            "time_ms": (time.perf_counter() - started) * 1000}
+        else:
+            pending.append(start)
+
+    # With a_star every query runs on the level's engine with one heuristic table toward the goal
+    use_table = context.planner is a_star and len(pending) > 1 and search.in_bounds(goal)
+    table = search.heuristic_table(goal) if use_table else None
+    for index, start in enumerate(pending):
+        started = time.perf_counter()
+        query_deadline = split_deadline(deadline, 1, len(pending) - index)
+        if table is not None:
+            paths[start] = search.find_path(start, goal, cost_field=cost_field, heuristic_table=table,
+                                            weight=deadline_weight(query_deadline), deadline=query_deadline)
+        elif context.planner is a_star:
+            paths[start] = a_star(maze, start, goal, context.influence_map, query_deadline)
+        else:
+            paths[start] = context.planner(maze, start, goal, context.influence_map)
+        time_ms = (time.perf_counter() - started) * 1000
+        expanded = search.expanded if context.planner is a_star else None
+        open_peak = search.open_peak if context.planner is a_star else None
+        stats[start] = {"cached": False, "shared": table is not None, "expanded": expanded,
+                        "open_peak": open_peak, "time_ms": time_ms}
+    if cache is not None:
+        for start in pending:
+            # Partial paths only lead part of the way, the next query plans the rest
+            if not is_partial_path(paths[start], goal):
+                cache.put(context.level_id, context.grid_version, start, goal, paths[start])
+
+    results, query_stats = [], []
+    planned = set()
+    for index, start in enumerate(starts):
+        # Every query gets its own list, enemies consume their path as they move
+        results.append(list(paths[start]))
+        query = dict(stats[start], duplicate=start in planned, length=len(paths[start]),
+                     partial=is_partial_path(paths[start], goal))
+        query_stats.append(query)
+        planned.add(start)
+        # A duplicate start reuses the first query's path, so it counts as a hit
+        searched = not (query["cached"] or query["duplicate"])
+        path_metrics.record(id(owners[index]) if owners is not None else None,
+                            (query["expanded"] or 0) if searched else 0,
+                            (query["open_peak"] or 0) if searched else 0,
+                            query["time_ms"] if searched else 0.0,
+                            cache_hit=not searched)
+    return results, query_stats
+
+
+# Node expansions of the last bidirectional_a_star call, per direction
+bidirectional_counters: Dict[str, int] = {"forward": 0, "backward": 0, "total": 0}
+
+
+def bidirectional_a_star(maze: List[List[int]],
+                         start: Tuple[int, int],
+                         end: Tuple[int, int],
+                         influence_map: Optional[InfluenceMap] = None) -> List[Tuple[int, int]]:
     """
-    Runs the A* algorithm to find a path from start to end in a maze.
+    Runs A* from the start and the end at the same time until the two searches meet.
+
+    Each step expands the side whose best open node has the lower f-score.
+    Whenever a search reaches a node the other one has already reached, the
+    joined path becomes a candidate. The search stops once either side's best
+    f-score is no lower than the cheapest candidate, since with a consistent
+    heuristic no unexplored path through that side can be cheaper.
+
+    Takes the same arguments and returns the same path as a_star. The number
+    of expanded nodes is left in bidirectional_counters.
 
     Args:
         maze : The maze represented as a 2D list of integers.
         start : The starting coordinates (x, y).
         end : The ending coordinates (x, y).
+        influence_map : Optional enemy danger map, its cost is added to every move into a cell.
 
     Returns:
         return: List[Tuple[int, int]]
             The resulting path from start to end.
+    """
+    bidirectional_counters.update(forward=0, backward=0, total=0)
+    search = get_grid_search(maze)
+    if not (search.in_bounds(start) and search.in_bounds(end)):
+        return []
+    start_cell = search.cell_id(start)
+    end_cell = search.cell_id(end)
+    if start_cell == end_cell:
+        return [(start[0], start[1])]
+    if not search.walkable[end_cell]:
+        return []
+
+    cost_field = influence_map.cost if influence_map is not None else None
+    neighbours = search.neighbours
+    octile_distance = search.octile_distance
+    # Index 0 is the forward search from start, index 1 the backward search from end
+    g_scores: Tuple[Dict[int, float], Dict[int, float]] = ({start_cell: 0.0}, {end_cell: 0.0})
+    parents: Tuple[Dict[int, int], Dict[int, int]] = ({start_cell: -1}, {end_cell: -1})
+    closed = (set(), set())
+    open_lists = ([(octile_distance(start_cell, end_cell), start_cell)],
+                  [(octile_distance(end_cell, start_cell), end_cell)])
+    targets = (end_cell, start_cell)
+    best_cost, meeting_cell = float("inf"), -1
+
+    while open_lists[0] and open_lists[1]:
+        # Stop once either side can't lead to anything cheaper than the best joined path
+        if max(open_lists[0][0][0], open_lists[1][0][0]) >= best_cost:
+            break
+        side = 0 if open_lists[0][0][0] <= open_lists[1][0][0] else 1
+        _, current = heapq.heappop(open_lists[side])
+        if current in closed[side]:
+            continue  # Stale entry, the cell was queued again with a lower key
+        closed[side].add(current)
+        bidirectional_counters["forward" if side == 0 else "backward"] += 1
+
+        g_score, other_g_score = g_scores[side], g_scores[1 - side]
+        current_g = g_score[current]
+        # Forward moves pay for the cell they enter, backward moves for the cell they leave
+        leave_cost = cost_field[current] if cost_field is not None and side == 1 else 0.0
+        for neighbour, cost in neighbours[current]:
+            if neighbour in closed[side]:
+                continue
+            potential_g = current_g + cost + leave_cost
+            if cost_field is not None and side == 0:
+                potential_g += cost_field[neighbour]
+            if potential_g < g_score.get(neighbour, float("inf")):
+                g_score[neighbour] = potential_g
+                parents[side][neighbour] = current
+                heapq.heappush(open_lists[side], (potential_g + octile_distance(neighbour, targets[side]), neighbour))
+                if neighbour in other_g_score and potential_g + other_g_score[neighbour] < best_cost:
+                    best_cost, meeting_cell = potential_g + other_g_score[neighbour], neighbour
+
+    bidirectional_counters["total"] = bidirectional_counters["forward"] + bidirectional_counters["backward"]
+    if meeting_cell == -1:
+        return []  # Return empty if no path is found
+
+    # Join the forward half up to the meeting cell with the backward half after it
+    path = []
+    cell = meeting_cell
+    while cell != -1:
+        path.append(search.cell_position(cell))
+        cell = parents[0][cell]
+    path.reverse()
+    cell = parents[1][meeting_cell]
+    while cell != -1:
+        path.append(search.cell_position(cell))
+        cell = parents[1][cell]
+    return path
+
+
+def compare_expansions(maze: List[List[int]],
+                       queries: List[Tuple[Tuple[int, int], Tuple[int, int]]]) -> Dict[str, int]:
+    """
+    Counts the nodes a_star and bidirectional_a_star expand over the same queries.
 
+    Args:
+        maze : The maze represented as a 2D list of integers.
+        queries : The (start, end) pairs to plan.
 
+    Returns:
+        The total expansions of each search, keyed "a_star" and "bidirectional".
     """
-    return a_star(maze, start, end)
-
-
-def a_star_multithreaded(maze: List[List[int]], start, end) -> List[Tuple[int, int]]:
-    """
-
-
-    """
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        future = executor.submit(run_a_star_thread, maze, start, end)
-        return future.result()
-
-# import pytmx
-# def load_tmx_to_array(file_path):
-#     """
-#     Load a TMX file and convert the tile layers to a 2D array.
-#
-#     Args:
-#         file_path (str): Path to the TMX file.
-#
-#     Returns:
-#         list of int: 2D array representing the tile map.
-#     """
-#     tmx_data = pytmx.TiledMap(file_path)
-#
-#     # Assuming you want to convert the first tile layer to a 2D array
-#     layer = tmx_data.layers[0]
-#     if isinstance(layer, pytmx.TiledTileLayer):
-#         map_array = []
-#         for y in range(layer.height):
-#             row = []
-#             for x in range(layer.width):
-#                 gid = layer.data[y][x]  # Accessing via [y][x] to prevent index issues
-#                 # Check if there's a tile at this location
-#                 if gid != 0:
-#                     row.append(1)
-#                 else:
-#                     row.append(0)
-#             map_array.append(row)
-#         return map_array
-#     else:
-#         raise TypeError("The selected layer is not a Tile Layer")
-
-# def main():
-#     import pygame
-#     import sys
-#     screen = pygame.display.set_mode((800, 640))
-#     maze1 = [[1,1,1,1,1,1,1,1,1,1],
-#              [1,0,0,0,0,0,1,0,0,1],
-#              [1,0,0,0,0,0,1,1,0,1],
-#              [1,0,0,1,1,0,0,0,0,1],
-#              [1,1,0,0,0,0,0,1,1,1],
-#              [1,0,0,0,1,1,0,0,0,1],
-#              [1,0,0,0,1,0,0,0,0,1],
-#              [1,1,1,0,1,0,0,1,0,1],
-#              [1,0,1,0,0,0,0,1,0,1],
-#              [1,1,1,1,1,1,1,1,1,1]]
-#     maze1 = load_tmx_to_array(r"C:\Users\Daniel\My Drive\ComputerScienceCourseWork\scripts\game\levels\level1_simple.tmx")
-#     print(maze1)
-#     path1 = a_star(maze1, (1, 1), (38, 45))
-#     path2 = a_star(maze1, (2, 2), (38, 43))
-#     while True:
-#         # Handles events in the Pygame window
-#         for event in pygame.event.get():
-#             # Checks if the QUIT event is triggered
-#             if event.type == pygame.QUIT:
-#                 # Quitting Pygame
-#                 pygame.quit()
-#                 # Closing the program
-#                 sys.exit()
-#
-#         # Get the number of rows (outer list length)
-#         rows = len(maze1)
-#
-#         # Get the number of columns (inner list length, assuming all rows have the same number of columns)
-#         columns = len(maze1[0]) if rows > 0 else 0
-#         print("Rows: ", rows, "Columns: ", columns)
-#         for x, y in [(x, y) for x in range(40) for y in range(50)]:  # Draw the maze
-#             if maze1[x][y] == 1:
-#                 pygame.draw.rect(screen, (0, 0, 0), (y * 16, x * 16, 16, 16))
-#             else:
-#                 pygame.draw.rect(screen, (255, 255, 255), (y * 16, x * 16, 16, 16))
-#
-#
-#         for node in path1:
-#             pygame.draw.rect(screen, (0, 200, 0), (node[1] * 16, node[0] * 16, 16, 16))
-#         for node in path2:
-#             pygame.draw.rect(screen, (0, 200, 200), (node[1] * 16, node[0] * 16, 16, 16))
-#         # Iterate through the common elements of path1 and path2
-#         for value in [v for v in path1 if v in path2]:
-#             pygame.draw.rect(screen, (200, 200, 0), (value[1] * 16, value[0] * 16, 16, 16))
-#         pygame.display.flip()
-#
-# main()
\ No newline at end of file
+    totals = {"a_star": 0, "bidirectional": 0}
+    search = get_grid_search(maze)
+    for start, end in queries:
+        a_star(maze, start, end)
+        totals["a_star"] += search.expanded
+        bidirectional_a_star(maze, start, end)
+        totals["bidirectional"] += bidirectional_counters["total"]
+    return totals
+
+
+# Planner functions that can be selected per level in enemy_settings["pathfinding_algorithms"]
+PLANNERS: Dict[str, Callable[..., List[Tuple[int, int]]]] = {
+    "a_star": a_star,
+    "jps": jump_point_search,
+    "hpa": hierarchical_search,
+    "navmesh": navmesh_search,
+    "oracle": distance_oracle_search,
+    "bidirectional": bidirectional_a_star,
+    "alt": landmark_a_star,
+}
+
+# Planners whose paths depend on the influence map's danger costs. The oracle only does while it falls back to a_star
+COST_AWARE_PLANNERS = {"a_star", "bidirectional", "alt"}
+
+
+def get_planner(name: str) -> Callable[..., List[Tuple[int, int]]]:
+    """
+    Looks up a planner function by name.
+
+    Args:
+        name: The planner name, one of the keys of PLANNERS.
+
+    Returns:
+        The planner function, called as planner(maze, start, end, influence_map).
+    """
+    if name not in PLANNERS:
+        raise ValueError(f"Unknown pathfinding algorithm: {name}")
+    return PLANNERS[name]
+
+
+def get_neighbours(position, maze):
+    # Empty neighbours list
+    neighbours = []
+    # Current x and y position in the maze
+    x, y = position
+
+    # Directions: right, left, down, up
+    directions = [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (-1, -1), (-1, 1), (1, -1)]
+
+    # loops through the change in x and y directions
+    for dx, dy in directions:
+        # neighbour nodes x and y position
+        nx, ny = x + dx, y + dy
+        # Check if the new position is within the bounds of the maze and not a wall
+        if 0 <= nx < len(maze) and 0 <= ny < len(maze[0]) and maze[nx][ny] != 1:
+            # If the direction is diagonal
+            if (dx, dy) in [(1, 1), (1, -1), (-1, 1), (-1, -1)]:
+                adj_cells = [(x + dx, y), (x, y + dy)]
+                # Checks whether there is a corner of a wall between the diagonal path
+                if any(0 <= adj_x < len(maze) and 0 <= adj_y < len(maze[0]) and maze[adj_x][adj_y] == 1 for adj_x, adj_y
+                       in adj_cells):
+                    # Don't add this node
+                    continue
+            # Add the neighbour node to the list of nodes
+            neighbours.append((nx, ny))
+
+    # Return the neighbour nodes
+    return neighbours
+
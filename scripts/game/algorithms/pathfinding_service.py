@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+import atexit
+import logging
+from array import array
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Number of worker processes when the setting doesn't give one
+DEFAULT_WORKERS = 2
+
+# (level id, shared memory block name, rows, columns) of a published grid
+GridHandle = Tuple[Hashable, str, int, int]
+# (level id, shared memory block name, version, number of cells) of a published cost field
+CostHandle = Tuple[Hashable, str, int, int]
+
+# The grid this worker process attached for each level, as (block name, shared memory block, grid)
+_worker_grids: Dict[Hashable, Tuple[str, shared_memory.SharedMemory, List[List[int]]]] = {}
+# The newest cost field this worker process read for each level, as (version, costs)
+_worker_costs: Dict[Hashable, Tuple[int, List[float]]] = {}
+
+
+def _attach_grid(handle: GridHandle) -> List[List[int]]:
+    """
+    Returns the level grid of a shared memory block, reading it only the first time a worker sees it.
+    A newer grid of the same level replaces the old one, which is closed along with its GridSearch.
+    """
+    level_id, name, height, width = handle
+    attached = _worker_grids.get(level_id)
+    if attached is not None and attached[0] == name:
+        return attached[2]
+    block = shared_memory.SharedMemory(name=name)
+    cells = bytes(block.buf[:height * width])
+    maze = [list(cells[row * width:(row + 1) * width]) for row in range(height)]
+    if attached is not None:
+        from scripts.game.algorithms.grid_search import unload_grid_search
+        _, old_block, old_maze = attached
+        unload_grid_search(old_maze)
+        old_block.close()
+    # The handle is kept open so the block outlives a grid republished by the main process
+    _worker_grids[level_id] = (name, block, maze)
+    return maze
+
+
+def _read_costs(handle: CostHandle) -> List[float]:
+    """
+    Returns the cost field of a shared memory block, reading it only the first time a worker sees its version.
+    """
+    level_id, name, version, size = handle
+    cached = _worker_costs.get(level_id)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        costs = array("d", bytes(block.buf[:size * 8])).tolist()
+    finally:
+        block.close()
+    # A request queued before the last publish reads its own costs without replacing the newer ones
+    if cached is None or cached[0] < version:
+        _worker_costs[level_id] = (version, costs)
+    return costs
+
+
+def _find_path_worker(handle: GridHandle,
+                      start: Tuple[int, int],
+                      end: Tuple[int, int],
+                      cost_handle: Optional[CostHandle]) -> List[Tuple[int, int]]:
+    """
+    Runs a query inside a worker process. The worker keeps a GridSearch per grid between queries.
+    """
+    from scripts.game.algorithms.grid_search import get_grid_search
+    cost_field = _read_costs(cost_handle) if cost_handle is not None else None
+    return get_grid_search(_attach_grid(handle)).find_path(start, end, cost_field=cost_field)
+
+
+class PathfindingService:
+    """
+    A long-lived pool of worker processes that plans paths off the game thread.
+
+    Each level grid is written once to a shared memory block, and the enemy
+    danger costs once per PATH_FIND tick, so requests only send block names
+    and the two cells. A request returns a Future straight away; the game
+    keeps running and collects finished paths with poll().
+
+    Every owner (an enemy) has at most one request in flight. A new request
+    with a different start or goal cancels the old one, since its path would
+    already be out of date when it arrived.
+
+    A block replaced by a newer grid or cost field stays in shared memory
+    until every request sent with it has finished, so no worker is left
+    without its block.
+
+    Attributes:
+        max_workers (int): Number of worker processes.
+        grids (Dict[Hashable, GridHandle]): The published grid of each level.
+        costs (Dict[Hashable, CostHandle]): The published cost field of each level.
+        pending (Dict[Hashable, Tuple[Future, Tuple[int, int], Tuple[int, int], int]]): The
+            future, start, goal and grid version of each owner's request.
+        failures (int): Number of requests that raised in a worker, each one is logged.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_WORKERS) -> None:
+        """
+        Args:
+            max_workers: Number of worker processes.
+        """
+        self.max_workers = max_workers
+        # Workers start on the first request, not when the service is created
+        self.executor = ProcessPoolExecutor(max_workers=max_workers)
+        self.grids: Dict[Hashable, GridHandle] = {}
+        self.costs: Dict[Hashable, CostHandle] = {}
+        self.pending: Dict[Hashable, Tuple[Future, Tuple[int, int], Tuple[int, int], int]] = {}
+        self.failures = 0
+        # Every shared memory block by name, and the requests sent with each one that may still read it
+        self.blocks: Dict[str, shared_memory.SharedMemory] = {}
+        self.block_users: Dict[str, List[Future]] = {}
+        # Blocks replaced by a newer one, unlinked once their requests are done
+        self.retired: List[str] = []
+        # However the game exits, the workers are stopped and the shared grids freed
+        atexit.register(self.shutdown)
+
+    def _create_block(self, data: bytes) -> shared_memory.SharedMemory:
+        block = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+        block.buf[:len(data)] = data
+        self.blocks[block.name] = block
+        self.block_users[block.name] = []
+        return block
+
+    def _retire_block(self, name: str) -> None:
+        self.retired.append(name)
+        self._release_retired()
+
+    def _release_retired(self) -> None:
+        """
+        Frees the replaced blocks that no request can read any more.
+        """
+        for name in list(self.retired):
+            users = self.block_users[name] = [future for future in self.block_users[name] if not future.done()]
+            if users:
+                continue
+            self.retired.remove(name)
+            del self.block_users[name]
+            block = self.blocks.pop(name)
+            block.close()
+            block.unlink()
+
+    def publish_grid(self, level_id: Hashable, maze: List[List[int]]) -> None:
+        """
+        Copies a level grid into shared memory, replacing the level's previous grid.
+
+        Args:
+            level_id: Identifies the level grid.
+            maze: The level grid represented as a 2D list of integers.
+        """
+        height, width = len(maze), len(maze[0])
+        block = self._create_block(bytes(1 if cell == 1 else 0 for row in maze for cell in row))
+        old = self.grids.get(level_id)
+        self.grids[level_id] = (level_id, block.name, height, width)
+        if old is not None:
+            self._retire_block(old[1])
+
+    def publish_costs(self, level_id: Hashable, cost_field: Sequence[float]) -> None:
+        """
+        Copies a level's danger costs into shared memory, replacing the previous ones. Requests
+        made with use_costs read the newest costs published before them.
+
+        Args:
+            level_id: Identifies the level grid.
+            cost_field: The extra cost of entering each cell id, e.g. an InfluenceMap's cost grid.
+        """
+        block = self._create_block(array("d", cost_field).tobytes())
+        old = self.costs.get(level_id)
+        version = old[2] + 1 if old is not None else 0
+        self.costs[level_id] = (level_id, block.name, version, len(cost_field))
+        if old is not None:
+            self._retire_block(old[1])
+
+    def request(self,
+                owner: Hashable,
+                level_id: Hashable,
+                start: Tuple[int, int],
+                end: Tuple[int, int],
+                version: int = 0,
+                use_costs: bool = False) -> Future:
+        """
+        Queues a path query for an owner, unless the same query is already in flight.
+
+        Args:
+            owner: Who the path is for, e.g. an Enemy.
+            level_id: The level whose published grid is searched.
+            start: The starting (row, column) position.
+            end: The ending (row, column) position.
+            version: The grid version the query is made against, returned with the result.
+            use_costs: Whether to add the level's published danger costs to every move.
+
+        Returns:
+            Future: Resolves to the path, in the same format as a_star.
+        """
+        start = (int(start[0]), int(start[1]))
+        end = (int(end[0]), int(end[1]))
+        current = self.pending.get(owner)
+        if current is not None:
+            future, current_start, current_end, current_version = current
+            if (current_start, current_end, current_version) == (start, end, version):
+                return future
+            # The player or enemy moved on, the old result is no longer wanted
+            future.cancel()
+        grid = self.grids[level_id]
+        costs = self.costs.get(level_id) if use_costs else None
+        future = self.executor.submit(_find_path_worker, grid, start, end, costs)
+        self.block_users[grid[1]].append(future)
+        if costs is not None:
+            self.block_users[costs[1]].append(future)
+        self.pending[owner] = (future, start, end, version)
+        return future
+
+    def cancel(self, owner: Hashable) -> None:
+        current = self.pending.pop(owner, None)
+        if current is not None:
+            current[0].cancel()
+
+    def cancel_all(self) -> None:
+        for owner in list(self.pending):
+            self.cancel(owner)
+
+    def poll(self) -> List[Tuple[Hashable, Tuple[int, int], Tuple[int, int], int, List[Tuple[int, int]]]]:
+        """
+        Collects the requests that have finished since the last call, without blocking.
+        A request that raised in its worker is logged and left out.
+
+        Returns:
+            The owner, start, goal, grid version and path of every finished request.
+        """
+        finished = []
+        for owner, (future, start, end, version) in list(self.pending.items()):
+            if not future.done():
+                continue
+            del self.pending[owner]
+            if future.cancelled():
+                continue
+            error = future.exception()
+            if error is not None:
+                self.failures += 1
+                logger.warning("Path query %s -> %s failed in a worker process", start, end, exc_info=error)
+                continue
+            finished.append((owner, start, end, version, future.result()))
+        self._release_retired()
+        return finished
+
+    def shutdown(self) -> None:
+        """
+        Stops the workers and frees the shared memory of every level. Runs at exit, calling it earlier is safe.
+        """
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.pending.clear()
+        for block in self.blocks.values():
+            block.close()
+            block.unlink()
+        self.blocks.clear()
+        self.block_users.clear()
+        self.retired.clear()
+        self.grids.clear()
+        self.costs.clear()
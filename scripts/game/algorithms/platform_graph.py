@@ -0,0 +1,394 @@
+from __future__ import annotations
+
+import heapq
+import math
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+# Tile size in pixels at the 1920x1080 reference resolution the movement settings are tuned for
+TILE_PIXELS = 30
+# Used by the player when the settings don't set them
+DEFAULT_MOVEMENT = {"walk_speed": 4, "gravity_speed": 0.6, "terminal_velocity": 15, "jump_speed": 10,
+                    "climb_speed": 3}
+# Horizontal speeds tried for every jump and fall, as fractions of the walk speed
+ARC_SPEED_FRACTIONS = (0.0, 0.5, 1.0)
+# Arcs still in the air after this many frames are dropped
+MAX_ARC_FRAMES = 240
+# Float slack when working out which cells a body overlaps
+EPSILON = 1e-6
+
+Cell = Tuple[int, int]
+# (target cell id, cost in frames, kind, horizontal speed in tiles per frame)
+Link = Tuple[int, float, str, float]
+# (cell reached, kind of link taken to reach it, horizontal speed in tiles per frame)
+Step = Tuple[Cell, str, float]
+
+
+@dataclass(frozen=True)
+class Movement:
+    """
+    The player's movement constants in tiles and frames, the units the graph is built in.
+    """
+    walk_speed: float
+    gravity_speed: float
+    terminal_velocity: float
+    jump_speed: float
+    climb_speed: float
+
+    @classmethod
+    def from_settings(cls, movement_settings: dict) -> Movement:
+        """
+        Args:
+            movement_settings: The player's "movement" settings, in pixels per frame at the reference resolution.
+
+        Returns:
+            Movement: The same constants in tiles per frame.
+        """
+        return cls(*(movement_settings.get(name, default) / TILE_PIXELS for name, default in DEFAULT_MOVEMENT.items()))
+
+
+class PlatformGraph:
+    """
+    Where a ground-walking body can stand, and the walk, fall, jump and climb links between those places.
+
+    Nodes are the cells the body's bottom can be on: standing cells (open for
+    the body with a solid tile below), ladder cells and the spots beside
+    wall-jump tiles where a jump ends against the wall. Runs of neighbouring
+    standing cells on a row are the level's platform segments.
+
+    Jumps and falls are simulated once when the graph is built, frame by
+    frame with the player's gravity, jump and walk speeds, for a few
+    horizontal speeds in each direction. A query then only searches the
+    links, costed in frames, so nothing is simulated while playing.
+
+    Attributes:
+        width (int): Number of columns.
+        height (int): Number of rows.
+        body_height (int): Height of the body in tiles, it is one tile wide.
+        movement (Movement): The movement constants the links were simulated with.
+        segments (List[Tuple[int, int, int]]): The (row, first column, last column) of each platform segment.
+        segment_of (Dict[int, int]): The segment of each standing cell id.
+        links (Dict[int, List[Link]]): The links leaving each node's cell id.
+        expanded (int): Number of nodes expanded by the last query.
+    """
+
+    def __init__(self,
+                 solid: List[List[int]],
+                 ladders: List[List[int]],
+                 wall_jump: List[List[int]],
+                 movement: Movement,
+                 body_height: int = 1) -> None:
+        """
+        Args:
+            solid: The grid of tiles the body collides with (1) or not (0), wall-jump tiles included.
+            ladders: The grid of ladder tiles.
+            wall_jump: The grid of wall-jump tiles.
+            movement: The movement constants in tiles per frame.
+            body_height: Height of the body in tiles.
+        """
+        self.height = len(solid)
+        self.width = len(solid[0])
+        self.solid = [bool(value) for row in solid for value in row]
+        self.ladder = [bool(value) for row in ladders for value in row]
+        self.wall_jump = [bool(value) for row in wall_jump for value in row]
+        self.movement = movement
+        self.body_height = body_height
+        self.segments: List[Tuple[int, int, int]] = []
+        self.segment_of: Dict[int, int] = {}
+        self.links: Dict[int, List[Link]] = {}
+        self.expanded = 0
+        self._build()
+
+    # Cells
+    def is_solid(self, row: int, column: int) -> bool:
+        # The edges of the map are walls
+        if not (0 <= row < self.height and 0 <= column < self.width):
+            return True
+        return self.solid[row * self.width + column]
+
+    def fits(self, row: int, column: int) -> bool:
+        """
+        Checks whether the body fits with its bottom on a cell.
+        """
+        return not any(self.is_solid(body_row, column) for body_row in range(row - self.body_height + 1, row + 1))
+
+    def can_stand(self, row: int, column: int) -> bool:
+        return row + 1 < self.height and self.fits(row, column) and self.is_solid(row + 1, column)
+
+    def on_ladder(self, row: int, column: int) -> bool:
+        return 0 <= row < self.height and 0 <= column < self.width \
+            and self.ladder[row * self.width + column] and self.fits(row, column)
+
+    def _hits(self, left: float, top: float) -> bool:
+        """
+        Checks whether a body with its top-left corner at (top, left), in tiles, overlaps a solid tile.
+        """
+        for row in range(math.floor(top + EPSILON), math.ceil(top + self.body_height - EPSILON)):
+            for column in range(math.floor(left + EPSILON), math.ceil(left + 1 - EPSILON)):
+                if self.is_solid(row, column):
+                    return True
+        return False
+
+    def _beside_wall_jump(self, left: int, top: float, direction: int) -> bool:
+        column = left + (1 if direction > 0 else -1)
+        if not 0 <= column < self.width:
+            return False
+        return any(0 <= row < self.height and self.wall_jump[row * self.width + column]
+                   for row in range(math.floor(top + EPSILON), math.ceil(top + self.body_height - EPSILON)))
+
+    # Simulating the player's physics
+    def _simulate(self, left: float, top: float, vx: float, vy: float, stop_on_wall: bool) -> Optional[Tuple[int, int]]:
+        """
+        Follows a body through the air a frame at a time, like Player.update does.
+
+        Args:
+            left: Starting column of the body's left edge, in tiles.
+            top: Starting row of the body's top edge, in tiles.
+            vx: Horizontal speed in tiles per frame, kept for the whole arc.
+            vy: Starting vertical speed in tiles per frame, negative is up.
+            stop_on_wall: Whether the arc ends when it slides along a wall-jump tile on its way down.
+
+        Returns:
+            The cell id the arc ends on (a standing cell, or the spot beside a wall-jump tile)
+            and the frames it took, or None if it hits something else or never lands.
+        """
+        movement = self.movement
+        for frame in range(1, MAX_ARC_FRAMES + 1):
+            touching_wall = False
+            if vx:
+                new_left = left + vx
+                if self._hits(new_left, top):
+                    # Pushed back against the wall, the way Player.collisions_x does
+                    new_left = math.ceil(new_left) - 1 if vx > 0 else math.floor(new_left) + 1
+                    if self._hits(new_left, top):
+                        return None
+                    touching_wall = self._beside_wall_jump(new_left, top, 1 if vx > 0 else -1)
+                left = new_left
+
+            new_top = top + vy
+            if self._hits(left, new_top):
+                if vy <= 0:
+                    # Bumped a ceiling, stop rising
+                    new_top = math.floor(new_top) + 1
+                    if self._hits(left, new_top):
+                        return None
+                    vy = 0.0
+                else:
+                    # Landed, snapped to the closest column the body can stand on
+                    row = math.ceil(new_top + self.body_height - EPSILON) - 2
+                    columns = sorted({math.floor(left + EPSILON), math.ceil(left - EPSILON)},
+                                     key=lambda column: abs(column - left))
+                    for column in columns:
+                        if self.can_stand(row, column):
+                            return row * self.width + column, frame
+                    return None
+            top = new_top
+
+            if stop_on_wall and touching_wall and vy >= 0:
+                # The highest point against the wall, where jumping again gets the furthest
+                row = round(top) + self.body_height - 1
+                if 0 <= row < self.height and self.fits(row, left):
+                    return row * self.width + left, frame
+            vy = min(vy + movement.gravity_speed, movement.terminal_velocity)
+            if top >= self.height:
+                return None
+        return None
+
+    def _arcs(self, row: int, column: int, vy: float, step_off: int = 0) -> List[Link]:
+        """
+        Simulates the arcs from a node for every horizontal speed.
+
+        Args:
+            row: Row of the body's bottom.
+            column: Column of the body.
+            vy: Starting vertical speed, -jump_speed for jumps and 0 for falls.
+            step_off: For falls, the direction (-1 or 1) of the step off the platform edge.
+        """
+        kind = "jump" if vy < 0 else "fall"
+        arcs = []
+        for direction in (-1, 1):
+            if step_off and direction != step_off:
+                continue
+            for fraction in ARC_SPEED_FRACTIONS:
+                if fraction == 0 and direction == 1 and not step_off:
+                    continue  # Straight up is only tried once
+                vx = direction * fraction * self.movement.walk_speed
+                result = self._simulate(column + step_off, row - self.body_height + 1, vx, vy, True)
+                if result is not None:
+                    target, frames = result
+                    # A fall starts with a step off the edge
+                    cost = frames + (1 / self.movement.walk_speed if step_off else 0)
+                    arcs.append((target, cost, kind, vx))
+        return arcs
+
+    # Building the graph
+    def _build(self) -> None:
+        width = self.width
+        # Platform segments: runs of standing cells on a row
+        for row in range(self.height):
+            column = 0
+            while column < width:
+                if not self.can_stand(row, column):
+                    column += 1
+                    continue
+                first = column
+                while column + 1 < width and self.can_stand(row, column + 1):
+                    column += 1
+                for covered in range(first, column + 1):
+                    self.segment_of[row * width + covered] = len(self.segments)
+                self.segments.append((row, first, column))
+                column += 1
+
+        movement = self.movement
+        walk_cost = 1 / movement.walk_speed
+        climb_cost = 1 / movement.climb_speed
+        pending = list(self.segment_of) + [cell for cell in range(width * self.height)
+                                           if self.on_ladder(*divmod(cell, width)) and cell not in self.segment_of]
+        queued = set(pending)
+        while pending:
+            cell = pending.pop()
+            row, column = divmod(cell, width)
+            standing, ladder = cell in self.segment_of, self.on_ladder(row, column)
+            links: List[Link] = []
+            if standing or ladder:
+                # Walk to the next cell of the platform, or onto a ladder
+                for direction in (-1, 1):
+                    other = column + direction
+                    if 0 <= other < width and (self.can_stand(row, other) or self.on_ladder(row, other)):
+                        links.append((cell + direction, walk_cost, "walk", direction * movement.walk_speed))
+            if ladder:
+                # Climb up onto the cell above the top of the ladder, down while there is ladder below
+                if self.on_ladder(row - 1, column) or self.can_stand(row - 1, column):
+                    links.append((cell - width, climb_cost, "climb", 0.0))
+                if self.on_ladder(row + 1, column):
+                    links.append((cell + width, climb_cost, "climb", 0.0))
+            if standing:
+                links.extend(self._arcs(row, column, -movement.jump_speed))
+                for direction in (-1, 1):
+                    other = column + direction
+                    if 0 <= other < width and self.fits(row, other) and not self.can_stand(row, other):
+                        links.extend(self._arcs(row, column, 0.0, direction))
+            elif not ladder:
+                # Against a wall-jump tile: jump again, or slide down the wall
+                links.extend(self._arcs(row, column, -movement.jump_speed))
+                result = self._simulate(column, row - self.body_height + 1, 0.0, 0.0, False)
+                if result is not None:
+                    links.append((result[0], result[1], "fall", 0.0))
+
+            # Keep the cheapest link to each target
+            cheapest: Dict[int, Link] = {}
+            for link in links:
+                if link[0] != cell and (link[0] not in cheapest or link[1] < cheapest[link[0]][1]):
+                    cheapest[link[0]] = link
+            self.links[cell] = list(cheapest.values())
+            for target in cheapest:
+                if target not in queued:
+                    # A spot against a wall-jump tile, found by an arc
+                    queued.add(target)
+                    pending.append(target)
+
+    # Queries
+    def node_at(self, position: Cell) -> Optional[Cell]:
+        """
+        Returns the node a body at a cell is on, or the first one below it when it is in the air.
+
+        Args:
+            position: The (row, column) cell of the body's bottom.
+
+        Returns:
+            The (row, column) node, or None if the body would fall out of the level.
+        """
+        row, column = int(position[0]), int(position[1])
+        if not 0 <= column < self.width:
+            return None
+        for row in range(max(row, 0), self.height):
+            if row * self.width + column in self.links:
+                return row, column
+            if self.is_solid(row, column):
+                return None
+        return None
+
+    def find_path(self, start: Cell, end: Cell) -> List[Step]:
+        """
+        Searches the links for the quickest route between two nodes.
+
+        Args:
+            start: The starting (row, column) node.
+            end: The ending (row, column) node.
+
+        Returns:
+            List[Step]: The links to take in order, each with the node it reaches,
+            or an empty list if end can't be reached (or is start).
+        """
+        self.expanded = 0
+        width = self.width
+        start_cell = int(start[0]) * width + int(start[1])
+        end_cell = int(end[0]) * width + int(end[1])
+        if start_cell not in self.links or end_cell not in self.links or start_cell == end_cell:
+            return []
+
+        # Horizontal speed never goes above the walk speed, so this never overestimates
+        end_column = end_cell % width
+        frames_per_column = 1 / self.movement.walk_speed
+        g_score = {start_cell: 0.0}
+        came_from: Dict[int, Tuple[int, str, float]] = {}
+        closed = set()
+        open_list = [(0.0, start_cell)]
+        while open_list:
+            _, current = heapq.heappop(open_list)
+            if current in closed:
+                continue
+            closed.add(current)
+            self.expanded += 1
+            if current == end_cell:
+                steps = []
+                while current in came_from:
+                    previous, kind, vx = came_from[current]
+                    steps.append((divmod(current, width), kind, vx))
+                    current = previous
+                return steps[::-1]
+            for target, cost, kind, vx in self.links[current]:
+                new_g = g_score[current] + cost
+                if target not in closed and new_g < g_score.get(target, float("inf")):
+                    g_score[target] = new_g
+                    came_from[target] = (current, kind, vx)
+                    estimate = abs(target % width - end_column) * frames_per_column
+                    heapq.heappush(open_list, (new_g + estimate, target))
+
+        return []  # Return empty if no path is found
+
+
+# One platform graph per level grid
+_platform_graphs: Dict[int, PlatformGraph] = {}
+
+
+def get_platform_graph(maze: List[List[int]],
+                       tmx_path: str,
+                       movement_settings: dict,
+                       body_height: int = 1) -> PlatformGraph:
+    """
+    Returns the cached platform graph of a level grid, building it from the TMX layers on first use.
+
+    Args:
+        maze: The level grid represented as a 2D list of integers (the "tiles" layer).
+        tmx_path: Path to the level's TMX file, its "ladders" and "wall_jump" layers are read.
+        movement_settings: The player's "movement" settings.
+        body_height: Height of the body in tiles.
+
+    Returns:
+        PlatformGraph: The graph for the grid.
+    """
+    movement = Movement.from_settings(movement_settings)
+    graph: Optional[PlatformGraph] = _platform_graphs.get(id(maze))
+    if graph is None or graph.movement != movement or graph.body_height != body_height:
+        # Imported here so the graph itself doesn't depend on the TMX loader
+        from scripts.entities.TileMap import load_layer_to_array
+
+        ladders = load_layer_to_array(tmx_path, "ladders")
+        wall_jump = load_layer_to_array(tmx_path, "wall_jump")
+        # The player collides with wall-jump tiles too
+        solid = [[1 if tile or wall else 0 for tile, wall in zip(tile_row, wall_row)]
+                 for tile_row, wall_row in zip(maze, wall_jump)]
+        graph = PlatformGraph(solid, ladders, wall_jump, movement, body_height)
+        _platform_graphs[id(maze)] = graph
+    return graph
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from PIL import Image
+
+from scripts.game.algorithms.benchmark import Query, random_queries
+from scripts.game.algorithms.grid_search import get_grid_search
+from scripts.game.algorithms.jump_point_search import get_jump_point_search
+from scripts.game.algorithms.navmesh import get_navmesh
+from scripts.game.algorithms.pathfinding import PLANNERS, bidirectional_counters, get_planner
+
+# Pixels per tile in the heatmaps
+HEATMAP_TILE_SIZE = 8
+WALL_COLOUR = (40, 40, 40)
+OPEN_COLOUR = (255, 255, 255)
+# Heat runs from the first colour (expanded once) to the second (expanded the most)
+COLD_COLOUR = (255, 230, 120)
+HOT_COLOUR = (200, 0, 0)
+
+
+def grid_search_expanded(maze: List[List[int]]) -> List[int]:
+    """
+    Returns the cell ids closed by the last query of the level's GridSearch engine.
+    """
+    state = get_grid_search(maze).state
+    return [cell for cell in range(len(state.closed)) if state.closed[cell] == state.generation]
+
+
+def jump_point_expanded(maze: List[List[int]]) -> List[int]:
+    """
+    Returns the cell ids of the jump points closed by the last Jump Point Search query.
+    """
+    jps = get_jump_point_search(maze)
+    width = jps.width
+    cells = []
+    for padded, stamp in enumerate(jps.closed):
+        if stamp == jps.generation:
+            row, column = divmod(padded, jps.padded_width)
+            cells.append((row - 1) * width + column - 1)
+    return cells
+
+
+# Reads the cells a planner expanded in its last query, for the planners whose engine keeps them
+EXPANDED_CELLS: Dict[str, Callable[[List[List[int]]], List[int]]] = {
+    "a_star": grid_search_expanded,
+    "alt": grid_search_expanded,
+    "jps": jump_point_expanded,
+}
+
+
+def expanded_count(name: str, maze: List[List[int]]) -> Optional[int]:
+    """
+    Returns the number of nodes a planner expanded in its last query, None if it doesn't count them.
+    """
+    if name in ("a_star", "alt"):
+        return get_grid_search(maze).expanded
+    if name == "jps":
+        return get_jump_point_search(maze).expanded
+    if name == "navmesh":
+        return get_navmesh(maze).expanded
+    if name == "bidirectional":
+        return bidirectional_counters["total"]
+    return None
+
+
+def load_queries(path: str) -> List[Query]:
+    """
+    Reads (start, goal) queries from a JSON file holding a list of [[row, column], [row, column]] pairs.
+    """
+    with open(path) as file:
+        pairs = json.load(file)
+    return [((int(start[0]), int(start[1])), (int(end[0]), int(end[1]))) for start, end in pairs]
+
+
+def profile_planner(name: str, maze: List[List[int]], queries: List[Query]) -> Tuple[Dict[str, float], List[int]]:
+    """
+    Replays the queries with one planner.
+
+    Args:
+        name: The planner name, a key of PLANNERS.
+        maze: The level grid represented as a 2D list of integers.
+        queries: The (start, goal) pairs to plan.
+
+    Returns:
+        The planner's timings ("mean_ms", "p50_ms", "p95_ms", "max_ms"), the number of queries
+        with a path ("found") and the mean "expanded" nodes (-1 if not counted), and how many
+        times each cell id was expanded (all zeros if the planner doesn't expose it).
+    """
+    planner = get_planner(name)
+    heat = [0] * (len(maze) * len(maze[0]))
+    read_expanded = EXPANDED_CELLS.get(name)
+    # The first query builds the level's tables, that isn't what is being timed
+    planner(maze, queries[0][0], queries[0][1])
+
+    times = []
+    found = 0
+    expanded = 0
+    for start, end in queries:
+        started = time.perf_counter()
+        path = planner(maze, start, end)
+        times.append((time.perf_counter() - started) * 1000)
+        found += bool(path)
+        count = expanded_count(name, maze)
+        expanded += count if count is not None else 0
+        if read_expanded is not None:
+            for cell in read_expanded(maze):
+                heat[cell] += 1
+
+    times.sort()
+    result = {
+        "found": found,
+        "mean_ms": sum(times) / len(times),
+        "p50_ms": times[len(times) // 2],
+        "p95_ms": times[int(len(times) * 0.95)],
+        "max_ms": times[-1],
+        "expanded": expanded / len(queries) if expanded_count(name, maze) is not None else -1,
+    }
+    return result, heat
+
+
+def save_heatmap(maze: List[List[int]], heat: List[int], path: str, tile_size: int = HEATMAP_TILE_SIZE) -> None:
+    """
+    Draws a PNG of the level with every expanded cell shaded by how often it was expanded.
+
+    Args:
+        maze: The level grid represented as a 2D list of integers.
+        heat: How many times each cell id was expanded.
+        path: Where to write the PNG.
+        tile_size: Pixels per tile.
+    """
+    height, width = len(maze), len(maze[0])
+    hottest = max(heat) or 1
+    image = Image.new("RGB", (width, height))
+    pixels = []
+    for row in range(height):
+        for column in range(width):
+            count = heat[row * width + column]
+            if maze[row][column] == 1:
+                pixels.append(WALL_COLOUR)
+            elif count == 0:
+                pixels.append(OPEN_COLOUR)
+            else:
+                share = count / hottest
+                pixels.append(tuple(int(cold + (hot - cold) * share) for cold, hot in zip(COLD_COLOUR, HOT_COLOUR)))
+    image.putdata(pixels)
+    # Nearest keeps every tile a sharp square
+    image.resize((width * tile_size, height * tile_size), Image.NEAREST).save(path)
+
+
+def print_table(level: str, results: Dict[str, Dict[str, float]]) -> None:
+    print(level)
+    print(f"  {'planner':<14}{'found':>7}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'expanded':>10}")
+    for name, result in results.items():
+        expanded = f"{result['expanded']:.0f}" if result["expanded"] >= 0 else "-"
+        print(f"  {name:<14}{result['found']:>7}{result['mean_ms']:>10.3f}{result['p50_ms']:>10.3f}"
+              f"{result['p95_ms']:>10.3f}{result['max_ms']:>10.3f}{expanded:>10}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay path queries on TMX levels, print timings and "
+                                                 "save heatmaps of the expanded cells.")
+    parser.add_argument("tmx_files", nargs="+", help="TMX files to profile")
+    parser.add_argument("--planners", nargs="+", choices=sorted(PLANNERS), default=["a_star", "jps", "alt"],
+                        help="planners to profile")
+    parser.add_argument("--queries", help="JSON file of [[row, column], [row, column]] pairs, "
+                                          "random queries are used without it")
+    parser.add_argument("--random", type=int, default=200, help="random queries per level")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the random queries")
+    parser.add_argument("--output-dir", default="profiles", help="where to write the heatmaps")
+    parser.add_argument("--tile-size", type=int, default=HEATMAP_TILE_SIZE, help="heatmap pixels per tile")
+    args = parser.parse_args()
+
+    # Imported here so the profiling helpers don't depend on the TMX loader
+    from scripts.entities.TileMap import load_tmx_to_array
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    for tmx_path in args.tmx_files:
+        maze = load_tmx_to_array(tmx_path)
+        queries = load_queries(args.queries) if args.queries else random_queries(maze, args.random, args.seed)
+        if not queries:
+            print(f"{tmx_path}: no queries")
+            continue
+        level = os.path.splitext(os.path.basename(tmx_path))[0]
+        results = {}
+        for name in args.planners:
+            results[name], heat = profile_planner(name, maze, queries)
+            if name in EXPANDED_CELLS:
+                save_heatmap(maze, heat, os.path.join(args.output_dir, f"{level}_{name}.png"), args.tile_size)
+        print_table(tmx_path, results)
+    print(f"Heatmaps written to {args.output_dir} (planners without expanded cells: "
+          f"{', '.join(name for name in args.planners if name not in EXPANDED_CELLS) or 'none'})")
+
+
+if __name__ == "__main__":
+    main()
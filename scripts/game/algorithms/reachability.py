@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from scripts.game.algorithms.grid_search import GridSearch, get_grid_search
+
+# Label of a wall cell, walls don't belong to any component
+NO_COMPONENT = -1
+
+
+class Reachability:
+    """
+    Connected-component labels of a level grid.
+
+    Two open cells share a label exactly when a path exists between them, so
+    an impossible query can be answered with two list lookups instead of a
+    search that expands every reachable cell before giving up.
+
+    Attributes:
+        search (GridSearch): The level's engine, its walkable and neighbour tables are shared.
+        labels (List[int]): The component of each flat cell id, NO_COMPONENT for walls.
+        component_count (int): Number of components found by the last rebuild.
+    """
+
+    def __init__(self, search: GridSearch) -> None:
+        """
+        Args:
+            search: The GridSearch engine of the level grid.
+        """
+        self.search = search
+        self.width = search.width
+        self.labels: List[int] = [NO_COMPONENT] * search.size
+        self.component_count = 0
+        self.rebuild()
+
+    def rebuild(self) -> None:
+        """
+        Relabels every cell, called when cells are opened or blocked (e.g. a door toggles).
+        Moves are symmetric, so one flood fill per component is enough.
+        """
+        labels = self.labels
+        labels[:] = [NO_COMPONENT] * self.search.size
+        walkable = self.search.walkable
+        neighbours = self.search.neighbours
+        component = 0
+        for cell in range(self.search.size):
+            if not walkable[cell] or labels[cell] != NO_COMPONENT:
+                continue
+            labels[cell] = component
+            queue = deque([cell])
+            while queue:
+                current = queue.popleft()
+                for neighbour, _ in neighbours[current]:
+                    if labels[neighbour] == NO_COMPONENT:
+                        labels[neighbour] = component
+                        queue.append(neighbour)
+            component += 1
+        self.component_count = component
+
+    def component_of(self, position: Tuple[int, int]) -> int:
+        """
+        Args:
+            position: A (row, column) cell.
+
+        Returns:
+            int: The cell's component, NO_COMPONENT for walls and cells outside the grid.
+        """
+        if not self.search.in_bounds(position):
+            return NO_COMPONENT
+        return self.labels[self.search.cell_id((int(position[0]), int(position[1])))]
+
+    def connected(self, start: Tuple[int, int], end: Tuple[int, int]) -> bool:
+        """
+        Args:
+            start: The starting (row, column) position.
+            end: The ending (row, column) position.
+
+        Returns:
+            bool: Whether a path exists from start to end.
+        """
+        component = self.component_of(end)
+        return component != NO_COMPONENT and component == self.component_of(start)
+
+    def nearest_reachable(self, start: Tuple[int, int], end: Tuple[int, int]) -> Optional[Tuple[int, int]]:
+        """
+        Finds the cell closest to end that can be reached from start.
+
+        The search grows outward from end in rings over every cell, walls
+        included, so it stops at the first ring that touches start's component.
+
+        Args:
+            start: The (row, column) position the path would start from.
+            end: The (row, column) goal that may not be reachable.
+
+        Returns:
+            Optional[Tuple[int, int]]: The reachable cell nearest to end, end itself if it is
+            reachable, or None if start is a wall or outside the grid.
+        """
+        component = self.component_of(start)
+        if component == NO_COMPONENT:
+            return None
+        end = (int(end[0]), int(end[1]))
+        if self.component_of(end) == component:
+            return end
+
+        search = self.search
+        height, width = search.height, search.width
+        # Clamp goals outside the grid onto its edge
+        x = min(max(end[0], 0), height - 1)
+        y = min(max(end[1], 0), width - 1)
+        labels = self.labels
+        best: Optional[Tuple[int, int]] = None
+        best_distance = 0
+        for ring in range(max(height, width)):
+            for dx in range(-ring, ring + 1):
+                # Only the edge of the ring, the inside was checked already
+                for dy in (range(-ring, ring + 1) if abs(dx) == ring else (-ring, ring)):
+                    nx, ny = x + dx, y + dy
+                    if 0 <= nx < height and 0 <= ny < width and labels[nx * width + ny] == component:
+                        # Prefer the straightest cell of the ring
+                        distance = dx * dx + dy * dy
+                        if best is None or distance < best_distance:
+                            best, best_distance = (nx, ny), distance
+            if best is not None:
+                return best
+        return None
+
+
+# One set of labels per level grid
+_reachabilities: Dict[int, Reachability] = {}
+
+
+def get_reachability(maze: List[List[int]]) -> Reachability:
+    """
+    Returns the cached component labels of a level grid, computing them on first use.
+
+    Args:
+        maze: The level grid represented as a 2D list of integers.
+
+    Returns:
+        Reachability: The labels for the grid.
+    """
+    search = get_grid_search(maze)
+    reachability: Optional[Reachability] = _reachabilities.get(id(maze))
+    if reachability is None or reachability.search is not search:
+        reachability = Reachability(search)
+        _reachabilities[id(maze)] = reachability
+    return reachability
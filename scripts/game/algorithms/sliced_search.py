@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import time
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+from scripts.game.algorithms.grid_search import GridSearch, SearchState
+
+# Nodes a search expands before the scheduler moves on to the next one
+DEFAULT_SLICE_NODES = 64
+# Milliseconds of pathfinding allowed per frame
+DEFAULT_FRAME_BUDGET_MS = 2.0
+
+
+class SlicedSearch:
+    """
+    An A* search on the level's GridSearch that can be run a few nodes at a time.
+
+    The query runs in a SearchState of its own, with the engine's generation
+    stamped arrays and indexed heap, so a search that runs out of budget simply
+    continues where it stopped on the next call, while the level's other
+    queries use the engine in between.
+
+    Attributes:
+        start (Tuple[int, int]): The starting (row, column) position.
+        end (Tuple[int, int]): The ending (row, column) position.
+        state (SearchState): The query's arrays and open list.
+        time_ms (float): Milliseconds spent in the slices run so far, filled in by PathScheduler.run.
+    """
+
+    def __init__(self,
+                 search: GridSearch,
+                 start: Tuple[int, int],
+                 end: Tuple[int, int],
+                 cost_field: Optional[Sequence[float]] = None,
+                 state: Optional[SearchState] = None) -> None:
+        """
+        Args:
+            search: The GridSearch engine of the level grid.
+            start: The starting (row, column) position.
+            end: The ending (row, column) position.
+            cost_field: Optional extra cost of entering each cell id. It must not change
+                until the search is done, PathScheduler hands over a snapshot.
+            state: The arrays to run in, reused from an earlier search. A new state if None.
+        """
+        self.search = search
+        self.start = (int(start[0]), int(start[1]))
+        self.end = (int(end[0]), int(end[1]))
+        self.state = state if state is not None else SearchState(search.size)
+        self.time_ms = 0.0
+        search.begin(self.state, self.start, self.end, cost_field=cost_field)
+
+    @property
+    def done(self) -> bool:
+        """Whether the search has finished, found or not."""
+        return self.state.done
+
+    @property
+    def path(self) -> List[Tuple[int, int]]:
+        """The path once done, empty if there is none."""
+        return self.state.path
+
+    @property
+    def expanded(self) -> int:
+        """Number of nodes expanded so far."""
+        return self.state.expanded
+
+    @property
+    def open_peak(self) -> int:
+        """Largest size of the open list so far."""
+        return self.state.open_peak
+
+    def step(self, max_nodes: int = DEFAULT_SLICE_NODES) -> bool:
+        """
+        Expands up to max_nodes nodes.
+
+        Args:
+            max_nodes: The most nodes to expand in this call.
+
+        Returns:
+            bool: True once the search has finished, the result is then in path.
+        """
+        return self.search.resume(self.state, max_nodes)
+
+
+class PathScheduler:
+    """
+    Runs the pending SlicedSearches of a level within a time budget per frame.
+
+    Each owner (an enemy) has at most one pending search. Asking again for the
+    same start and goal keeps the search that is already running, asking for
+    a different one replaces it, since its result would be out of date. Each
+    owner's SearchState is kept and reused by its next search.
+
+    Searches read a snapshot of the cost field, so the costs can't change
+    halfway through a search. The snapshot is taken by the first request after
+    a call to run and shared by the requests that follow, so one tick's
+    requests copy the costs once rather than once each.
+
+    Attributes:
+        frame_budget_ms (float): Milliseconds of searching allowed per call to run.
+        slice_nodes (int): Nodes a search expands before the next search gets a turn.
+        pending (Dict[Hashable, SlicedSearch]): The unfinished search of each owner.
+        states (Dict[Hashable, SearchState]): The arrays each owner's searches run in.
+    """
+
+    def __init__(self,
+                 search: GridSearch,
+                 frame_budget_ms: float = DEFAULT_FRAME_BUDGET_MS,
+                 slice_nodes: int = DEFAULT_SLICE_NODES) -> None:
+        """
+        Args:
+            search: The GridSearch engine of the level grid.
+            frame_budget_ms: Milliseconds of searching allowed per call to run.
+            slice_nodes: Nodes a search expands before the next search gets a turn.
+        """
+        self.search = search
+        self.frame_budget_ms = frame_budget_ms
+        self.slice_nodes = slice_nodes
+        self.pending: Dict[Hashable, SlicedSearch] = {}
+        self.states: Dict[Hashable, SearchState] = {}
+        # The cost field the current snapshot was copied from, and the copy
+        self.cost_source: Optional[Sequence[float]] = None
+        self.cost_snapshot: Optional[List[float]] = None
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+    def request(self,
+                owner: Hashable,
+                start: Tuple[int, int],
+                end: Tuple[int, int],
+                cost_field: Optional[Sequence[float]] = None) -> None:
+        """
+        Queues a search for an owner, unless the same search is already pending.
+
+        Args:
+            owner: Who the path is for, e.g. an Enemy.
+            start: The starting (row, column) position.
+            end: The ending (row, column) position.
+            cost_field: Optional extra cost of entering each cell id.
+        """
+        start = (int(start[0]), int(start[1]))
+        end = (int(end[0]), int(end[1]))
+        current = self.pending.get(owner)
+        if current is not None and current.start == start and current.end == end:
+            return
+        if cost_field is not None:
+            cost_field = self._snapshot(cost_field)
+        state = self.states.get(owner)
+        if state is None:
+            state = self.states[owner] = SearchState(self.search.size)
+        self.pending[owner] = SlicedSearch(self.search, start, end, cost_field, state)
+
+    def _snapshot(self, cost_field: Sequence[float]) -> List[float]:
+        """
+        Returns the copy of a cost field shared by the requests since the last call to run.
+        """
+        if self.cost_snapshot is None or self.cost_source is not cost_field:
+            self.cost_source = cost_field
+            self.cost_snapshot = list(cost_field)
+        return self.cost_snapshot
+
+    def cancel(self, owner: Hashable) -> None:
+        self.pending.pop(owner, None)
+        self.states.pop(owner, None)
+
+    def clear(self) -> None:
+        self.pending.clear()
+        self.states.clear()
+        self.cost_snapshot = None
+
+    def run(self) -> List[Tuple[Hashable, SlicedSearch]]:
+        """
+        Steps the pending searches in turn until they finish or the frame budget is used up.
+        Every call makes at least one slice of progress, so searches can't starve.
+
+        Returns:
+            List[Tuple[Hashable, SlicedSearch]]: The owner and search of every search that finished.
+        """
+        # Requests after this run read the costs as they are then
+        self.cost_snapshot = None
+        finished = []
+        now = time.perf_counter()
+        deadline = now + self.frame_budget_ms / 1000
+        while self.pending:
+            for owner, sliced in list(self.pending.items()):
+                done = sliced.step(self.slice_nodes)
+                sliced_end = time.perf_counter()
+                sliced.time_ms += (sliced_end - now) * 1000
+                now = sliced_end
+                if done:
+                    del self.pending[owner]
+                    finished.append((owner, sliced))
+                else:
+                    # Unfinished searches go to the back, so the next frame starts with the others
+                    self.pending[owner] = self.pending.pop(owner)
+                if now >= deadline:
+                    return finished
+        return finished
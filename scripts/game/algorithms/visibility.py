@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from scripts.game.algorithms.grid_search import GridSearch, get_grid_search
+from scripts.game.algorithms.path_smoothing import has_line_of_sight
+
+# Cell pairs kept per level, the least recently checked pairs are dropped first
+VISIBILITY_CAPACITY = 4096
+
+Cell = Tuple[int, int]
+
+
+class VisibilityCache:
+    """
+    Cached line-of-sight results between cells of a level grid.
+
+    Each result is the thick-ray test of has_line_of_sight, so a visible pair
+    means a tile-sized body can fly straight between the cells without
+    overlapping a wall or squeezing past a wall corner. The test is symmetric,
+    so a pair is stored once whatever the direction it was asked in.
+
+    Results follow the walkable table of the level's GridSearch, which the
+    obstacle overlay changes when doors open and close. invalidate_cells drops
+    only the pairs whose ray can touch a changed cell.
+
+    Attributes:
+        search (GridSearch): The level's engine, its walkable table is tested.
+        results (OrderedDict): Whether each (cell id, cell id) pair is visible, oldest first.
+        hits (int): Checks answered from the cache.
+        misses (int): Checks that had to trace the ray.
+    """
+
+    def __init__(self, search: GridSearch, capacity: int = VISIBILITY_CAPACITY) -> None:
+        """
+        Args:
+            search: The GridSearch engine of the level grid.
+            capacity: Maximum number of cell pairs kept.
+        """
+        self.search = search
+        self.capacity = capacity
+        self.results: OrderedDict[Tuple[int, int], bool] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def visible(self, start: Cell, end: Cell) -> bool:
+        """
+        Checks whether a tile-sized body can fly straight from one cell to another.
+
+        Args:
+            start: The (row, column) cell the body starts on.
+            end: The (row, column) cell the body ends on.
+
+        Returns:
+            bool: True if the straight move is clear.
+        """
+        search = self.search
+        if not (search.in_bounds(start) and search.in_bounds(end)):
+            return False
+        first, second = search.cell_id(start), search.cell_id(end)
+        key = (first, second) if first <= second else (second, first)
+        result = self.results.get(key)
+        if result is not None:
+            self.hits += 1
+            self.results.move_to_end(key)
+            return result
+
+        self.misses += 1
+        result = has_line_of_sight(search, start, end)
+        self.results[key] = result
+        if len(self.results) > self.capacity:
+            self.results.popitem(last=False)
+        return result
+
+    def invalidate_cells(self, positions: Iterable[Cell]) -> int:
+        """
+        Drops the cached pairs whose ray can touch one of the changed cells.
+
+        The body's top-left corner moves along the line between the two cells,
+        so the ray only overlaps cells inside their bounding box grown by one
+        row and column toward the bottom-right.
+
+        Args:
+            positions: The (row, column) cells that were opened or blocked.
+
+        Returns:
+            int: The number of pairs dropped.
+        """
+        changed = [(int(row), int(column)) for row, column in positions]
+        if not changed:
+            return 0
+        width = self.search.width
+        stale = []
+        for key in self.results:
+            first_row, first_column = divmod(key[0], width)
+            second_row, second_column = divmod(key[1], width)
+            top, bottom = min(first_row, second_row), max(first_row, second_row) + 1
+            left, right = min(first_column, second_column), max(first_column, second_column) + 1
+            if any(top <= row <= bottom and left <= column <= right for row, column in changed):
+                stale.append(key)
+        for key in stale:
+            del self.results[key]
+        return len(stale)
+
+    def clear(self) -> None:
+        self.results.clear()
+
+
+# One visibility cache per level grid
+_visibility_caches: Dict[int, VisibilityCache] = {}
+
+
+def get_visibility(maze: List[List[int]]) -> VisibilityCache:
+    """
+    Returns the cached line-of-sight results of a level grid, creating them on first use.
+
+    Args:
+        maze: The level grid represented as a 2D list of integers.
+
+    Returns:
+        VisibilityCache: The cache for the grid.
+    """
+    search = get_grid_search(maze)
+    visibility: Optional[VisibilityCache] = _visibility_caches.get(id(maze))
+    if visibility is None or visibility.search is not search:
+        visibility = VisibilityCache(search)
+        _visibility_caches[id(maze)] = visibility
+    return visibility
@@ -3,7 +3,8 @@ from __future__ import annotations
 # Standard library imports
 import sys
 import time
-from typing import List
+from collections import deque
+from typing import List, Optional
 
 # Third-party imports
 import pygame
@@ -11,15 +12,37 @@ import pytmx
 
 # Local imports
 from scripts.entities.enemy import Enemy
+from scripts.entities.enemy_swarm import EnemySwarm
 from scripts.entities.player import Player
 from scripts.entities.coin import Coin
+from scripts.entities.door_lever import LaserDoor
+from scripts.game.algorithms.ai_lod import DEFAULT_LOD_TIERS, AILevelOfDetail
+from scripts.game.algorithms.distance_oracle import load_distance_oracle, unload_distance_oracle
+from scripts.game.algorithms.flow_field import FlowField
+from scripts.game.algorithms.grid_search import get_grid_search
+from scripts.game.algorithms.hierarchical import get_hierarchical_grid
+from scripts.game.algorithms.influence_map import InfluenceMap
+from scripts.game.algorithms.jump_point_search import get_jump_point_search
+from scripts.game.algorithms.landmarks import get_landmark_heuristic
+from scripts.game.algorithms.navmesh import get_navmesh
+from scripts.game.algorithms.obstacle_overlay import ObstacleOverlay, cells_under_rect
+from scripts.game.algorithms.path_smoothing import has_line_of_sight
+from scripts.game.algorithms.pathfinding import (COST_AWARE_PLANNERS, PathContext, a_star, get_planner, is_partial_path,
+                                                  path_metrics, plan_paths, split_deadline)
+from scripts.game.algorithms.reachability import get_reachability
+from scripts.game.algorithms.sliced_search import DEFAULT_SLICE_NODES, PathScheduler
+from scripts.game.algorithms.visibility import get_visibility
 from scripts.utils.game_utils import create_text
 
 # Constants
 SCREEN_WIDTH = 1920
 SCREEN_HEIGHT = 1080
-DEBUG_SURFACE_DIMENSIONS = (200, 100)
+DEBUG_SURFACE_DIMENSIONS = (200, 130)
 DEBUG_TEXT_COLOR = (0, 0, 0)
+# Time of one frame at the 60 FPS the handler ticks at
+FRAME_TIME_MS = 1000 / 60
+# Path searches always get at least this long, even after a frame that overran
+MIN_PATH_DEADLINE_MS = 0.5
 
 # User events
 PATH_FIND = pygame.USEREVENT + 1
@@ -76,6 +99,8 @@ class Game:
         handler.target_progress += weights[1]
         # Set up game objects and unpack tile map
         self._setup_game_objects(player_obj, lever, door, laser_door, enemies_list, coins_list, tile_map, level_grid)
+        # Set up the per-level pathfinding structures
+        self._setup_pathfinding()
 
         handler.target_progress += weights[2]
         # Set up the background and other visual surfaces
@@ -132,6 +157,79 @@ class Game:
 
         # Grid layout of the current level
         self.level_grid = level_grid
+        self._setup_swarm()
+
+    def _enemies_outside_swarm(self) -> list:
+        """
+        Returns the enemies the swarm doesn't move, e.g. ground enemies, or all of them without a swarm.
+        """
+        return [enemy for enemy in self.enemies_list if self.swarm is None or enemy.swarm is not self.swarm]
+
+    def _setup_swarm(self) -> None:
+        """
+        Moves the flying enemies together in one EnemySwarm, unless it is turned off in the enemy settings.
+        """
+        self.swarm = None
+        if self.enemy_settings.get("vectorized_movement", True):
+            self.swarm = EnemySwarm([enemy for enemy in self.enemies_list if enemy.plans_on_grid])
+
+    def _setup_pathfinding(self):
+        # Enemy danger costs read by the pathfinder, kept in sync on every PATH_FIND tick
+        self.influence_map = InfluenceMap(self.level_grid)
+        # "a_star" plans a path per enemy, "flow_field" shares one field toward the player between all enemies
+        self.pathfinding_mode = self.enemy_settings.get("pathfinding_mode", "a_star")
+        self.flow_field = FlowField(self.level_grid) if self.pathfinding_mode == "flow_field" else None
+        # Distance tiers that decide how much AI work each enemy gets
+        self.ai_lod = AILevelOfDetail(self.enemy_settings.get("ai_lod_tiers", DEFAULT_LOD_TIERS))
+        # Per-enemy planner for this level, e.g. "jps" on the bigger open maps
+        self.level = self.handler.level
+        algorithms = self.enemy_settings.get("pathfinding_algorithms", {})
+        self.pathfinding_algorithm = algorithms.get(str(self.level), "a_star")
+        self.planner = get_planner(self.pathfinding_algorithm)
+        # Landmark distance tables for the ALT heuristic, built at load on the static map before any door
+        # blocks its cells. Blocking only makes paths longer, so the bounds never need rebuilding
+        self.landmarks = get_landmark_heuristic(self.level_grid) if self.pathfinding_algorithm == "alt" else None
+        # Doors and laser doors block their cells while closed, on top of the static level grid
+        self.obstacles = ObstacleOverlay(self.level_grid)
+        for obstacle in self._dynamic_obstacles():
+            self.obstacles.add(obstacle, self._obstacle_cells(obstacle), self._blocks_enemies(obstacle))
+        # Connected components of the level, so unreachable goals are caught without a search
+        self.reachability = get_reachability(self.level_grid)
+        # HPA* cluster abstraction, built now so the first query doesn't pay for it
+        self.hierarchy = get_hierarchical_grid(self.level_grid) if self.pathfinding_algorithm == "hpa" else None
+        # Rectangle navigation mesh, also built at load
+        self.navmesh = get_navmesh(self.level_grid) if self.pathfinding_algorithm == "navmesh" else None
+        # Precomputed all-pairs table saved next to the map, None if it is missing, out of date or a door is closed
+        self.distance_oracle = None
+        self._sync_distance_oracle()
+        # A* levels can plan in worker processes, the grid is published to them with the closed doors as walls
+        self.pathfinding_service = self.handler.pathfinding_service if self.pathfinding_algorithm == "a_star" else None
+        if self.pathfinding_service is not None:
+            self.pathfinding_service.publish_grid(self.level, self.obstacles.grid())
+            self.pathfinding_service.publish_costs(self.level, self.influence_map.cost)
+        # Otherwise A* searches run a slice at a time within a per-frame budget, 0 runs them in one go
+        frame_budget_ms = self.enemy_settings.get("pathfinding_frame_budget_ms", 0)
+        self.path_scheduler = None
+        if self.pathfinding_service is None and frame_budget_ms > 0 and self.pathfinding_algorithm == "a_star":
+            self.path_scheduler = PathScheduler(get_grid_search(self.level_grid), frame_budget_ms,
+                                                self.enemy_settings.get("pathfinding_slice_nodes", DEFAULT_SLICE_NODES))
+
+        # Longest a frame's path searches may take, they get less after a slow frame (0 turns deadlines off)
+        self.path_deadline_ms = self.enemy_settings.get("pathfinding_deadline_ms", 0)
+
+        # Paths are cached per (level, grid version), the version is bumped whenever a door changes state
+        self.path_cache = self.handler.path_cache
+        self.grid_version = 0
+        self.path_cache.invalidate(self.level)
+        # Shared by the batched queries of every PATH_FIND tick
+        self.path_context = PathContext(self.planner, self.influence_map, self.path_cache, self.level, self.grid_version)
+        # Per-query stats of the last batch, see plan_paths
+        self.last_batch_stats = []
+        # The enemy whose update is running, so the queries its planner makes are recorded for it
+        self.planning_enemy = None
+        # Enemies waiting for the time-sliced search of another enemy with the same start and goal,
+        # as (start, goal, followers) by the enemy the search runs for
+        self.path_followers = {}
 
     def _setup_visual_elements(self):
         # Visual elements
@@ -166,6 +264,13 @@ class Game:
         self.fps_text = f"FPS: {self.clock.get_fps():.2f}"
         # Create text surface
         self.fps_surface, _ = create_text(self.fps_text, (0, 0, 0), int(16*self.scale_x))
+        # Rolling query times of the recent path searches
+        metrics = path_metrics.summary()
+        self.path_metrics_text = f"Path p50/p95: {metrics['time_p50']:.1f}/{metrics['time_p95']:.1f} ms"
+        self.path_metrics_surface, _ = create_text(self.path_metrics_text, (0, 0, 0), int(16*self.scale_x))
+        # Number of enemies in each AI level-of-detail tier
+        self.ai_lod_text = f"AI LOD: {self.ai_lod.summary()}"
+        self.ai_lod_surface, _ = create_text(self.ai_lod_text, (0, 0, 0), int(16*self.scale_x))
 
     def _setup_audio(self):
         # Sound effects
@@ -175,6 +280,22 @@ class Game:
 
 
     # Utility Methods
+    def _dynamic_obstacles(self) -> list:
+        """Returns the doors and laser doors of the level."""
+        return list(self.door or []) + list(self.laser_door or [])
+
+    @staticmethod
+    def _blocks_enemies(obstacle) -> bool:
+        """A door blocks its cells until it has opened, a laser door while its laser is on."""
+        if isinstance(obstacle, LaserDoor):
+            return obstacle.open
+        return not obstacle.open
+
+    def _obstacle_cells(self, obstacle) -> list:
+        """Returns the (row, column) grid cells under a door's rect."""
+        rect = obstacle.rect
+        return cells_under_rect(rect.left, rect.top, rect.right, rect.bottom, 30 * self.scale_x, 30 * self.scale_y)
+
     @staticmethod
     def _load_image(path: str, size: tuple[int, int]) -> pygame.Surface:
         return pygame.transform.scale(pygame.image.load(path), size)
@@ -182,14 +303,14 @@ class Game:
     @staticmethod
     def create_debug_surface(scale) -> pygame.Surface:
         """Creates and returns the debug surface."""
-        return pygame.Surface(scale(200, 100), pygame.SRCALPHA)
+        return pygame.Surface(scale(200, 130), pygame.SRCALPHA)
 
     @staticmethod
     def create_rect_surface(scale) -> pygame.Surface:
         """Creates a semi-transparent rectangle surface for debug info."""
-        rect_surf = pygame.Surface(scale(200, 100), pygame.SRCALPHA)
+        rect_surf = pygame.Surface(scale(200, 130), pygame.SRCALPHA)
         pygame.draw.rect(
-            rect_surf, (200, 200, 200, 200), (0, 0, 200, 100), border_radius=15
+            rect_surf, (200, 200, 200, 200), (0, 0, 200, 130), border_radius=15
         )
         return rect_surf
 
@@ -237,7 +358,12 @@ class Game:
         Check for collisions between the player and enemies.
         If a collision is detected, the player respawns.
         """
-        for enemy in self.enemies_list:
+        if self.swarm is not None:
+            # One overlap test for the whole swarm
+            if self.swarm.colliding(self.player.rect).any():
+                self.respawn = True
+            self.swarm.allow_move[:] = True
+        for enemy in self._enemies_outside_swarm():
             if self.player.rect.colliderect(enemy.rect):
                 self.respawn = True
             enemy.allow_move = True
@@ -248,7 +374,9 @@ class Game:
         """
         if self.door is not None and not self.door[0].open:
             for door in self.door:
-                for enemy in self.enemies_list:
+                if self.swarm is not None:
+                    self.swarm.allow_move &= ~self.swarm.colliding(door.rect)
+                for enemy in self._enemies_outside_swarm():
                     if door.rect.colliderect(enemy.rect):
                         enemy.allow_move = False
     
@@ -320,20 +448,329 @@ class Game:
         else:
             self.player.get_grid_pos((int(30 * self.scale_x), int(30 * self.scale_y)))
         self.player.update(self.tiles, self.ladders, self.wall_jump_tiles, self.coins_list, self.door, self.dt)
-        for enemy in self.enemies_list:
-            enemy.update(self.level_grid, self.player.grid_pos, self.dt)
+        # Collect finished searches before the enemies move
+        self._collect_paths()
+        request_path = self.request_path if self._plans_asynchronously() else None
+        deadline = self.path_deadline()
+        updated = self.enemies_list
+        if self.swarm is not None:
+            # Enemies without a waypoint plan one by one below, the rest of the swarm moves in one step
+            updated = self.swarm.idle_enemies() + self._enemies_outside_swarm()
+            self.swarm.step(self.dt)
+        for enemy in updated:
+            self.planning_enemy = enemy
+            enemy.update(self.level_grid, self.player.grid_pos, self.dt, self.flow_field, self.plan_path, request_path,
+                         deadline, self.influence_map)
+        self.planning_enemy = None
 
     def update_enemies_pathfinding(self) -> None:
         """
-        Updates enemy paths using A* algorithm.
+        Updates enemy paths, planning the enemies that need a new path in one batch per goal.
+        """
+        # Move each enemy's danger to its current cell, only enemies that changed cells are restamped
+        self.influence_map.update({enemy: enemy.enemy_array_pos for enemy in self.enemies_list})
+        changed_cells = self.influence_map.take_changed_cells()
+        if changed_cells and self._plans_with_danger_costs():
+            # Cached paths through the changed cells were planned with the old danger costs
+            self.path_cache.invalidate_through(self.level, changed_cells)
+        if changed_cells and self.pathfinding_service is not None:
+            # The worker processes read the costs from shared memory, written once per tick
+            self.pathfinding_service.publish_costs(self.level, self.influence_map.cost)
+
+        # Enemies far from the player replan less often and keep their path while the player stays near its end
+        self.ai_lod.assign(self.enemies_list, self.player.grid_pos)
+        replanning = [enemy for order, enemy in enumerate(self.enemies_list)
+                      if self.ai_lod.should_replan(enemy, order, self.player.grid_pos)]
+
+        # Ground enemies plan on their platform graph, nothing on the grid applies to them
+        for enemy in replanning:
+            if not enemy.plans_on_grid:
+                enemy.run_a_star(self.level_grid, self.player.grid_pos)
+        grid_enemies = [enemy for enemy in replanning if enemy.plans_on_grid]
+
+        if self.flow_field is not None:
+            # One search from the player's cell, every enemy samples the result
+            self.flow_field.update(self.player.grid_pos, self.influence_map.cost)
+            for enemy in grid_enemies:
+                enemy.follow_flow_field(self.flow_field)
+            return
+
+        # Enemies planning in worker processes or with their own D* Lite planner keep doing so one by one
+        single = []
+        batches = {}
+        for enemy in grid_enemies:
+            if self.pathfinding_service is not None or enemy.incremental_planner is not None:
+                single.append(enemy)
+                continue
+            query = enemy.path_query(self.level_grid, self.player.grid_pos)
+            # Enemies that can see the player fly straight at it and skip the search
+            if query is not None and not enemy.try_direct_path(self.level_grid, *query):
+                # Usually every enemy shares the player's cell as the goal
+                batches.setdefault(query[1], []).append((enemy, query[0]))
+
+        # The searches of this tick split the time until one deadline, set from the time the last frame took
+        deadline = self.path_deadline()
+        # Batches handed to the time-sliced scheduler run within its frame budget instead
+        batched = sum(len(queries) for queries in batches.values()) if self.path_scheduler is None else 0
+        remaining = len(single) + batched
+        for enemy in single:
+            self.planning_enemy = enemy
+            enemy.run_a_star(self.level_grid, self.player.grid_pos, self.influence_map, self.plan_path,
+                             self.request_path if self.pathfinding_service is not None else None,
+                             split_deadline(deadline, 1, remaining))
+            self.planning_enemy = None
+            remaining -= 1
+
+        self.last_batch_stats = []
+        if self.path_scheduler is not None:
+            # The searches run a slice at a time within the frame budget, see _collect_paths
+            for goal, queries in batches.items():
+                self._request_batch(goal, queries)
+            return
+
+        # One batched call per goal plans the rest, duplicate start cells are only searched once
+        for goal, queries in batches.items():
+            paths, stats = plan_paths(self.level_grid, [start for _, start in queries], goal, self.path_context,
+                                      split_deadline(deadline, len(queries), remaining),
+                                      [enemy for enemy, _ in queries])
+            remaining -= len(queries)
+            for (enemy, _), path in zip(queries, paths):
+                enemy.set_path(path)
+            self.last_batch_stats.extend(stats)
+
+    def plan_path(self, maze, start, end, influence_map=None, deadline=None) -> list:
+        """
+        Plans a path with the level's planner, reusing a cached path for the same start and goal cells.
+
+        Takes the same arguments as a_star, so it can be handed to the enemies as their planner.
+        The deadline only applies to a_star levels, partial paths aren't cached. The query is
+        recorded in path_metrics for the enemy being updated.
+
+        Cached paths are dropped when the danger cost of a cell on them changes, see
+        update_enemies_pathfinding. Costs that change off a cached path aren't tracked, so
+        the path is kept even if a detour has become cheaper. The cache only holds paths planned
+        with the level's influence map, a query with other danger costs skips it.
+        """
+        started = time.perf_counter()
+        enemy_id = id(self.planning_enemy) if self.planning_enemy is not None else None
+        # Cache keys don't hold the danger costs, so only queries with the level's own costs share paths
+        use_cache = influence_map is self.influence_map or not self._plans_with_danger_costs()
+        path = self.path_cache.get(self.level, self.grid_version, start, end) if use_cache else None
+        if path is not None:
+            path_metrics.record(enemy_id, 0, 0, 0.0, cache_hit=True)
+            return path
+        if deadline is not None and self.planner is a_star:
+            path = a_star(maze, start, end, influence_map, deadline)
+        else:
+            path = self.planner(maze, start, end, influence_map)
+        time_ms = (time.perf_counter() - started) * 1000
+        if use_cache and not is_partial_path(path, end):
+            self.path_cache.put(self.level, self.grid_version, start, end, path)
+        # Only the level's GridSearch engine counts expanded nodes and the open list size
+        search = get_grid_search(maze) if self.planner is a_star else None
+        path_metrics.record(enemy_id, search.expanded if search else 0, search.open_peak if search else 0, time_ms)
+        return path
+
+    def path_deadline(self) -> Optional[float]:
         """
+        Works out when this frame's path searches have to stop, from the measured time of the last frame.
 
-        enemy_positions = []
+        The searches get what the last frame left of FRAME_TIME_MS, at most
+        pathfinding_deadline_ms and at least MIN_PATH_DEADLINE_MS.
 
+        Returns:
+            The time.perf_counter() deadline, or None when deadlines are turned off.
+        """
+        if self.path_deadline_ms <= 0:
+            return None
+        # Time the last frame spent working, without the wait for the next tick
+        spare_ms = FRAME_TIME_MS - self.handler.clock.get_rawtime()
+        budget_ms = min(self.path_deadline_ms, max(MIN_PATH_DEADLINE_MS, spare_ms))
+        return time.perf_counter() + budget_ms / 1000
+
+    def _plans_asynchronously(self) -> bool:
+        """Whether enemy paths come from the worker processes or the time-sliced scheduler."""
+        return self.pathfinding_service is not None or self.path_scheduler is not None
+
+    def _request_batch(self, goal, queries) -> None:
+        """
+        Queues one time-sliced search per distinct start cell of a batch. Enemies sharing
+        a start cell follow the first one and get its path when the search finishes.
+
+        Args:
+            goal: The (row, column) goal the batch shares.
+            queries: The (enemy, start cell) of each query.
+        """
+        by_start = {}
+        for enemy, start in queries:
+            by_start.setdefault(start, []).append(enemy)
+        for start, enemies in by_start.items():
+            leader, followers = enemies[0], enemies[1:]
+            self.path_followers.pop(leader, None)
+            for follower in followers:
+                # The leader's search replaces any search of their own
+                self.path_scheduler.cancel(follower)
+                self.path_followers.pop(follower, None)
+                path_metrics.record(id(follower), 0, 0, 0.0, cache_hit=True)
+            path = self.path_cache.get(self.level, self.grid_version, start, goal)
+            if path is not None:
+                path_metrics.record(id(leader), 0, 0, 0.0, cache_hit=True)
+                for enemy in enemies:
+                    enemy.set_path(path)
+                continue
+            if followers:
+                self.path_followers[leader] = (start, goal, followers)
+            self._queue_search(leader, start, goal, self.influence_map)
+
+    def request_path(self, enemy, maze, start, end, influence_map=None) -> None:
+        """
+        Gives an enemy a cached path straight away, or queues a search for it in the
+        worker processes or the time-sliced scheduler.
+
+        The enemy keeps following its old path until the search finishes in _collect_paths.
+        """
+        path = self.path_cache.get(self.level, self.grid_version, start, end)
+        if path is not None:
+            path_metrics.record(id(enemy), 0, 0, 0.0, cache_hit=True)
+            enemy.set_path(path)
+            return
+        self._queue_search(enemy, start, end, influence_map)
+
+    def _queue_search(self, enemy, start, end, influence_map=None) -> None:
+        """
+        Queues a search for an enemy in the worker processes or the time-sliced scheduler.
+        The worker processes read the danger costs last published in update_enemies_pathfinding.
+        """
+        if self.pathfinding_service is not None:
+            self.pathfinding_service.request(enemy, self.level, start, end, self.grid_version,
+                                             influence_map is not None)
+        else:
+            cost_field = influence_map.cost if influence_map is not None else None
+            self.path_scheduler.request(enemy, start, end, cost_field)
+
+    def _collect_paths(self) -> None:
+        """
+        Hands the paths of finished searches to their enemies, running this frame's time slices first.
+        """
+        finished = []
+        if self.pathfinding_service is not None:
+            # Worker process searches aren't recorded in path_metrics, their time isn't spent in the frame
+            finished = [(enemy, start, end, path) for enemy, start, end, version, path
+                        in self.pathfinding_service.poll() if version == self.grid_version]
+        elif self.path_scheduler is not None:
+            for enemy, search in self.path_scheduler.run():
+                path_metrics.record(id(enemy), search.expanded, search.open_peak, search.time_ms)
+                finished.append((enemy, search.start, search.end, search.path))
+        for enemy, start, end, path in finished:
+            # Unreachable goals are cached too, so they aren't searched again every frame
+            self.path_cache.put(self.level, self.grid_version, start, end, path)
+            enemies = [enemy]
+            shared = self.path_followers.pop(enemy, None)
+            if shared is not None and shared[:2] == (start, end):
+                enemies += shared[2]
+            for waiting in enemies:
+                if waiting in self.enemies_list:
+                    waiting.set_path(path)
+
+    def nearest_reachable_cell(self, start, goal):
+        """
+        Returns the cell closest to goal that can be reached from start, goal itself if it is reachable.
+        """
+        return self.reachability.nearest_reachable(start, goal)
+
+    def bump_grid_version(self, blocked=(), opened=()) -> None:
+        """
+        Marks the level grid as changed after the obstacle overlay blocked or opened cells.
+
+        Only what the change touches is repaired: cached paths away from the
+        changed cells move to the new version, the JPS table, the HPA* abstraction
+        and every D* Lite planner update just those cells, the ALT tables are
+        recomputed when cells open, and enemies whose path now crosses a blocked
+        cell drop it and plan again.
+
+        Args:
+            blocked: The (row, column) cells that were blocked.
+            opened: The (row, column) cells that were opened.
+        """
+        old_version = self.grid_version
+        self.grid_version += 1
+        self.path_context.grid_version = self.grid_version
+        self.path_cache.invalidate_cells(self.level, old_version, self.grid_version, blocked, opened)
+        changed = list(blocked) + list(opened)
+        # Only the cached sight lines crossing a changed cell have to be traced again
+        get_visibility(self.level_grid).invalidate_cells(changed)
+        # Opening or closing a door can join or split components
+        self.reachability.rebuild()
+        if self.pathfinding_algorithm == "jps":
+            jump_point_search = get_jump_point_search(self.level_grid)
+            for position in changed:
+                jump_point_search.set_walkable(position, position in opened)
+        if self.hierarchy is not None:
+            self.hierarchy.update_cells(changed)
+        if self.navmesh is not None:
+            self.navmesh.update_cells(changed)
+        if self.landmarks is not None and opened:
+            # Paths through an opened cell can be shorter than the landmark tables say
+            self.landmarks.rebuild()
+        self._sync_distance_oracle()
         for enemy in self.enemies_list:
-            enemy_positions.append(enemy.enemy_array_pos)
+            if enemy.incremental_planner is not None:
+                enemy.incremental_planner.update_cells(changed)
+        if blocked:
+            self._drop_blocked_paths()
+        # Searches started on the old grid would give out of date paths
+        if self.path_scheduler is not None:
+            self.path_scheduler.clear()
+            self.path_followers.clear()
+        if self.pathfinding_service is not None:
+            self.pathfinding_service.cancel_all()
+            self.pathfinding_service.publish_grid(self.level, self.obstacles.grid())
+
+    def _drop_blocked_paths(self) -> None:
+        """
+        Clears the path of every enemy whose remaining path crosses a blocked cell, so it plans a new one.
+        """
+        search = get_grid_search(self.level_grid)
         for enemy in self.enemies_list:
-            enemy.run_a_star(self.level_grid, self.player.grid_pos, enemy_positions)
+            if not enemy.plans_on_grid:
+                continue
+            waypoints = [tuple(enemy.enemy_array_pos)] + list(enemy.current_path)
+            # Smoothed paths skip cells, so every straight segment between waypoints is checked
+            if any(not has_line_of_sight(search, a, b) for a, b in zip(waypoints, waypoints[1:])):
+                # Replaced rather than cleared, so an EnemySwarm sees the change
+                enemy.current_path = deque()
+                enemy.last_player_pos = [0, 0]
+
+    def _plans_with_danger_costs(self) -> bool:
+        """
+        Returns whether the level's planner adds the influence map's costs to its paths,
+        which the oracle only does while it has no table and falls back to A*.
+        """
+        if self.pathfinding_algorithm == "oracle":
+            return self.distance_oracle is None
+        return self.pathfinding_algorithm in COST_AWARE_PLANNERS
+
+    def _sync_distance_oracle(self) -> None:
+        """
+        Loads the all-pairs table on oracle levels while no door blocks a cell and unloads it otherwise,
+        since the table is built from the static map. Without it the oracle planner falls back to A*.
+        """
+        if self.pathfinding_algorithm != "oracle":
+            return
+        if self.obstacles.blocked_cells():
+            unload_distance_oracle(self.level_grid)
+            self.distance_oracle = None
+        elif self.distance_oracle is None:
+            self.distance_oracle = load_distance_oracle(self.level_grid, self.handler.levels_paths[self.level - 1])
+
+    def _check_obstacles(self) -> None:
+        """
+        Bumps the grid version when a door or laser door opening or closing changes cells.
+        """
+        blocked, opened = self.obstacles.update({obstacle: self._blocks_enemies(obstacle)
+                                                 for obstacle in self._dynamic_obstacles()})
+        if blocked or opened:
+            self.bump_grid_version(blocked, opened)
 
     def reset_player_and_enemies(self) -> None:
         """
@@ -347,6 +784,13 @@ class Game:
             self.respawn = False
             self.player = Player(self.player_settings, self.handler, lives-1)
             self.enemies_list = self.handler.create_enemy_group()
+            self._setup_swarm()
+            # The searches belonged to the old enemies
+            if self.path_scheduler is not None:
+                self.path_scheduler.clear()
+                self.path_followers.clear()
+            if self.pathfinding_service is not None:
+                self.pathfinding_service.cancel_all()
         else:
             if not self.player.die and not self.channel.get_busy():  # If the channel is not playing anything
                 self.channel.play(self.die_sound)
@@ -364,14 +808,16 @@ class Game:
 
         # Mapping of debug settings to their corresponding surfaces and positions
         debug_items = {
-            "display_player_stats": (self.player_pos_surface, self.scale(10, 10)),
-            "display_fps": (self.fps_surface, self.scale(10, 40)),
+            "display_player_stats": [(self.player_pos_surface, self.scale(10, 10))],
+            "display_fps": [(self.fps_surface, self.scale(10, 40)), (self.path_metrics_surface, self.scale(10, 70)),
+                            (self.ai_lod_surface, self.scale(10, 100))],
         }
 
         # Iterate through the mapping and draw enabled debug information
-        for setting, (surface, position) in debug_items.items():
+        for setting, items in debug_items.items():
             if self.handler.game_settings.settings["debug_settings"].get(setting, False):
-                self.debug_surface.blit(surface, position)
+                for surface, position in items:
+                    self.debug_surface.blit(surface, position)
 
     def render(self) -> None:
         """
@@ -575,6 +1021,9 @@ class Game:
             for laser_door in self.laser_door:
                 laser_door.update(self.lever)
 
+        # Doors and laser doors that changed state open or block their cells for the pathfinder
+        self._check_obstacles()
+
     def update(self) -> None:
         """
         Main function that runs the game loop.
@@ -6,7 +6,11 @@ from scripts.entities.TileMap import load_scaled_tile_map, get_layer_positions
 from scripts.entities.door_lever import Lever, Door, LaserDoor
 from scripts.entities.coin import Coin
 from scripts.entities.enemy import Enemy
+from scripts.entities.ground_enemy import GroundEnemy
 from scripts.entities.player import Player
+from scripts.game.algorithms.path_cache import PathCache
+from scripts.game.algorithms.pathfinding_service import PathfindingService
+from scripts.game.algorithms.platform_graph import get_platform_graph
 from scripts.game.game_manager import Game
 from scripts.game.game_settings import GameSettings
 from scripts.menus.main_menu import MainMenu
@@ -69,6 +73,11 @@ class Handler:
         self.levels_grids = levels_grids
         self.levels_paths = levels_paths
         self.max_levels = len(levels_paths)
+
+        # Planned paths shared by every level, keyed by level and grid version
+        self.path_cache = PathCache()
+        # Worker processes that plan paths off the game thread, shared by every level
+        self.pathfinding_service = None
         
 
         ## 2. Load Tile Maps ##
@@ -92,6 +101,9 @@ class Handler:
         self.target_progress += self.weights[self.stage_index]
         self.player_settings = self.game_settings.get_player_settings()
         self.enemy_settings = self.game_settings.get_enemy_settings()
+        pathfinding_workers = self.enemy_settings.get("pathfinding_workers", 0)
+        if pathfinding_workers > 0:
+            self.pathfinding_service = PathfindingService(pathfinding_workers)
 
         ## 4. Creating Player and Enemies ##
         self.stage_index += 1
@@ -215,9 +227,21 @@ class Handler:
         """
         Creates a list of enemies for the specified level.
         """
-        enemy_positions = get_layer_positions(self.levels_paths[self.level-1], "enemies", 1, 1)
+        level_path = self.levels_paths[self.level-1]
+        enemy_positions = get_layer_positions(level_path, "enemies", 1, 1)
         curr_level_grid = self.levels_grids[self.level-1]
-        return [Enemy(pos, curr_level_grid, self.enemy_settings, self, self.stretched) for pos in enemy_positions]
+        enemies = [Enemy(pos, curr_level_grid, self.enemy_settings, self, self.stretched) for pos in enemy_positions]
+
+        # Levels can also place enemies that walk and jump like the player, on an optional layer
+        try:
+            ground_positions = get_layer_positions(level_path, "ground_enemies", 1, 1)
+        except ValueError:
+            ground_positions = []
+        if ground_positions:
+            platform_graph = get_platform_graph(curr_level_grid, level_path, self.player_settings["movement"])
+            enemies += [GroundEnemy(pos, curr_level_grid, self.enemy_settings, self, self.stretched, platform_graph)
+                        for pos in ground_positions]
+        return enemies
 
     def create_coin_group(self) -> List[Coin]:
         """
@@ -0,0 +1,203 @@
+"""
+Shared checks for the pathfinding tests: a plain Dijkstra reference, a path validator and random grids.
+
+Run the tests from the repository root with: python -m pytest -q
+"""
+from __future__ import annotations
+
+import heapq
+import random
+from typing import Dict, List, Optional, Sequence, Tuple
+from unittest import mock
+
+import pygame
+
+from scripts.game.algorithms.grid_search import DIAGONAL_COST, ORTHOGONAL_COST, get_grid_search
+from scripts.game.algorithms.influence_map import InfluenceMap
+from scripts.game.algorithms.pathfinding import get_neighbours
+
+Cell = Tuple[int, int]
+Maze = List[List[int]]
+
+# Number of random grids every planner is checked on
+GRID_COUNT = 60
+# Queries per random grid
+QUERIES_PER_GRID = 4
+# Path costs are sums of 1 and 1.414, compared with this much slack
+EPSILON = 1e-6
+
+# A corridor three rows high: the middle row is the straight route, the wall row below has a gap at (2, 4)
+CORRIDOR = [
+    [0, 0, 0, 0, 0, 0, 0, 0, 0],
+    [0, 0, 0, 0, 0, 0, 0, 0, 0],
+    [1, 1, 1, 1, 0, 1, 1, 1, 1],
+    [0, 0, 0, 0, 0, 0, 0, 0, 0],
+]
+
+
+def corridor() -> Maze:
+    """
+    Returns a fresh copy of CORRIDOR, so changes to its GridSearch don't leak into other tests.
+    """
+    return [row[:] for row in CORRIDOR]
+
+
+class FullHdHandler:
+    """
+    The part of the game handler an Enemy reads: a 1920x1080 screen, so a tile is 30 pixels.
+    """
+    game_screen = pygame.Surface((1920, 1080))
+
+
+def make_enemy(maze: Maze, cell: Cell, speed: float = 2):
+    """
+    Returns an Enemy standing on a (row, column) cell, with blank animation frames instead of the bat images.
+    """
+    from scripts.entities.enemy import Enemy
+
+    settings = {"enemy_speed": speed, "enemy_colour": [255, 0, 0]}
+    with mock.patch.object(pygame.image, "load", lambda _: pygame.Surface((30, 30))):
+        enemy = Enemy((cell[1], cell[0]), maze, settings, FullHdHandler, False)
+    enemy.update_pos()
+    return enemy
+
+
+def reference_cost(maze: Maze, start: Cell, end: Cell,
+                   cost_field: Optional[Sequence[float]] = None) -> Optional[float]:
+    """
+    Returns the cost of the cheapest path with plain Dijkstra over get_neighbours, None if there is none.
+    """
+    width = len(maze[0])
+    best: Dict[Cell, float] = {start: 0.0}
+    open_list = [(0.0, start)]
+    while open_list:
+        cost, cell = heapq.heappop(open_list)
+        if cell == end:
+            return cost
+        if cost > best[cell]:
+            continue
+        for neighbour in get_neighbours(cell, maze):
+            step = DIAGONAL_COST if neighbour[0] != cell[0] and neighbour[1] != cell[1] else ORTHOGONAL_COST
+            if cost_field is not None:
+                step += cost_field[neighbour[0] * width + neighbour[1]]
+            if cost + step < best.get(neighbour, float("inf")):
+                best[neighbour] = cost + step
+                heapq.heappush(open_list, (cost + step, neighbour))
+    return None
+
+
+def path_cost(maze: Maze, path: List[Cell], start: Cell, end: Cell,
+              cost_field: Optional[Sequence[float]] = None) -> float:
+    """
+    Returns the cost of a path, checking that it runs from start to end in legal moves.
+    """
+    assert path[0] == tuple(start) and path[-1] == tuple(end)
+    width = len(maze[0])
+    cost = 0.0
+    for cell, neighbour in zip(path, path[1:]):
+        assert neighbour in get_neighbours(cell, maze), f"illegal move {cell} -> {neighbour}"
+        cost += DIAGONAL_COST if neighbour[0] != cell[0] and neighbour[1] != cell[1] else ORTHOGONAL_COST
+        if cost_field is not None:
+            cost += cost_field[neighbour[0] * width + neighbour[1]]
+    return cost
+
+
+def random_cases(seed: int) -> List[Tuple[Maze, List[Tuple[Cell, Cell]]]]:
+    """
+    Returns random grids, each with a few queries between open cells.
+
+    Keep the grids alive while they are searched, the per-grid caches are keyed by id(maze).
+    """
+    rng = random.Random(seed)
+    cases = []
+    while len(cases) < GRID_COUNT:
+        height, width = rng.randint(6, 28), rng.randint(6, 28)
+        maze = [[1 if rng.random() < 0.25 else 0 for _ in range(width)] for _ in range(height)]
+        open_cells = [(row, column) for row, line in enumerate(maze) for column, value in enumerate(line) if value == 0]
+        if len(open_cells) < 2:
+            continue
+        cases.append((maze, [(rng.choice(open_cells), rng.choice(open_cells)) for _ in range(QUERIES_PER_GRID)]))
+    return cases
+
+
+def stamped_maps(cases, seed) -> List[InfluenceMap]:
+    """
+    Returns an InfluenceMap per grid with a few enemies stamped at random cells.
+    """
+    rng = random.Random(seed)
+    maps = []
+    for maze, _ in cases:
+        influence_map = InfluenceMap(maze, danger_radius=4)
+        for index in range(3):
+            influence_map.stamp(index, (rng.randrange(len(maze)), rng.randrange(len(maze[0]))))
+        maps.append(influence_map)
+    return maps
+
+
+def assert_matches_reference(planner, cases, cost_fields=None) -> None:
+    """
+    Checks that a planner finds a path exactly when Dijkstra does, and that it is as cheap.
+
+    Args:
+        planner: Called as planner(maze, start, end) or, with cost fields, planner(maze, start, end, influence_map).
+        cases: The grids and queries from random_cases.
+        cost_fields: An InfluenceMap per grid, None to plan without danger costs.
+    """
+    for index, (maze, queries) in enumerate(cases):
+        influence_map = cost_fields[index] if cost_fields is not None else None
+        cost_field = influence_map.cost if influence_map is not None else None
+        for start, end in queries:
+            expected = reference_cost(maze, start, end, cost_field)
+            path = planner(maze, start, end, influence_map) if influence_map is not None else planner(maze, start, end)
+            if expected is None:
+                assert path == [], f"{start} -> {end} has no path"
+            else:
+                assert abs(path_cost(maze, path, start, end, cost_field) - expected) <= EPSILON
+
+
+def assert_close_to_reference(planner, cases, ratio: float, extra: float) -> None:
+    """
+    Checks a planner whose paths may be longer than the shortest: never cheaper than Dijkstra,
+    at most ratio times its cost plus extra.
+    """
+    for maze, queries in cases:
+        for start, end in queries:
+            expected = reference_cost(maze, start, end)
+            path = planner(maze, start, end)
+            if expected is None:
+                assert path == [], f"{start} -> {end} has no path"
+                continue
+            cost = path_cost(maze, path, start, end)
+            assert expected - EPSILON <= cost <= expected * ratio + extra
+
+
+def toggled_cases(cases, planner_update):
+    """
+    Blocks a cell in the middle of the first path of each grid, then opens it again, checking the planner
+    against the Dijkstra reference on a copy of the grid in both states.
+
+    Args:
+        cases: The grids and queries from random_cases.
+        planner_update: Called as planner_update(maze, positions, walkable) after the level's
+            GridSearch changed, so the planner can repair its own tables. Returns the planner to check.
+    """
+    for maze, queries in cases:
+        start, end = queries[0]
+        path = get_grid_search(maze).find_path(start, end)
+        if len(path) < 3:
+            continue
+        cell = path[len(path) // 2]
+        walled = [row[:] for row in maze]
+        walled[cell[0]][cell[1]] = 1
+        for walkable, reference in ((False, walled), (True, maze)):
+            get_grid_search(maze).set_walkable(cell, walkable)
+            planner = planner_update(maze, [cell], walkable)
+            for query_start, query_end in queries:
+                if cell in (query_start, query_end):
+                    continue
+                expected = reference_cost(reference, query_start, query_end)
+                found = planner(maze, query_start, query_end)
+                if expected is None:
+                    assert found == []
+                else:
+                    assert abs(path_cost(reference, found, query_start, query_end) - expected) <= EPSILON
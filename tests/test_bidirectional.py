@@ -0,0 +1,17 @@
+import pytest
+
+from scripts.game.algorithms.pathfinding import bidirectional_a_star
+from tests.helpers import assert_matches_reference, random_cases, stamped_maps
+
+
+@pytest.fixture(scope="module")
+def cases():
+    return random_cases(2024)
+
+
+def test_bidirectional_a_star_matches_dijkstra(cases):
+    assert_matches_reference(bidirectional_a_star, cases)
+
+
+def test_bidirectional_a_star_with_influence_map_matches_dijkstra(cases):
+    assert_matches_reference(bidirectional_a_star, cases, stamped_maps(cases, "bidirectional"))
@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+from scripts.game.algorithms.bucket_queue import KEY_SCALE, BucketQueue
+from scripts.game.algorithms.grid_search import get_grid_search
+from tests.helpers import assert_close_to_reference, random_cases
+from tests.test_flow_field import assert_field_matches_dijkstra
+
+
+@pytest.fixture(scope="module")
+def cases():
+    return random_cases(2024)
+
+
+def bucket_search(maze, start, end):
+    return get_grid_search(maze).find_path(start, end, use_buckets=True)
+
+
+def test_bucket_a_star_is_close_to_dijkstra(cases):
+    # Keys are rounded to hundredths, so ties can be broken the wrong way by a little
+    assert_close_to_reference(bucket_search, cases, 1.0, 0.5)
+
+
+@pytest.mark.parametrize("with_danger", [False, True])
+def test_bucket_flow_field_matches_dijkstra(cases, with_danger):
+    assert_field_matches_dijkstra(cases, with_danger, use_buckets=True)
+
+
+def test_bucket_queue_pops_in_key_order_after_lowered_keys():
+    rng = random.Random(16)
+    queue = BucketQueue(100)
+    # Like a search, the first key pushed is the lowest one
+    keys = {0: 0.0}
+    queue.push(0, 0.0)
+    for cell in range(1, 100):
+        keys[cell] = rng.randrange(50, 500) / KEY_SCALE
+        queue.push(cell, keys[cell])
+    for cell in range(4, 100, 4):
+        keys[cell] = max(keys[cell] - 1.0, 0.5)
+        queue.push(cell, keys[cell])
+    # A larger key doesn't replace the queued one
+    queue.push(1, keys[1] + 3.0)
+
+    popped = []
+    while queue:
+        popped.append(queue.pop())
+    assert sorted(popped) == list(range(100))
+    assert [keys[cell] for cell in popped] == sorted(keys.values())
+    assert 5 not in queue
@@ -0,0 +1,39 @@
+import time
+
+import pytest
+
+from scripts.game.algorithms import pathfinding
+from scripts.game.algorithms.pathfinding import a_star, is_partial_path, plan_paths, split_deadline
+from tests.helpers import EPSILON, path_cost, random_cases, reference_cost
+
+
+def test_split_deadline_shares_the_time_left(monkeypatch):
+    monkeypatch.setattr(pathfinding.time, "perf_counter", lambda: 10.0)
+    assert split_deadline(None, 1, 4) is None
+    assert split_deadline(12.0, 1, 4) == pytest.approx(10.5)
+    assert split_deadline(12.0, 2, 4) == pytest.approx(11.0)
+    # The last queries get whatever is left
+    assert split_deadline(12.0, 3, 3) == 12.0
+    # A passed deadline leaves nothing to share
+    assert split_deadline(9.0, 1, 2) == pytest.approx(10.0)
+
+
+def test_passed_deadline_gives_a_partial_path():
+    maze = [[0] * 40 for _ in range(40)]
+    path = a_star(maze, (0, 0), (39, 39), deadline=time.perf_counter() - 1)
+    assert path[0] == (0, 0)
+    assert is_partial_path(path, (39, 39))
+
+
+def test_batch_with_time_to_spare_plans_shortest_paths():
+    maze, queries = random_cases(17)[0]
+    goal = queries[0][1]
+    starts = [start for start, _ in queries]
+    paths, stats = plan_paths(maze, starts, goal, deadline=time.perf_counter() + 60)
+    for start, path, query in zip(starts, paths, stats):
+        expected = reference_cost(maze, start, goal)
+        if expected is None:
+            assert path == []
+        else:
+            assert not query["partial"]
+            assert abs(path_cost(maze, path, start, goal) - expected) <= EPSILON
@@ -0,0 +1,63 @@
+import pytest
+
+from scripts.game.algorithms.distance_oracle import (build_table, get_distance_oracle, load_distance_oracle,
+                                                     unload_distance_oracle)
+from scripts.game.algorithms.pathfinding import distance_oracle_search
+from tests.helpers import EPSILON, path_cost, random_cases, reference_cost
+
+
+@pytest.fixture(scope="module")
+def cases():
+    return random_cases(2024)
+
+
+def write_level(tmp_path, name, maze):
+    """
+    Writes a stand-in TMX file for a grid, the table only stores its hash.
+    """
+    tmx_path = tmp_path / f"{name}.tmx"
+    tmx_path.write_text(str(maze))
+    return str(tmx_path)
+
+
+def test_distance_oracle_matches_dijkstra(cases, tmp_path):
+    for index, (maze, queries) in enumerate(cases[:10]):
+        tmx_path = write_level(tmp_path, f"level{index}", maze)
+        build_table(tmx_path, maze)
+        assert load_distance_oracle(maze, tmx_path) is not None
+        try:
+            for start, end in queries:
+                expected = reference_cost(maze, start, end)
+                path = distance_oracle_search(maze, start, end)
+                if expected is None:
+                    assert path == []
+                else:
+                    assert path_cost(maze, path, start, end) == pytest.approx(expected, abs=EPSILON)
+        finally:
+            unload_distance_oracle(maze)
+        assert get_distance_oracle(maze) is None
+
+
+def test_cell_ids_past_the_uint16_range(tmp_path):
+    # Few open cells, but the last ones have ids above 0xFFFF
+    maze = [[1] * 300 for _ in range(300)]
+    for column in range(290, 300):
+        maze[299][column] = 0
+    tmx_path = write_level(tmp_path, "wide", maze)
+    build_table(tmx_path, maze)
+    try:
+        assert load_distance_oracle(maze, tmx_path) is not None
+        assert distance_oracle_search(maze, (299, 290), (299, 293)) == [(299, 290), (299, 291), (299, 292), (299, 293)]
+    finally:
+        unload_distance_oracle(maze)
+
+
+def test_out_of_date_table_is_not_loaded(cases, tmp_path, capsys):
+    maze, _ = cases[0]
+    tmx_path = write_level(tmp_path, "changed", maze)
+    build_table(tmx_path, maze)
+    # Same grid, but the TMX file changed since the table was built
+    write_level(tmp_path, "changed", [row + [1] for row in maze])
+    assert load_distance_oracle(maze, tmx_path) is None
+    assert get_distance_oracle(maze) is None
+    assert capsys.readouterr().out == ""
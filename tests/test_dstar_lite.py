@@ -0,0 +1,42 @@
+import pytest
+
+from scripts.game.algorithms.dstar_lite import DStarLite
+from scripts.game.algorithms.grid_search import get_grid_search
+from tests.helpers import assert_matches_reference, random_cases, toggled_cases
+
+
+@pytest.fixture(scope="module")
+def cases():
+    return random_cases(2024)
+
+
+def test_fresh_planner_matches_dijkstra(cases):
+    assert_matches_reference(lambda maze, start, end: DStarLite(get_grid_search(maze)).find_path(start, end), cases)
+
+
+def test_reused_planner_matches_dijkstra(cases):
+    # One planner per grid, so every query after the first repairs the previous search
+    planners = {}
+
+    def planner(maze, start, end):
+        if id(maze) not in planners:
+            planners[id(maze)] = DStarLite(get_grid_search(maze))
+        return planners[id(maze)].find_path(start, end)
+
+    assert_matches_reference(planner, cases)
+
+
+def test_planner_repairs_its_search_after_a_cell_toggles():
+    planners = {}
+
+    def update(maze, positions, walkable):
+        dstar = planners[id(maze)]
+        dstar.update_cells(positions)
+        return lambda maze, start, end: dstar.find_path(start, end)
+
+    cases = random_cases(7)
+    # Plan once on the open grid, so the toggles have a search to repair
+    for maze, queries in cases:
+        planners[id(maze)] = DStarLite(get_grid_search(maze))
+        planners[id(maze)].find_path(*queries[0])
+    toggled_cases(cases, update)
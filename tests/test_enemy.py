@@ -0,0 +1,33 @@
+from collections import deque
+
+from tests.helpers import make_enemy
+
+# A corridor along the top row with a shaft going down at column 2
+SHAFT = [
+    [0, 0, 0, 0, 0, 0],
+    [1, 1, 0, 1, 1, 1],
+    [1, 1, 0, 1, 1, 1],
+    [1, 1, 0, 1, 1, 1],
+]
+
+
+def overlaps_wall(maze, rect) -> bool:
+    return any(maze[row][column] == 1
+               for row in range(rect.top // 30, (rect.bottom - 1) // 30 + 1)
+               for column in range(rect.left // 30, (rect.right - 1) // 30 + 1))
+
+
+def test_enemy_turns_on_the_waypoint_not_when_entering_its_cell():
+    enemy = make_enemy(SHAFT, (0, 5), speed=7)
+    enemy.current_path = deque([(0, 2), (3, 2)])
+    for _ in range(100):
+        if not enemy.current_path:
+            break
+        row, column = enemy.current_path[0]
+        enemy.update(SHAFT, [3, 2], 1.0)
+        assert not overlaps_wall(SHAFT, enemy.rect), enemy.rect
+        if not enemy.current_path or enemy.current_path[0] != (row, column):
+            # The waypoint is only dropped once the rect is on its corner
+            assert (enemy.rect.x, enemy.rect.y) == (column * 30, row * 30)
+    assert not enemy.current_path
+    assert enemy.enemy_array_pos == [3, 2]
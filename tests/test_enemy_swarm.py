@@ -0,0 +1,60 @@
+import random
+from collections import deque
+
+from scripts.entities.enemy_swarm import EnemySwarm
+from tests.helpers import make_enemy, random_cases
+
+
+def movement(enemy):
+    return (tuple(enemy.rect), tuple(enemy.enemy_array_pos), round(enemy.acc_dx, 9), round(enemy.acc_dy, 9),
+            enemy.flip_animation, tuple(enemy.current_path))
+
+
+def test_swarm_member_moves_through_enemy_move():
+    maze = [[0] * 8 for _ in range(8)]
+    enemy, other = make_enemy(maze, (1, 1), speed=5), make_enemy(maze, (6, 6))
+    swarm = EnemySwarm([enemy, other])
+    enemy.current_path = deque([(1, 6)])
+
+    enemy.move(1.0)
+
+    assert (enemy.rect.x, enemy.rect.y) == (35, 30)
+    assert (swarm.x[0], swarm.y[0]) == (35, 30)
+    assert (other.rect.x, other.rect.y) == (180, 180)
+
+
+def test_swarm_rect_changes_are_written_back():
+    maze = [[0] * 8 for _ in range(8)]
+    enemy = make_enemy(maze, (1, 1))
+    swarm = EnemySwarm([enemy])
+
+    enemy.rect.x += 4
+    enemy.rect.move_ip(0, 2)
+    assert (swarm.x[0], swarm.y[0]) == (34, 32)
+    # A rect made from it is a copy
+    copy = enemy.rect.move(10, 10)
+    copy.x = 0
+    assert (enemy.rect.x, enemy.rect.y) == (34, 32)
+
+
+def test_swarm_step_moves_enemies_like_enemy_update():
+    rng = random.Random(24)
+    maze = max((maze for maze, _ in random_cases(24)), key=lambda grid: len(grid) * len(grid[0]))
+    open_cells = [(row, column) for row, line in enumerate(maze) for column, value in enumerate(line) if value == 0]
+    cells = [rng.choice(open_cells) for _ in range(12)]
+    alone = [make_enemy(maze, cell, speed=3) for cell in cells]
+    members = [make_enemy(maze, cell, speed=3) for cell in cells]
+    swarm = EnemySwarm(members)
+
+    player = list(rng.choice(open_cells))
+    for frame in range(400):
+        if frame % 80 == 0:
+            player = list(rng.choice(open_cells))
+        dt = 1.0 + (frame % 5) / 10
+        for enemy in alone:
+            enemy.update(maze, player, dt)
+        idle = swarm.idle_enemies()
+        swarm.step(dt)
+        for enemy in idle:
+            enemy.update(maze, player, dt)
+        assert [movement(enemy) for enemy in alone] == [movement(enemy) for enemy in members]
@@ -0,0 +1,36 @@
+import pytest
+
+from scripts.game.algorithms.flow_field import FlowField
+from scripts.game.algorithms.influence_map import InfluenceMap
+from tests.helpers import EPSILON, path_cost, random_cases, reference_cost
+
+
+@pytest.fixture(scope="module")
+def cases():
+    return random_cases(2024)
+
+
+def assert_field_matches_dijkstra(cases, with_danger, use_buckets=False):
+    for maze, queries in cases:
+        influence_map = InfluenceMap(maze, danger_radius=4)
+        if with_danger:
+            influence_map.stamp("bat", queries[0][0])
+        cost_field = influence_map.cost if with_danger else None
+        field = FlowField(maze)
+        for start, goal in queries:
+            field.update(goal, cost_field, use_buckets)
+            expected = reference_cost(maze, start, goal, cost_field)
+            distance = field.distance[start[0] * len(maze[0]) + start[1]]
+            if expected is None:
+                assert distance == float("inf") and field.path_from(start) == []
+                continue
+            assert distance == pytest.approx(expected, abs=EPSILON)
+            if start != goal:
+                # Following the field walks a cheapest path
+                path = [start] + field.path_from(start)
+                assert path_cost(maze, path, start, goal, cost_field) == pytest.approx(expected, abs=EPSILON)
+
+
+@pytest.mark.parametrize("with_danger", [False, True])
+def test_flow_field_distances_and_steps_match_dijkstra(cases, with_danger):
+    assert_field_matches_dijkstra(cases, with_danger)
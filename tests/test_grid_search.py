@@ -0,0 +1,55 @@
+import random
+
+import pytest
+
+from scripts.game.algorithms.grid_search import IndexedHeap, get_grid_search
+from scripts.game.algorithms.pathfinding import a_star
+from tests.helpers import assert_matches_reference, corridor, random_cases
+
+
+@pytest.fixture(scope="module")
+def cases():
+    return random_cases(2024)
+
+
+def test_a_star_matches_dijkstra(cases):
+    assert_matches_reference(a_star, cases)
+
+
+def test_a_star_edge_cases():
+    maze = corridor()
+    assert a_star(maze, (1, 1), (1, 1)) == [(1, 1)]
+    # Walls and cells outside the grid can't be reached
+    assert a_star(maze, (1, 1), (2, 0)) == []
+    assert a_star(maze, (1, 1), (9, 9)) == []
+
+
+def test_set_walkable_changes_the_neighbour_lists():
+    maze = corridor()
+    search = get_grid_search(maze)
+    search.set_walkable((2, 4), False)
+    assert a_star(maze, (1, 4), (3, 4)) == []
+    # The level grid itself is left alone
+    assert maze[2][4] == 0
+    search.set_walkable((2, 4), True)
+    assert a_star(maze, (1, 4), (3, 4)) == [(1, 4), (2, 4), (3, 4)]
+
+
+def test_indexed_heap_pops_in_key_order_after_updates():
+    rng = random.Random(7)
+    heap = IndexedHeap(50)
+    keys = {}
+    for cell in range(50):
+        keys[cell] = rng.random() * 100
+        heap.push(cell, keys[cell])
+    for cell in range(0, 50, 3):
+        keys[cell] /= 2
+        heap.update(cell, keys[cell])
+    for cell in range(1, 50, 5):
+        heap.remove(cell)
+        del keys[cell]
+
+    popped = []
+    while heap:
+        popped.append(heap.pop())
+    assert popped == sorted(keys, key=keys.get)
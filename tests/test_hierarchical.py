@@ -0,0 +1,38 @@
+import pytest
+
+from scripts.game.algorithms.hierarchical import get_hierarchical_grid
+from scripts.game.algorithms.pathfinding import hierarchical_search
+from tests.helpers import assert_close_to_reference, path_cost, random_cases, reference_cost
+
+
+@pytest.fixture(scope="module")
+def cases():
+    return random_cases(2024)
+
+
+def test_hierarchical_search_is_close_to_dijkstra(cases):
+    # Paths through cluster entrances can be up to about twice the shortest on these small grids
+    assert_close_to_reference(hierarchical_search, cases, 2.5, 2.0)
+
+
+def test_hierarchical_search_follows_a_toggled_cell():
+    cases = random_cases(7)
+    for maze, _ in cases:
+        get_hierarchical_grid(maze)
+    for maze, queries in cases:
+        start, end = queries[0]
+        path = hierarchical_search(maze, start, end)
+        if len(path) < 3:
+            continue
+        cell = path[len(path) // 2]
+        walled = [row[:] for row in maze]
+        walled[cell[0]][cell[1]] = 1
+        for walkable, reference in ((False, walled), (True, maze)):
+            hierarchy = get_hierarchical_grid(maze)
+            hierarchy.search.set_walkable(cell, walkable)
+            hierarchy.update_cells([cell])
+            found = hierarchical_search(maze, start, end)
+            # The path never uses a blocked cell and is only empty when Dijkstra finds nothing either
+            assert (found == []) == (reference_cost(reference, start, end) is None)
+            if found:
+                path_cost(reference, found, start, end)
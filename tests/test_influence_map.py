@@ -0,0 +1,42 @@
+import pytest
+
+from scripts.game.algorithms.influence_map import DANGER_COST_SCALE, InfluenceMap
+from scripts.game.algorithms.pathfinding import a_star
+from tests.helpers import assert_matches_reference, corridor, random_cases, stamped_maps
+
+
+@pytest.fixture(scope="module")
+def cases():
+    return random_cases(2024)
+
+
+def test_a_star_with_influence_map_matches_dijkstra(cases):
+    assert_matches_reference(a_star, cases, stamped_maps(cases, "a_star"))
+
+
+def test_kernel_adds_the_danger_of_each_enemy():
+    maze = corridor()
+    influence_map = InfluenceMap(maze, danger_radius=3)
+    influence_map.stamp("a", (1, 4))
+    influence_map.stamp("b", (1, 5))
+    width = len(maze[0])
+    # Each enemy adds danger_radius - Manhattan distance
+    assert influence_map.cost[1 * width + 4] == pytest.approx((3 + 2) * DANGER_COST_SCALE)
+    assert influence_map.cost[0 * width + 6] == pytest.approx((0 + 1) * DANGER_COST_SCALE)
+    assert influence_map.cost[1 * width + 0] == 0.0
+
+
+def test_move_and_update_leave_only_the_current_stamps():
+    maze = corridor()
+    influence_map = InfluenceMap(maze, danger_radius=3)
+    influence_map.stamp("a", (0, 0))
+    influence_map.move("a", (3, 8))
+    influence_map.update({"b": (1, 4)})
+
+    expected = InfluenceMap(maze, danger_radius=3)
+    expected.stamp("b", (1, 4))
+    assert influence_map.stamped == {"b": (1, 4)}
+    assert influence_map.cost == pytest.approx(expected.cost)
+
+    influence_map.clear()
+    assert not any(influence_map.cost)
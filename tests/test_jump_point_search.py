@@ -0,0 +1,23 @@
+import pytest
+
+from scripts.game.algorithms.jump_point_search import get_jump_point_search
+from scripts.game.algorithms.pathfinding import jump_point_search
+from tests.helpers import assert_matches_reference, random_cases, toggled_cases
+
+
+@pytest.fixture(scope="module")
+def cases():
+    return random_cases(2024)
+
+
+def test_jump_point_search_matches_dijkstra(cases):
+    assert_matches_reference(jump_point_search, cases)
+
+
+def test_jump_point_search_follows_a_toggled_cell():
+    def update(maze, positions, walkable):
+        for position in positions:
+            get_jump_point_search(maze).set_walkable(position, walkable)
+        return jump_point_search
+
+    toggled_cases(random_cases(7), update)
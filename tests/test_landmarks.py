@@ -0,0 +1,29 @@
+import pytest
+
+from scripts.game.algorithms.landmarks import get_landmark_heuristic
+from scripts.game.algorithms.pathfinding import landmark_a_star
+from tests.helpers import assert_matches_reference, random_cases, stamped_maps, toggled_cases
+
+
+@pytest.fixture(scope="module")
+def cases():
+    return random_cases(2024)
+
+
+def test_landmark_a_star_matches_dijkstra(cases):
+    assert_matches_reference(landmark_a_star, cases)
+
+
+def test_landmark_a_star_with_influence_map_matches_dijkstra(cases):
+    assert_matches_reference(landmark_a_star, cases, stamped_maps(cases, "alt"))
+
+
+def test_landmark_tables_are_rebuilt_when_a_cell_opens():
+    def update(maze, positions, walkable):
+        # The tables are first built while the cell is blocked
+        landmarks = get_landmark_heuristic(maze)
+        if walkable:
+            landmarks.rebuild()
+        return landmark_a_star
+
+    toggled_cases(random_cases(7), update)
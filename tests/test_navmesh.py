@@ -0,0 +1,31 @@
+import pytest
+
+from scripts.game.algorithms.grid_search import get_grid_search
+from scripts.game.algorithms.navmesh import get_navmesh
+from scripts.game.algorithms.pathfinding import navmesh_search
+from tests.helpers import assert_close_to_reference, corridor, path_cost, random_cases, reference_cost
+
+
+@pytest.fixture(scope="module")
+def cases():
+    return random_cases(2024)
+
+
+def test_navmesh_search_is_close_to_dijkstra(cases):
+    # Paths bend at the rectangle portals, so they can be a little longer than the shortest
+    assert_close_to_reference(navmesh_search, cases, 1.5, 2.0)
+
+
+def test_navmesh_follows_a_toggled_cell():
+    maze = corridor()
+    navmesh = get_navmesh(maze)
+    start, end = (1, 4), (3, 4)
+
+    get_grid_search(maze).set_walkable((2, 4), False)
+    navmesh.update_cells([(2, 4)])
+    assert navmesh_search(maze, start, end) == []
+
+    get_grid_search(maze).set_walkable((2, 4), True)
+    navmesh.update_cells([(2, 4)])
+    path = navmesh_search(maze, start, end)
+    assert path_cost(maze, path, start, end) == pytest.approx(reference_cost(maze, start, end))
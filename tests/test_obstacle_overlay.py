@@ -0,0 +1,84 @@
+import pytest
+
+from scripts.game.algorithms.dstar_lite import DStarLite
+from scripts.game.algorithms.grid_search import get_grid_search
+from scripts.game.algorithms.obstacle_overlay import ObstacleOverlay
+from scripts.game.algorithms.path_cache import PathCache
+from scripts.game.algorithms.pathfinding import a_star
+from tests.helpers import EPSILON, corridor, path_cost, reference_cost
+
+
+def test_overlay_blocks_and_opens_a_cell():
+    maze = corridor()
+    overlay = ObstacleOverlay(maze)
+    # (2, 0) is a static wall, it is never changed by the overlay
+    blocked, opened = overlay.add("door", [(2, 4), (2, 0), (9, 9)], closed=True)
+
+    assert (blocked, opened) == ([(2, 4)], [])
+    assert overlay.version == 1
+    assert overlay.blocked_cells() == [(2, 4)]
+    assert overlay.grid()[2][4] == 1 and maze[2][4] == 0
+    assert a_star(maze, (1, 4), (3, 4)) == []
+
+    blocked, opened = overlay.update({"door": False})
+
+    assert (blocked, opened) == ([], [(2, 4)])
+    assert overlay.version == 2
+    assert overlay.blocked_cells() == []
+    assert path_cost(maze, a_star(maze, (1, 4), (3, 4)), (1, 4), (3, 4)) == pytest.approx(2.0)
+    # An update that changes nothing keeps the version
+    assert overlay.update({"door": False}) == ([], [])
+    assert overlay.version == 2
+
+
+def test_path_cache_drops_paths_through_a_blocked_cell():
+    maze = corridor()
+    cache = PathCache()
+    through = a_star(maze, (1, 0), (1, 8))
+    far = a_star(maze, (3, 0), (3, 2))
+    cache.put("level", 0, (1, 0), (1, 8), through)
+    cache.put("level", 0, (3, 0), (3, 2), far)
+
+    kept = cache.invalidate_cells("level", 0, 1, blocked=[through[4]])
+
+    assert kept == 1
+    assert cache.get("level", 1, (1, 0), (1, 8)) is None
+    assert cache.get("level", 1, (3, 0), (3, 2)) == far
+    # Nothing of the old version is left
+    assert cache.get("level", 0, (3, 0), (3, 2)) is None
+
+
+def test_path_cache_drops_paths_an_opened_cell_can_shorten():
+    maze = corridor()
+    maze[2][4] = 1
+    cache = PathCache()
+    around = a_star(maze, (1, 4), (3, 4))
+    cache.put("level", 0, (1, 4), (3, 4), around)
+    cache.put("level", 0, (0, 0), (0, 2), a_star(maze, (0, 0), (0, 2)))
+    cache.put("level", 0, (1, 4), (1, 5), [])
+
+    kept = cache.invalidate_cells("level", 0, 1, opened=[(2, 4)])
+
+    # The detour could go through the gap now, the short path far away can't, the empty path may be reachable
+    assert kept == 1
+    assert cache.get("level", 1, (1, 4), (3, 4)) is None
+    assert cache.get("level", 1, (0, 0), (0, 2)) == [(0, 0), (0, 1), (0, 2)]
+    assert cache.get("level", 1, (1, 4), (1, 5)) is None
+
+
+def test_dstar_lite_follows_the_overlay():
+    maze = corridor()
+    overlay = ObstacleOverlay(maze)
+    overlay.add("door", [(2, 4)])
+    planner = DStarLite(get_grid_search(maze))
+    start, end = (0, 0), (3, 8)
+    assert (2, 4) in planner.find_path(start, end)
+
+    blocked, opened = overlay.update({"door": True})
+    planner.update_cells(blocked + opened)
+    assert planner.find_path(start, end) == []
+
+    blocked, opened = overlay.update({"door": False})
+    planner.update_cells(blocked + opened)
+    path = planner.find_path(start, end)
+    assert path_cost(maze, path, start, end) == pytest.approx(reference_cost(maze, start, end), abs=EPSILON)
@@ -0,0 +1,55 @@
+from scripts.game.algorithms.influence_map import InfluenceMap
+from scripts.game.algorithms.path_cache import PathCache
+from scripts.game.algorithms.pathfinding import a_star
+from tests.helpers import corridor
+
+
+def test_least_recently_used_path_is_evicted():
+    cache = PathCache(capacity=2)
+    cache.put("level", 0, (0, 0), (0, 1), [(0, 0), (0, 1)])
+    cache.put("level", 0, (0, 0), (0, 2), [(0, 0), (0, 1), (0, 2)])
+    # Reading the first path makes the second the least recently used
+    assert cache.get("level", 0, (0, 0), (0, 1)) == [(0, 0), (0, 1)]
+    cache.put("level", 0, (0, 0), (0, 3), [])
+
+    assert len(cache) == 2 and cache.evictions == 1
+    assert cache.get("level", 0, (0, 0), (0, 2)) is None
+    assert cache.get("level", 0, (0, 0), (0, 3)) == []
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_paths_are_kept_per_level_and_grid_version():
+    cache = PathCache()
+    cache.put("level", 0, (0, 0), (0, 1), [(0, 0), (0, 1)])
+    cache.put("other", 0, (0, 0), (0, 1), [(0, 0), (0, 1)])
+    assert cache.get("level", 1, (0, 0), (0, 1)) is None
+
+    cache.invalidate("level", current_version=1)
+    assert cache.get("level", 0, (0, 0), (0, 1)) is None
+    assert cache.get("other", 0, (0, 0), (0, 1)) == [(0, 0), (0, 1)]
+
+
+def test_callers_get_their_own_copy():
+    cache = PathCache()
+    cache.put("level", 0, (0, 0), (0, 1), [(0, 0), (0, 1)])
+    cache.get("level", 0, (0, 0), (0, 1)).pop()
+    assert cache.get("level", 0, (0, 0), (0, 1)) == [(0, 0), (0, 1)]
+
+
+def test_paths_through_changed_danger_are_dropped():
+    maze = corridor()
+    cache = PathCache()
+    influence_map = InfluenceMap(maze, danger_radius=2)
+    influence_map.stamp("bat", (0, 0))
+    influence_map.take_changed_cells()
+    cache.put("level", 0, (1, 0), (1, 8), a_star(maze, (1, 0), (1, 8), influence_map))
+    cache.put("level", 0, (3, 5), (3, 8), a_star(maze, (3, 5), (3, 8), influence_map))
+
+    influence_map.move("bat", (0, 1))
+    changed = influence_map.take_changed_cells()
+
+    assert (0, 0) in changed and (1, 1) in changed and (3, 8) not in changed
+    assert cache.invalidate_through("level", changed) == 1
+    assert cache.get("level", 0, (1, 0), (1, 8)) is None
+    assert cache.get("level", 0, (3, 5), (3, 8)) is not None
+    assert influence_map.take_changed_cells() == set()
@@ -0,0 +1,85 @@
+import logging
+import time
+
+import pytest
+
+from scripts.game.algorithms.influence_map import InfluenceMap
+from scripts.game.algorithms.pathfinding import a_star
+from scripts.game.algorithms.pathfinding_service import PathfindingService
+from tests.helpers import corridor
+
+
+@pytest.fixture
+def service():
+    service = PathfindingService(max_workers=1)
+    yield service
+    service.shutdown()
+
+
+def poll_all(service, timeout=10.0):
+    """
+    Polls until every pending request is done, returning the finished ones by owner.
+    """
+    finished = {}
+    stop = time.perf_counter() + timeout
+    while service.pending and time.perf_counter() < stop:
+        finished.update((owner, result) for owner, *result in service.poll())
+        time.sleep(0.01)
+    assert not service.pending
+    return finished
+
+
+def test_paths_match_a_star_with_and_without_costs(service):
+    maze = corridor()
+    influence_map = InfluenceMap(maze, danger_radius=3)
+    influence_map.stamp("bat", (1, 2))
+    service.publish_grid("level", maze)
+    service.publish_costs("level", influence_map.cost)
+    service.request("plain", "level", (0, 0), (3, 8), version=4)
+    service.request("danger", "level", (0, 0), (3, 8), version=4, use_costs=True)
+
+    finished = poll_all(service)
+
+    assert finished["plain"] == [(0, 0), (3, 8), 4, a_star(maze, (0, 0), (3, 8))]
+    assert finished["danger"][3] == a_star(maze, (0, 0), (3, 8), influence_map)
+
+
+def test_replaced_blocks_outlive_the_requests_sent_with_them(service):
+    maze = corridor()
+    service.publish_grid("level", maze)
+    service.publish_costs("level", [0.0] * 36)
+    owners = [f"enemy{index}" for index in range(6)]
+    for owner in owners:
+        service.request(owner, "level", (0, 0), (3, 8), use_costs=True)
+    # Republished while the requests are still queued
+    blocked = corridor()
+    blocked[2][4] = 1
+    service.publish_grid("level", blocked)
+    service.publish_costs("level", [1.0] * 36)
+    service.request("late", "level", (0, 0), (3, 8), use_costs=True)
+
+    finished = poll_all(service)
+
+    assert service.failures == 0
+    assert all(finished[owner][3] == a_star(maze, (0, 0), (3, 8)) for owner in owners)
+    assert finished["late"][3] == []
+    # Only the current grid and costs are left in shared memory
+    service.poll()
+    assert service.retired == []
+    assert set(service.blocks) == {service.grids["level"][1], service.costs["level"][1]}
+
+
+def test_worker_errors_are_counted_and_logged(service, caplog):
+    service.publish_grid("level", corridor())
+    # A handle to a block that doesn't exist makes the worker raise
+    level_id, name, height, width = service.grids["level"]
+    service.grids["level"] = (level_id, "missing_block", height, width)
+    service.block_users["missing_block"] = []
+    service.request("enemy", "level", (0, 0), (3, 8))
+
+    with caplog.at_level(logging.WARNING):
+        finished = poll_all(service)
+
+    assert finished == {}
+    assert service.failures == 1
+    assert "failed in a worker process" in caplog.text
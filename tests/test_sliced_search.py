@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from scripts.game.algorithms.grid_search import get_grid_search
+from scripts.game.algorithms.influence_map import InfluenceMap
+from scripts.game.algorithms.sliced_search import PathScheduler, SlicedSearch
+from tests.helpers import assert_matches_reference, corridor, random_cases
+
+
+@pytest.fixture(scope="module")
+def cases():
+    return random_cases(2024)
+
+
+def sliced_search(maze, start, end, influence_map=None):
+    cost_field = influence_map.cost if influence_map is not None else None
+    sliced = SlicedSearch(get_grid_search(maze), start, end, cost_field)
+    while not sliced.step(7):
+        pass
+    return sliced.path
+
+
+def test_sliced_search_matches_dijkstra(cases):
+    assert_matches_reference(sliced_search, cases)
+
+
+def test_sliced_search_with_influence_map_matches_dijkstra(cases):
+    rng = random.Random(8)
+    maps = []
+    for maze, _ in cases:
+        influence_map = InfluenceMap(maze, danger_radius=4)
+        influence_map.stamp("bat", (rng.randrange(len(maze)), rng.randrange(len(maze[0]))))
+        maps.append(influence_map)
+    assert_matches_reference(sliced_search, cases, maps)
+
+
+def test_scheduler_interleaves_searches_and_shares_one_cost_snapshot():
+    maze = corridor()
+    influence_map = InfluenceMap(maze, danger_radius=2)
+    scheduler = PathScheduler(get_grid_search(maze), frame_budget_ms=1000, slice_nodes=2)
+    scheduler.request("a", (0, 0), (3, 8), influence_map.cost)
+    scheduler.request("b", (3, 0), (0, 8), influence_map.cost)
+    # A repeated request for the same cells keeps the running search
+    pending = scheduler.pending["a"]
+    scheduler.request("a", (0, 0), (3, 8), influence_map.cost)
+    assert scheduler.pending["a"] is pending
+    assert scheduler.pending["a"].state.cost_field is scheduler.pending["b"].state.cost_field
+
+    finished = dict(scheduler.run())
+
+    assert len(scheduler) == 0
+    assert finished["a"].path == get_grid_search(maze).find_path((0, 0), (3, 8))
+    assert finished["b"].path[0] == (3, 0) and finished["b"].path[-1] == (0, 8)
+
+
+def test_cancelled_search_never_finishes():
+    maze = corridor()
+    scheduler = PathScheduler(get_grid_search(maze), frame_budget_ms=1000)
+    scheduler.request("a", (0, 0), (3, 8))
+    scheduler.cancel("a")
+    assert scheduler.run() == []